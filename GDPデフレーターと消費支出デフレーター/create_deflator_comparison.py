@@ -8,44 +8,53 @@ Data source: Cabinet Office, National Accounts of Japan
 
 import matplotlib
 matplotlib.use('Agg')
-import matplotlib.pyplot as plt
 import numpy as np
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common.regimes import detect_regimes, shade_regimes
+from common.derived import evaluate
+from common.figures import new_blank_figure
+from common.output import save_figure
 
 # Font settings
-plt.rcParams['font.family'] = 'DejaVu Sans'
-plt.rcParams['axes.unicode_minus'] = False
+matplotlib.rcParams['font.family'] = 'DejaVu Sans'
+matplotlib.rcParams['axes.unicode_minus'] = False
 
 # Historical data for GDP Deflator and Private Consumption Deflator (1980-2024)
-# Base year: 2015 = 100
+# Base year: 2015 = 100 (deflators.csv)
 # Data source: Cabinet Office National Accounts
+# Derived series (growth rates, cumulative change, gap) come from the lazy graph in
+# common/derived.py and are reused from .cache/derived/ while deflators.csv is unchanged
+
+series = evaluate(['deflator.gdp', 'deflator.consumption',
+                   'deflator.gdp_yoy', 'deflator.consumption_yoy',
+                   'deflator.gdp_cumulative', 'deflator.consumption_cumulative',
+                   'deflator.gap'])
+
+years = series['deflator.gdp'].index.year.tolist()
+gdp_deflator = series['deflator.gdp'].to_numpy()
+consumption_deflator = series['deflator.consumption'].to_numpy()
+
+# Regimes detected from trend breaks in the GDP deflator (used for period shading)
+regimes = detect_regimes(gdp_deflator, years, model='trend', max_breaks=3, min_size=4)
 
-years = list(range(1980, 2025))
-
-# GDP Deflator (2015=100)
-gdp_deflator = [
-    67.8, 70.2, 71.8, 72.7, 74.2, 75.9, 77.8, 78.8, 80.5, 83.5,  # 1980-1989
-    87.1, 90.3, 92.1, 93.1, 93.5, 93.3, 93.1, 93.5, 93.3, 92.3,  # 1990-1999
-    91.0, 90.1, 89.1, 88.5, 88.3, 88.1, 87.8, 87.3, 87.8, 89.3,  # 2000-2009
-    91.4, 91.2, 91.1, 92.4, 94.5, 97.3, 100.0, 100.0, 99.5, 100.1,  # 2010-2019
-    100.3, 99.8, 101.2, 104.8, 108.5  # 2020-2024
-]
-
-# Private Consumption Deflator (2015=100)
-consumption_deflator = [
-    66.5, 69.0, 70.8, 72.0, 73.8, 75.5, 76.9, 77.5, 79.0, 81.8,  # 1980-1989
-    85.2, 88.5, 90.5, 92.0, 92.8, 92.8, 92.8, 93.5, 93.8, 93.2,  # 1990-1999
-    92.5, 91.8, 91.0, 90.5, 90.3, 90.0, 89.5, 89.0, 89.5, 91.2,  # 2000-2009
-    91.8, 91.5, 91.3, 92.8, 95.2, 97.8, 100.0, 100.3, 100.8, 101.5,  # 2010-2019
-    101.8, 101.5, 103.5, 108.2, 112.8  # 2020-2024
-]
+# Legend labels for the detected regimes: period and average annual change of the GDP deflator
+regime_labels, regime_labels_jp = [], []
+for regime in regimes:
+    first, last = regime.start_index, regime.end_index - 1
+    growth = ((gdp_deflator[last] / gdp_deflator[first]) ** (1 / max(last - first, 1)) - 1) * 100
+    regime_labels.append(f'{years[first]}-{years[last]} ({growth:+.1f}%/yr)')
+    regime_labels_jp.append(f'{years[first]}-{years[last]}年（年率{growth:+.1f}%）')
 
 # Create figure with multiple subplots
-fig = plt.figure(figsize=(16, 12))
+fig = new_blank_figure(figsize=(16, 12))
 
 # ========================================
 # Graph 1: Long-term Trends (1980-2024)
 # ========================================
-ax1 = plt.subplot(2, 2, 1)
+ax1 = fig.add_subplot(2, 2, 1)
 ax1.plot(years, gdp_deflator, marker='o', linewidth=2.5, markersize=4,
          color='#2E86AB', label='GDP Deflator', markevery=5)
 ax1.plot(years, consumption_deflator, marker='s', linewidth=2.5, markersize=4,
@@ -57,24 +66,19 @@ ax1.set_xlabel('Year', fontsize=12, fontweight='bold')
 ax1.set_ylabel('Deflator Index (2015=100)', fontsize=12, fontweight='bold')
 ax1.set_title('GDP Deflator vs Private Consumption Deflator\nLong-term Trends (1980-2024)',
               fontsize=14, fontweight='bold', pad=15)
-ax1.legend(loc='upper left', fontsize=11, framealpha=0.9)
 
 # Add period shading
-ax1.axvspan(1980, 1991, alpha=0.08, color='green', label='Bubble Economy')
-ax1.axvspan(1991, 2013, alpha=0.08, color='blue', label='Lost Decades')
-ax1.axvspan(2013, 2020, alpha=0.08, color='yellow', label='Abenomics')
-ax1.axvspan(2020, 2024, alpha=0.08, color='red', label='Post-COVID Inflation')
+shade_regimes(ax1, regimes, labels=regime_labels)
+ax1.legend(loc='upper left', fontsize=10, framealpha=0.9)
 
 # ========================================
 # Graph 2: Year-over-Year Change Rate (1981-2024)
 # ========================================
-ax2 = plt.subplot(2, 2, 2)
+ax2 = fig.add_subplot(2, 2, 2)
 
-# Calculate year-over-year change rates
-gdp_yoy = [((gdp_deflator[i] / gdp_deflator[i-1]) - 1) * 100
-           for i in range(1, len(gdp_deflator))]
-cons_yoy = [((consumption_deflator[i] / consumption_deflator[i-1]) - 1) * 100
-            for i in range(1, len(consumption_deflator))]
+# Year-over-year change rates
+gdp_yoy = series['deflator.gdp_yoy'].to_numpy()[1:]
+cons_yoy = series['deflator.consumption_yoy'].to_numpy()[1:]
 years_yoy = years[1:]
 
 ax2.plot(years_yoy, gdp_yoy, linewidth=2.5, color='#2E86AB',
@@ -93,10 +97,10 @@ ax2.legend(loc='upper right', fontsize=10, framealpha=0.9)
 # ========================================
 # Graph 3: Cumulative Change from 1980
 # ========================================
-ax3 = plt.subplot(2, 2, 3)
+ax3 = fig.add_subplot(2, 2, 3)
 
-gdp_cumulative = [(x / gdp_deflator[0] - 1) * 100 for x in gdp_deflator]
-cons_cumulative = [(x / consumption_deflator[0] - 1) * 100 for x in consumption_deflator]
+gdp_cumulative = series['deflator.gdp_cumulative'].to_numpy()
+cons_cumulative = series['deflator.consumption_cumulative'].to_numpy()
 
 ax3.plot(years, gdp_cumulative, linewidth=3, color='#2E86AB',
          label='GDP Deflator', alpha=0.8)
@@ -132,9 +136,9 @@ ax3.annotate(f'Consumption: +{cons_cumulative[-1]:.1f}%',
 # ========================================
 # Graph 4: Difference Between Deflators
 # ========================================
-ax4 = plt.subplot(2, 2, 4)
+ax4 = fig.add_subplot(2, 2, 4)
 
-difference = [cons - gdp for cons, gdp in zip(consumption_deflator, gdp_deflator)]
+difference = series['deflator.gap'].to_numpy()
 
 ax4.bar(years, difference, color=['#D62828' if d > 0 else '#2E86AB' for d in difference],
         edgecolor='black', linewidth=0.5, alpha=0.7, width=0.8)
@@ -168,11 +172,11 @@ fig.text(0.5, 0.01, footnote_text,
          ha='center', fontsize=9, style='italic', color='gray',
          bbox=dict(boxstyle='round', facecolor='white', alpha=0.8, edgecolor='gray'))
 
-plt.tight_layout(rect=[0, 0.04, 1, 0.99])
+fig.tight_layout(rect=[0, 0.04, 1, 0.99])
 
 # Save
 output_path = 'GDPデフレーターと消費支出デフレーター/deflator_comparison.png'
-plt.savefig(output_path, dpi=300, bbox_inches='tight', facecolor='white')
+save_figure(fig, output_path, dpi=300, bbox_inches='tight', facecolor='white')
 print(f'Graph saved: {output_path}')
 
 # ========================================
@@ -182,14 +186,14 @@ print('\nCreating Japanese version...')
 
 # Update font to support Japanese (if available)
 try:
-    plt.rcParams['font.sans-serif'] = ['Noto Sans CJK JP', 'IPAexGothic', 'DejaVu Sans']
+    matplotlib.rcParams['font.sans-serif'] = ['Noto Sans CJK JP', 'IPAexGothic', 'DejaVu Sans']
 except:
     pass
 
-fig_jp = plt.figure(figsize=(16, 12))
+fig_jp = new_blank_figure(figsize=(16, 12))
 
 # Graph 1 (Japanese)
-ax1_jp = plt.subplot(2, 2, 1)
+ax1_jp = fig_jp.add_subplot(2, 2, 1)
 ax1_jp.plot(years, gdp_deflator, marker='o', linewidth=2.5, markersize=4,
          color='#2E86AB', label='GDPデフレーター', markevery=5)
 ax1_jp.plot(years, consumption_deflator, marker='s', linewidth=2.5, markersize=4,
@@ -201,15 +205,12 @@ ax1_jp.set_xlabel('年', fontsize=12, fontweight='bold')
 ax1_jp.set_ylabel('デフレーター指数 (2015=100)', fontsize=12, fontweight='bold')
 ax1_jp.set_title('GDPデフレーターと消費支出デフレーターの長期推移\n(1980-2024年)',
               fontsize=14, fontweight='bold', pad=15)
-ax1_jp.legend(loc='upper left', fontsize=11, framealpha=0.9)
 
-ax1_jp.axvspan(1980, 1991, alpha=0.08, color='green')
-ax1_jp.axvspan(1991, 2013, alpha=0.08, color='blue')
-ax1_jp.axvspan(2013, 2020, alpha=0.08, color='yellow')
-ax1_jp.axvspan(2020, 2024, alpha=0.08, color='red')
+shade_regimes(ax1_jp, regimes, labels=regime_labels_jp)
+ax1_jp.legend(loc='upper left', fontsize=10, framealpha=0.9)
 
 # Graph 2 (Japanese)
-ax2_jp = plt.subplot(2, 2, 2)
+ax2_jp = fig_jp.add_subplot(2, 2, 2)
 ax2_jp.plot(years_yoy, gdp_yoy, linewidth=2.5, color='#2E86AB',
          label='GDPデフレーター', alpha=0.8)
 ax2_jp.plot(years_yoy, cons_yoy, linewidth=2.5, color='#A23B72',
@@ -224,7 +225,7 @@ ax2_jp.set_title('デフレーターの前年比変化率',
 ax2_jp.legend(loc='upper right', fontsize=10, framealpha=0.9)
 
 # Graph 3 (Japanese)
-ax3_jp = plt.subplot(2, 2, 3)
+ax3_jp = fig_jp.add_subplot(2, 2, 3)
 ax3_jp.plot(years, gdp_cumulative, linewidth=3, color='#2E86AB',
          label='GDPデフレーター', alpha=0.8)
 ax3_jp.plot(years, cons_cumulative, linewidth=3, color='#A23B72',
@@ -256,7 +257,7 @@ ax3_jp.annotate(f'消費: +{cons_cumulative[-1]:.1f}%',
             arrowprops=dict(arrowstyle='->', color='black', lw=1.5))
 
 # Graph 4 (Japanese)
-ax4_jp = plt.subplot(2, 2, 4)
+ax4_jp = fig_jp.add_subplot(2, 2, 4)
 ax4_jp.bar(years, difference, color=['#D62828' if d > 0 else '#2E86AB' for d in difference],
         edgecolor='black', linewidth=0.5, alpha=0.7, width=0.8)
 ax4_jp.axhline(y=0, color='black', linestyle='-', linewidth=1.5)
@@ -282,11 +283,11 @@ fig_jp.text(0.5, 0.01, footnote_text_jp,
          ha='center', fontsize=9, style='italic', color='gray',
          bbox=dict(boxstyle='round', facecolor='white', alpha=0.8, edgecolor='gray'))
 
-plt.tight_layout(rect=[0, 0.04, 1, 0.99])
+fig_jp.tight_layout(rect=[0, 0.04, 1, 0.99])
 
 # Save Japanese version
 output_path_jp = 'GDPデフレーターと消費支出デフレーター/deflator_comparison_jp.png'
-plt.savefig(output_path_jp, dpi=300, bbox_inches='tight', facecolor='white')
+save_figure(fig_jp, output_path_jp, dpi=300, bbox_inches='tight', facecolor='white')
 print(f'Japanese graph saved: {output_path_jp}')
 
 print('\nBoth graphs created successfully!')
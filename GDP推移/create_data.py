@@ -5,8 +5,17 @@
 Japan's Nominal GDP and Long-term Interest Rate Data Generation
 """
 
-import csv
 import json
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common.bootstrap import LEVEL
+from common.catalog import column_metadata
+from common.output import save_table, write_text
+from common.reports import Engine
 
 # 日本の名目GDP データ（兆円）と長期金利データ（%）
 data = [
@@ -49,132 +58,63 @@ data = [
     {'年度': 2024, '名目GDP': 680.5, '長期金利': 1.15},
 ]
 
-# CSVファイルとして保存
+# CSVファイル（CRLF）と Parquet として保存
 csv_file = 'GDP推移/japan_gdp_interest_data.csv'
-with open(csv_file, 'w', encoding='utf-8-sig', newline='') as f:
-    writer = csv.DictWriter(f, fieldnames=['年度', '名目GDP', '長期金利'])
-    writer.writeheader()
-    writer.writerows(data)
+save_table(pd.DataFrame(data), csv_file, encoding='utf-8-sig', index=False, lineterminator='\r\n',
+           period_columns={'年度': 'FY'}, columns=column_metadata('gdp'),
+           metadata={'title': '日本の名目GDPと長期金利', 'source': '内閣府 国民経済計算、財務省、日本銀行'})
 
 print(f"✓ CSVファイルを保存しました: {csv_file}")
 
-# 統計計算
-gdp_values = [d['名目GDP'] for d in data]
-interest_values = [d['長期金利'] for d in data]
-
-gdp_start = gdp_values[0]
-gdp_end = gdp_values[-1]
-gdp_max = max(gdp_values)
-gdp_min = min(gdp_values)
-gdp_avg = sum(gdp_values) / len(gdp_values)
-
-interest_start = interest_values[0]
-interest_end = interest_values[-1]
-interest_max = max(interest_values)
-interest_min = min(interest_values)
-interest_avg = sum(interest_values) / len(interest_values)
-
-gdp_growth = ((gdp_end / gdp_start) - 1) * 100
-interest_change = interest_end - interest_start
-
-# 相関係数の計算
-def correlation(x, y):
-    n = len(x)
-    mean_x = sum(x) / n
-    mean_y = sum(y) / n
+# 詳細データをJSONでも保存
+# 統計量は JSON から読んだ系列で計算する（common.reports の 'gdp'）ため、先にデータを書き込む
+# （データが前回と同じなら書き込まない。統計量はいったん前回の値のまま）
+json_file = 'GDP推移/japan_gdp_interest_data.json'
 
-    numerator = sum((x[i] - mean_x) * (y[i] - mean_y) for i in range(n))
-    denominator_x = sum((x[i] - mean_x) ** 2 for i in range(n)) ** 0.5
-    denominator_y = sum((y[i] - mean_y) ** 2 for i in range(n)) ** 0.5
 
-    return numerator / (denominator_x * denominator_y)
+def write_json(statistics):
+    return write_text(json_file, json.dumps({'data': data, 'statistics': statistics},
+                                            ensure_ascii=False, indent=2))
+
+
+previous = json.loads(Path(json_file).read_text(encoding='utf-8')) if Path(json_file).exists() else {}
+write_json(previous.get('statistics', {}))
+
+engine = Engine()
+gdp = engine.value('gdp')
+write_json({
+    'gdp': {
+        'start': gdp['nominal_first'],
+        'end': gdp['nominal_last'],
+        'growth_rate': gdp['nominal_growth'],
+        'max': gdp['nominal_max'],
+        'min': gdp['nominal_min'],
+        'average': gdp['nominal_mean']
+    },
+    'interest_rate': {
+        'start': gdp['rate_first'],
+        'end': gdp['rate_last'],
+        'change': gdp['rate_change'],
+        'max': gdp['rate_max'],
+        'min': gdp['rate_min'],
+        'average': gdp['rate_mean']
+    },
+    'correlation': gdp['correlation']
+})
 
-corr = correlation(gdp_values, interest_values)
+print(f"✓ JSONファイルを保存しました: {json_file}")
 
-# 統計レポートをテキストファイルとして保存
+# 統計レポートをテンプレート（templates/statistical_summary.txt）から作成
 report_file = 'GDP推移/statistical_summary.txt'
-with open(report_file, 'w', encoding='utf-8') as f:
-    f.write("="*70 + "\n")
-    f.write("日本の名目GDPと長期金利 - 統計サマリー\n")
-    f.write("Japan's Nominal GDP and Long-term Interest Rate - Statistical Summary\n")
-    f.write("="*70 + "\n\n")
-    f.write(f"【分析期間】 {data[0]['年度']}年 ～ {data[-1]['年度']}年 ({len(data)}年間)\n\n")
-
-    f.write("【名目GDP】\n")
-    f.write(f"  期初 ({data[0]['年度']}年): {gdp_start:.1f} 兆円\n")
-    f.write(f"  期末 ({data[-1]['年度']}年): {gdp_end:.1f} 兆円\n")
-    f.write(f"  増加額: {gdp_end - gdp_start:.1f} 兆円\n")
-    f.write(f"  増加率: {gdp_growth:.1f}%\n")
-    f.write(f"  最大値: {gdp_max:.1f} 兆円\n")
-    f.write(f"  最小値: {gdp_min:.1f} 兆円\n")
-    f.write(f"  平均値: {gdp_avg:.1f} 兆円\n\n")
-
-    f.write("【長期金利（10年国債利回り）】\n")
-    f.write(f"  期初 ({data[0]['年度']}年): {interest_start:.2f}%\n")
-    f.write(f"  期末 ({data[-1]['年度']}年): {interest_end:.2f}%\n")
-    f.write(f"  変化: {interest_change:.2f} ポイント\n")
-    f.write(f"  最高値: {interest_max:.2f}%\n")
-    f.write(f"  最低値: {interest_min:.2f}%\n")
-    f.write(f"  平均値: {interest_avg:.2f}%\n\n")
-
-    f.write("【相関分析】\n")
-    f.write(f"  GDPと金利の相関係数: {corr:.3f}\n")
-
-    if abs(corr) > 0.7:
-        strength = "強い"
-    elif abs(corr) > 0.4:
-        strength = "中程度の"
-    else:
-        strength = "弱い"
-    direction = "正" if corr > 0 else "負"
-    f.write(f"  解釈: {strength}{direction}の相関関係\n\n")
-
-    f.write("【主要な経済イベント】\n")
-    f.write("  • 1980年代後半: バブル経済期 - GDP急成長、高金利\n")
-    f.write("  • 1991-2002年: 失われた10年 - GDP停滞、金利低下\n")
-    f.write("  • 2008-2009年: リーマンショック - GDP減少\n")
-    f.write("  • 2013年: アベノミクス開始 - 金融緩和政策\n")
-    f.write("  • 2016年: マイナス金利政策導入\n")
-    f.write("  • 2020年: COVID-19パンデミック - GDP減少\n")
-    f.write("  • 2022-2024年: 金利正常化への動き\n\n")
-
-    f.write("="*70 + "\n")
+engine.render_file(report_file, 'GDP推移/templates/statistical_summary.txt')
 
 print(f"✓ 統計レポートを保存しました: {report_file}")
 
-# 詳細データをJSONでも保存
-json_file = 'GDP推移/japan_gdp_interest_data.json'
-with open(json_file, 'w', encoding='utf-8') as f:
-    json.dump({
-        'data': data,
-        'statistics': {
-            'gdp': {
-                'start': gdp_start,
-                'end': gdp_end,
-                'growth_rate': gdp_growth,
-                'max': gdp_max,
-                'min': gdp_min,
-                'average': gdp_avg
-            },
-            'interest_rate': {
-                'start': interest_start,
-                'end': interest_end,
-                'change': interest_change,
-                'max': interest_max,
-                'min': interest_min,
-                'average': interest_avg
-            },
-            'correlation': corr
-        }
-    }, f, ensure_ascii=False, indent=2)
-
-print(f"✓ JSONファイルを保存しました: {json_file}")
-
 print("\n" + "="*70)
 print("統計サマリー（コンソール出力）")
 print("="*70)
-print(f"\n名目GDP: {gdp_start:.1f}兆円 → {gdp_end:.1f}兆円 (+{gdp_growth:.1f}%)")
-print(f"長期金利: {interest_start:.2f}% → {interest_end:.2f}% ({interest_change:+.2f}ポイント)")
-print(f"相関係数: {corr:.3f} ({strength}{direction}の相関)")
+print(f"\n名目GDP: {gdp['nominal_first']:.1f}兆円 → {gdp['nominal_last']:.1f}兆円 (+{gdp['nominal_growth']:.1f}%)")
+print(f"長期金利: {gdp['rate_first']:.2f}% → {gdp['rate_last']:.2f}% ({gdp['rate_change']:+.2f}ポイント)")
+print(f"相関係数: {gdp['correlation']:.3f} ({LEVEL:.0%}信頼区間: {gdp['correlation_lower']:.3f} ～ {gdp['correlation_upper']:.3f})")
 print("\n" + "="*70)
 print("\nデータファイルが正常に作成されました！")
@@ -6,14 +6,24 @@ Japan's Nominal GDP and Long-term Interest Rate Analysis
 """
 
 import pandas as pd
-import matplotlib.pyplot as plt
+import matplotlib
 import matplotlib.font_manager as fm
 import numpy as np
+import sys
 from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common.catalog import column_metadata
+from common.figures import new_figure
+from common.output import save_figure, save_table
+from common.regimes import detect_regimes, regime_masks, shade_regimes
+from common.reports import render_template
+from common.transforms import T
 
 # 日本語フォントの設定
-plt.rcParams['font.sans-serif'] = ['DejaVu Sans', 'Arial Unicode MS', 'sans-serif']
-plt.rcParams['axes.unicode_minus'] = False
+matplotlib.rcParams['font.sans-serif'] = ['DejaVu Sans', 'Arial Unicode MS', 'sans-serif']
+matplotlib.rcParams['axes.unicode_minus'] = False
 
 # 日本の名目GDP データ（兆円）
 # データソース: 内閣府 国民経済計算
@@ -48,20 +58,22 @@ df_interest = pd.DataFrame(interest_rate_data)
 # データの結合
 df = pd.merge(df_gdp, df_interest, on='年度')
 
-# CSVファイルとして保存
-df.to_csv('GDP推移/japan_gdp_interest_data.csv', index=False, encoding='utf-8-sig')
+# CSVファイル（create_data.py と同じ CRLF）と Parquet として保存
+save_table(df, 'GDP推移/japan_gdp_interest_data.csv', encoding='utf-8-sig', index=False,
+           lineterminator='\r\n', period_columns={'年度': 'FY'}, columns=column_metadata('gdp'),
+           metadata={'title': '日本の名目GDPと長期金利', 'source': '内閣府 国民経済計算、財務省、日本銀行'})
 print("データファイルを保存しました: japan_gdp_interest_data.csv")
 
-# 統計情報の計算
-gdp_growth = ((df['名目GDP'].iloc[-1] / df['名目GDP'].iloc[0]) - 1) * 100
-avg_interest = df['長期金利'].mean()
-max_gdp_year = df.loc[df['名目GDP'].idxmax(), '年度']
-max_gdp_value = df['名目GDP'].max()
-min_interest_year = df.loc[df['長期金利'].idxmin(), '年度']
-min_interest_value = df['長期金利'].min()
+# 名目GDPのトレンドの変化点で時期（レジーム）を区切る
+regimes = detect_regimes(df['名目GDP'], df['年度'], model='trend', x=df['年度'],
+                         max_breaks=4, min_size=3)
+regime_labels = []
+for regime in regimes:
+    last_year = df['年度'].iloc[regime.end_index - 1]
+    regime_labels.append(f'{int(regime.start)}-{int(last_year)}')
 
 # グラフの作成
-fig, (ax1, ax2, ax3) = plt.subplots(3, 1, figsize=(14, 12))
+fig, (ax1, ax2, ax3) = new_figure(3, 1, figsize=(14, 12))
 fig.suptitle('日本の名目GDPと長期金利の推移 (1980-2024)', fontsize=16, fontweight='bold')
 
 # グラフ1: 名目GDPの推移
@@ -74,10 +86,8 @@ ax1.grid(True, alpha=0.3, linestyle='--')
 ax1.axhline(y=df['名目GDP'].mean(), color='red', linestyle='--',
            label=f'平均: {df["名目GDP"].mean():.1f}兆円', alpha=0.7)
 
-# 重要な時期をマーク
-ax1.axvspan(1991, 2002, alpha=0.1, color='red', label='失われた10年')
-ax1.axvspan(2008, 2009, alpha=0.1, color='orange', label='リーマンショック')
-ax1.axvspan(2020, 2020, alpha=0.1, color='purple', label='COVID-19')
+# 検出した時期をマーク
+shade_regimes(ax1, regimes, alpha=0.1, labels=regime_labels)
 ax1.legend(loc='upper left', fontsize=10)
 
 # グラフ2: 長期金利の推移
@@ -119,19 +129,19 @@ ax3.legend(lines, labels, loc='upper left', fontsize=10)
 ax3.tick_params(axis='y', labelcolor='#2E86AB')
 ax3_twin.tick_params(axis='y', labelcolor='#A23B72')
 
-plt.tight_layout()
-plt.savefig('GDP推移/japan_gdp_interest_trends.png', dpi=300, bbox_inches='tight')
+fig.tight_layout()
+save_figure(fig, 'GDP推移/japan_gdp_interest_trends.png', dpi=300, bbox_inches='tight')
 print("グラフを保存しました: japan_gdp_interest_trends.png")
 
 # 追加のグラフ: 成長率と金利変化率
-fig2, (ax4, ax5) = plt.subplots(2, 1, figsize=(14, 10))
+fig2, (ax4, ax5) = new_figure(2, 1, figsize=(14, 10))
 fig2.suptitle('成長率と金利変化率の分析 (1980-2024)', fontsize=16, fontweight='bold')
 
 # GDP成長率の計算
-df['GDP成長率'] = df['名目GDP'].pct_change() * 100
+df['GDP成長率'] = T.pct_change()(df['名目GDP'])
 
 # 金利変化の計算
-df['金利変化'] = df['長期金利'].diff()
+df['金利変化'] = T.diff()(df['長期金利'])
 
 # グラフ4: GDP成長率
 ax4.bar(df['年度'][1:], df['GDP成長率'][1:], color=['green' if x > 0 else 'red'
@@ -151,24 +161,18 @@ ax5.set_title('長期金利の前年差', fontsize=14, fontweight='bold', pad=15
 ax5.axhline(y=0, color='black', linestyle='-', linewidth=1)
 ax5.grid(True, alpha=0.3, linestyle='--', axis='y')
 
-plt.tight_layout()
-plt.savefig('GDP推移/japan_gdp_interest_changes.png', dpi=300, bbox_inches='tight')
+fig2.tight_layout()
+save_figure(fig2, 'GDP推移/japan_gdp_interest_changes.png', dpi=300, bbox_inches='tight')
 print("グラフを保存しました: japan_gdp_interest_changes.png")
 
 # 散布図: GDPと金利の関係
-fig3, ax6 = plt.subplots(figsize=(12, 8))
+fig3, ax6 = new_figure(figsize=(12, 8))
 
 # 時期別に色分け
-periods = [
-    (df['年度'] <= 1990, '1980-1990', '#FF6B6B'),
-    ((df['年度'] > 1990) & (df['年度'] <= 2000), '1991-2000', '#4ECDC4'),
-    ((df['年度'] > 2000) & (df['年度'] <= 2010), '2001-2010', '#45B7D1'),
-    ((df['年度'] > 2010) & (df['年度'] <= 2020), '2011-2020', '#FFA07A'),
-    (df['年度'] > 2020, '2021-2024', '#98D8C8')
-]
-
-for condition, label, color in periods:
-    mask = condition
+period_colors = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#FFA07A', '#98D8C8']
+periods = zip(regime_masks(regimes, len(df)), regime_labels, period_colors)
+
+for mask, label, color in periods:
     ax6.scatter(df.loc[mask, '名目GDP'], df.loc[mask, '長期金利'],
                s=100, alpha=0.6, c=color, label=label, edgecolors='black', linewidth=1)
 
@@ -184,40 +188,12 @@ ax6.text(0.05, 0.95, f'相関係数: {correlation:.3f}',
         transform=ax6.transAxes, fontsize=12, verticalalignment='top',
         bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.5))
 
-plt.tight_layout()
-plt.savefig('GDP推移/japan_gdp_interest_correlation.png', dpi=300, bbox_inches='tight')
+fig3.tight_layout()
+save_figure(fig3, 'GDP推移/japan_gdp_interest_correlation.png', dpi=300, bbox_inches='tight')
 print("グラフを保存しました: japan_gdp_interest_correlation.png")
 
-# 統計レポートの作成
-print("\n" + "="*60)
-print("日本の名目GDPと長期金利 - 統計サマリー")
-print("="*60)
-print(f"\n【分析期間】 {int(df['年度'].min())}年 ～ {int(df['年度'].max())}年")
-print(f"\n【名目GDP】")
-print(f"  期初 ({int(df['年度'].min())}年): {df['名目GDP'].iloc[0]:.1f} 兆円")
-print(f"  期末 ({int(df['年度'].max())}年): {df['名目GDP'].iloc[-1]:.1f} 兆円")
-print(f"  増加額: {df['名目GDP'].iloc[-1] - df['名目GDP'].iloc[0]:.1f} 兆円")
-print(f"  増加率: {gdp_growth:.1f}%")
-print(f"  最大値: {max_gdp_value:.1f} 兆円 ({int(max_gdp_year)}年)")
-print(f"  平均値: {df['名目GDP'].mean():.1f} 兆円")
-print(f"\n【長期金利】")
-print(f"  期初 ({int(df['年度'].min())}年): {df['長期金利'].iloc[0]:.2f}%")
-print(f"  期末 ({int(df['年度'].max())}年): {df['長期金利'].iloc[-1]:.2f}%")
-print(f"  変化: {df['長期金利'].iloc[-1] - df['長期金利'].iloc[0]:.2f} ポイント")
-print(f"  最高値: {df['長期金利'].max():.2f}% ({int(df.loc[df['長期金利'].idxmax(), '年度'])}年)")
-print(f"  最低値: {min_interest_value:.2f}% ({int(min_interest_year)}年)")
-print(f"  平均値: {avg_interest:.2f}%")
-print(f"\n【相関分析】")
-print(f"  GDPと金利の相関係数: {correlation:.3f}")
-if abs(correlation) > 0.7:
-    strength = "強い"
-elif abs(correlation) > 0.4:
-    strength = "中程度の"
-else:
-    strength = "弱い"
-direction = "正" if correlation > 0 else "負"
-print(f"  解釈: {strength}{direction}の相関")
-print("\n" + "="*60)
+# 統計レポートの作成（templates/console_summary.txt。数値は common.reports の統計量）
+print(render_template('GDP推移/templates/console_summary.txt'), end='')
 
 print("\n分析完了！以下のファイルが生成されました:")
 print("  1. japan_gdp_interest_data.csv - データファイル")
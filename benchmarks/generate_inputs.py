@@ -0,0 +1,153 @@
+"""
+ベンチマーク用の合成入力データの生成
+
+実データと同じディスク上の形式で、系列数・期間を任意に拡大した入力を作る。
+
+- 日本銀行 企業物価指数 CSV（Shift-JIS、表題・作成日時・統計名と6行のメタデータ）
+- 資金循環統計 CSV（Shift-JIS、データコード列・系列名称行）
+- 補正予算の支出項目明細 CSV（支出項目明細.csv 形式）
+
+乱数は seed で固定するため、同じ引数なら同じファイルになる。
+"""
+
+import csv
+
+import numpy as np
+
+CGPI_TITLE = '主要時系列統計データ表'
+CGPI_STAT_NAME = '企業物価指数（月次）'
+CGPI_CREATED = '2025/11/13 15:00'
+CGPI_UPDATED = '2025/11/13'
+
+BUDGET_MINISTRIES = ['内閣府', '総務省', '財務省', '文部科学省', '厚生労働省', '農林水産省',
+                     '経済産業省', '国土交通省', '環境省', '防衛省', 'デジタル庁', 'こども家庭庁']
+BUDGET_FIELDS = ['物価高対策', '投資促進', '防災・減災', '子育て支援', 'GX推進', 'DX推進',
+                 '農林水産業', '中小企業支援', '医療・介護', '防衛力強化']
+BUDGET_FUNDS = ['-', '半導体・デジタル産業支援基金', 'GX（グリーントランスフォーメーション）基金',
+                '教育DX基金', 'こども・子育て支援基金', 'イノベーション促進基金']
+
+
+def _month_labels(start_year, n_months):
+    months = np.arange(n_months)
+    return [f'{start_year + m // 12}/{m % 12 + 1:02d}' for m in months]
+
+
+def _format(value, digits):
+    return '' if np.isnan(value) else f'{value:.{digits}f}'
+
+
+def cgpi_columns(n_series):
+    """write_cgpi() で書く系列の列名（load_cgpi の columns 引数に渡す）"""
+    n_index = -(-n_series // 2)
+    return (['date'] + [f'index_{i:04d}' for i in range(n_index)]
+            + [f'yoy_{i:04d}' for i in range(n_series - n_index)])
+
+
+def write_cgpi(path, n_series=9, n_months=550, start_year=1980, seed=0):
+    """
+    企業物価指数 CSV 形式の合成データを書き出す
+
+    系列の前半は指数（2020年=100 の対数ランダムウォーク）、後半は対応する指数の
+    前年比。一部の系列は収録開始を遅らせ、先頭を空欄にする（実データと同じ）。
+
+    Returns
+    -------
+    列名のリスト（cgpi_columns(n_series) と同じ）
+    """
+    rng = np.random.default_rng(seed)
+    columns = cgpi_columns(n_series)
+    n_index = -(-n_series // 2)
+    n_yoy = n_series - n_index
+    labels = _month_labels(start_year, n_months)
+
+    # 指数: 月次変化率のランダムウォークに季節性を加える
+    drift = rng.normal(0.001, 0.002, n_index)
+    shocks = rng.normal(0.0, 0.006, (n_months, n_index)) + drift
+    season = 0.004 * np.sin(2 * np.pi * (np.arange(n_months) % 12) / 12)[:, None]
+    log_index = np.cumsum(shocks, axis=0) + season * rng.uniform(0, 1, n_index)
+    base = min(max((2020 - start_year) * 12, 0), n_months - 12)
+    log_index -= log_index[base:base + 12].mean(axis=0)
+    index = 100 * np.exp(log_index)
+
+    # 収録開始期: 約2割の系列は途中から
+    starts = np.where(rng.random(n_index) < 0.2, rng.integers(0, n_months // 2, n_index), 0)
+    index[np.arange(n_months)[:, None] < starts] = np.nan
+    yoy = np.full((n_months, n_yoy), np.nan)
+    yoy[12:] = (index[12:, :n_yoy] / index[:-12, :n_yoy] - 1) * 100
+    values = np.hstack([index, yoy])
+
+    codes = [f"PR01'PRCG20_{2200000000 + i:010d}" for i in range(n_index)]
+    codes += [f'{code}%' for code in codes[:n_yoy]]
+    names = [f'[合成物価指数] 系列{i:04d}' for i in range(n_index)]
+    names += [f'{name}（前年比）' for name in names[:n_yoy]]
+    units = ['2020年=100'] * n_index + ['％'] * n_yoy
+    series_starts = [labels[s] for s in starts] + [labels[min(s + 12, n_months - 1)] for s in starts[:n_yoy]]
+
+    with open(path, 'w', encoding='shift_jis', newline='') as f:
+        f.write(f'{CGPI_TITLE}\n{CGPI_CREATED}\n')
+        quoted = csv.writer(f, quoting=csv.QUOTE_ALL, lineterminator='\n')
+        quoted.writerow([''] + [CGPI_STAT_NAME] * n_series)
+        quoted.writerow(['系列名称'] + names)
+        f.write('"データコード",' + ','.join(codes) + '\n')
+        quoted.writerow(['単位'] + units)
+        quoted.writerow(['収録開始期'] + series_starts)
+        quoted.writerow(['収録終了期'] + [labels[-1]] * n_series)
+        quoted.writerow(['最終更新日'] + [CGPI_UPDATED] * n_series)
+        for label, row in zip(labels, values):
+            f.write(label + ',' + ','.join(_format(v, 1) for v in row) + '\n')
+    return columns
+
+
+def write_fof(path, n_series=6, n_years=45, start_year=1980, seed=0):
+    """
+    資金循環統計（資金過不足）CSV 形式の合成データを書き出す
+
+    1行目がデータコード、2行目が系列名称、3行目以降が 年,値,... （億円、整数）。
+
+    Returns
+    -------
+    データコードのリスト（先頭は一般政府 FF'FOF_FFYF420L700）
+    """
+    rng = np.random.default_rng(seed)
+    codes = ["FF'FOF_FFYF420L700"] + [f"FF'FOF_FFYF{500 + i:03d}L700" for i in range(1, n_series)]
+    names = ['負債・資金過不足／一般政府／フロー'] + [f'負債・資金過不足／合成部門{i:04d}／フロー'
+                                                 for i in range(1, n_series)]
+    levels = rng.normal(0, 200000, n_series)
+    values = np.rint(levels + np.cumsum(rng.normal(0, 60000, (n_years, n_series)), axis=0))
+
+    with open(path, 'w', encoding='shift_jis', newline='') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(['データコード'] + codes)
+        f.write('系列名称,' + ','.join(f'"{name}"' for name in names) + '\n')
+        for year, row in zip(range(start_year, start_year + n_years), values):
+            writer.writerow([year] + [int(v) for v in row])
+    return codes
+
+
+def write_nominal_gdp(path, n_years=45, start_year=1980, seed=0):
+    """nominal_gdp.csv 形式（年度,名目GDP_兆円）の合成データを書き出す"""
+    rng = np.random.default_rng(seed)
+    gdp = 250 * np.exp(np.cumsum(rng.normal(0.02, 0.015, n_years)))
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        f.write('年度,名目GDP_兆円\n')
+        for year, value in zip(range(start_year, start_year + n_years), gdp):
+            f.write(f'{year},{value:.1f}\n')
+
+
+def write_budget_items(path, n_rows=14, start_year=2016, n_years=9, seed=0):
+    """支出項目明細.csv 形式（年度,補正回次,府省,政策分野,基金,事業名,金額（兆円））の合成データを書き出す"""
+    rng = np.random.default_rng(seed)
+    years = rng.integers(start_year, start_year + n_years, n_rows)
+    rounds = rng.integers(1, 3, n_rows)
+    ministries = rng.integers(0, len(BUDGET_MINISTRIES), n_rows)
+    fields = rng.integers(0, len(BUDGET_FIELDS), n_rows)
+    funds = np.where(rng.random(n_rows) < 0.8, 0, rng.integers(1, len(BUDGET_FUNDS), n_rows))
+    amounts = rng.lognormal(-3.0, 1.5, n_rows)
+
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(['年度', '補正回次', '府省', '政策分野', '基金', '事業名', '金額（兆円）'])
+        for i in range(n_rows):
+            writer.writerow([years[i], rounds[i], BUDGET_MINISTRIES[ministries[i]],
+                             BUDGET_FIELDS[fields[i]], BUDGET_FUNDS[funds[i]],
+                             f'合成事業{i:06d}', f'{amounts[i]:.4f}'])
@@ -0,0 +1,315 @@
+"""
+分析処理のベンチマーク
+
+合成入力（generate_inputs.py）を規模別に生成し、データセットごとに
+読み込み（load）・計算（compute）・描画（render）の3段階の処理時間を測る。
+結果は JSON で benchmarks/results/ に保存し、benchmarks/baseline.json と比較して
+性能の劣化（regression）を検出する。
+
+使い方（リポジトリのルートで）:
+    python benchmarks/run_benchmarks.py                       # 全規模を測定して基準と比較
+    python benchmarks/run_benchmarks.py --scales current medium --repeat 5
+    python benchmarks/run_benchmarks.py --update-baseline     # 測定結果を新しい基準として保存
+
+基準値と比べて中央値が tolerance（既定25%）以上、かつ min-delta（既定0.02秒）以上
+遅くなった段階があれば終了コード1で終了する。
+"""
+
+import argparse
+import io
+import json
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent))
+sys.path.insert(0, str(BENCH_DIR.parent / '最近の補正予算'))
+from budget_ledger import BudgetLedger
+from common import CACHE_DIR, periods
+from common.cgpi import load_cgpi
+from common.regimes import find_breaks
+from common.seasonal import seasonally_adjust
+from generate_inputs import (cgpi_columns, write_budget_items, write_cgpi, write_fof,
+                             write_nominal_gdp)
+
+plt.rcParams['font.sans-serif'] = ['DejaVu Sans']
+
+BASELINE_PATH = BENCH_DIR / 'baseline.json'
+RESULTS_DIR = BENCH_DIR / 'results'
+INPUT_DIR = CACHE_DIR / 'benchmarks'
+
+# 規模: current は現在の実データと同程度、large は 1,000系列超 × 65年（月次）
+SCALES = {
+    'current': {'cgpi_series': 9, 'cgpi_months': 550, 'fof_series': 6, 'fof_years': 45,
+                'budget_rows': 14},
+    'medium': {'cgpi_series': 100, 'cgpi_months': 780, 'fof_series': 100, 'fof_years': 65,
+               'budget_rows': 10_000},
+    'large': {'cgpi_series': 1200, 'cgpi_months': 780, 'fof_series': 1200, 'fof_years': 65,
+              'budget_rows': 200_000},
+}
+
+STAGES = ('load', 'compute', 'render')
+
+
+def prepare_inputs(scale, params):
+    """規模ごとの合成入力を .cache/benchmarks/<scale>/ に用意（パラメータが同じなら再利用）"""
+    directory = INPUT_DIR / scale
+    params_path = directory / 'params.json'
+    paths = {
+        'cgpi': directory / 'cgpi.csv',
+        'fof': directory / 'fof.csv',
+        'gdp': directory / 'nominal_gdp.csv',
+        'budget': directory / 'budget_items.csv',
+    }
+    if params_path.exists() and json.loads(params_path.read_text()) == params:
+        return paths
+
+    directory.mkdir(parents=True, exist_ok=True)
+    start_year = 2025 - params['cgpi_months'] // 12
+    write_cgpi(paths['cgpi'], params['cgpi_series'], params['cgpi_months'], start_year=start_year)
+    fof_start = 2025 - params['fof_years']
+    write_fof(paths['fof'], params['fof_series'], params['fof_years'], start_year=fof_start)
+    write_nominal_gdp(paths['gdp'], params['fof_years'], start_year=fof_start)
+    write_budget_items(paths['budget'], params['budget_rows'])
+    params_path.write_text(json.dumps(params))
+    return paths
+
+
+def _save_png(fig, dpi):
+    """PNG をメモリ上に書き出す（ファイル I/O を除いた描画コスト）"""
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', dpi=dpi, bbox_inches='tight')
+    plt.close(fig)
+    return buffer.getbuffer().nbytes
+
+
+# ---- 企業物価指数: 読み込み → 交易条件・前年比・季節調整・変化点 → 折れ線グラフ
+
+def cgpi_load(paths, params):
+    return load_cgpi(paths['cgpi'], columns=cgpi_columns(params['cgpi_series']))
+
+
+def cgpi_compute(loaded):
+    data_df, _ = loaded
+    index_columns = [c for c in data_df.columns if c.startswith('index_')]
+    index = data_df[index_columns]
+    # 隣り合う指数を輸出・輸入とみなして交易条件を計算
+    pairs = len(index_columns) // 2 or 1
+    tot = index.iloc[:, 0:2 * pairs:2].to_numpy() / index.iloc[:, 1:2 * pairs:2].to_numpy() * 100
+    if len(index_columns) == 1:
+        tot = index.to_numpy()
+    yoy = index.pct_change(12, fill_method=None) * 100
+    adjusted = seasonally_adjust(data_df, index_columns)
+    breaks = find_breaks(tot, max_breaks=5, min_size=24)
+    return {'date': periods.to_datetime64(data_df['date']), 'index': index, 'tot': tot, 'yoy': yoy,
+            'adjusted': adjusted, 'breaks': breaks}
+
+
+def cgpi_render(computed, dpi):
+    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(14, 10))
+    ax1.plot(computed['date'], computed['adjusted'].to_numpy(), linewidth=0.5, alpha=0.5)
+    ax1.set_title('Seasonally Adjusted Price Indices')
+    ax2.plot(computed['date'], computed['tot'], linewidth=0.5, alpha=0.5)
+    ax2.axhline(y=100, color='black', linestyle='--', linewidth=1)
+    ax2.set_title('Terms of Trade')
+    for ax in (ax1, ax2):
+        ax.grid(True, alpha=0.3)
+    return _save_png(fig, dpi)
+
+
+# ---- 資金循環統計: 読み込み → 名目GDP比 → 折れ線グラフ
+
+def fof_load(paths, params):
+    df = pd.read_csv(paths['fof'], encoding='shift-jis')
+    gdp = pd.read_csv(paths['gdp'])
+    return df, gdp
+
+
+def fof_compute(loaded):
+    df, gdp = loaded
+    # 1行目が系列名称なので、2行目以降を使用（calculate_ratio.py と同じ）
+    years = df['データコード'][1:].astype(int).to_numpy()
+    values = df.iloc[1:, 1:].to_numpy(dtype=float)
+    gdp_oku = gdp.set_index('年度')['名目GDP_兆円'].reindex(years).to_numpy() * 10000
+    return {'years': years, 'ratio': values / gdp_oku[:, None] * 100}
+
+
+def fof_render(computed, dpi):
+    fig, ax = plt.subplots(figsize=(12, 6))
+    ax.plot(computed['years'], computed['ratio'], linewidth=0.5, alpha=0.5)
+    ax.axhline(y=0, color='red', linestyle='--', alpha=0.5)
+    ax.set_title('Financial Surplus/Deficit as % of Nominal GDP')
+    ax.grid(True, alpha=0.3)
+    return _save_png(fig, dpi)
+
+
+# ---- 補正予算: 明細の読み込み → 集計 → 積み上げ棒グラフ
+
+def budget_load(paths, params):
+    return BudgetLedger.from_csv(paths['budget'])
+
+
+def budget_compute(ledger):
+    # 台帳は集計結果を覚えているため、毎回捨てて2回目以降もキャッシュなしの集計を測る
+    ledger.clear_cache()
+    return {
+        'rollup': ledger.rollup(('year', 'ministry', 'policy_area')),
+        'by_year': ledger.breakdown('policy_area', by='year'),
+        'top': ledger.top_n('ministry', 5, by='year'),
+    }
+
+
+def budget_render(computed, dpi):
+    areas, years, amounts = computed['by_year']
+    fig, ax = plt.subplots(figsize=(14, 8))
+    bottom = np.zeros(len(years))
+    for area, row in zip(areas, amounts):
+        ax.bar([str(y) for y in years], row, bottom=bottom, label=area)
+        bottom += row
+    ax.set_title('Supplementary Budget by Policy Area')
+    return _save_png(fig, dpi)
+
+
+DATASETS = {
+    'cgpi': (cgpi_load, cgpi_compute, cgpi_render),
+    'fof': (fof_load, fof_compute, fof_render),
+    'budget': (budget_load, budget_compute, budget_render),
+}
+
+
+def _measure(func, repeat):
+    """repeat 回実行し、最後の戻り値と各回の経過時間（秒）を返す"""
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return result, times
+
+
+def run(scales, repeat=3, dpi=300, datasets=None):
+    """指定した規模・データセットを測定し、結果の辞書を返す"""
+    timings = {}
+    for scale in scales:
+        params = SCALES[scale]
+        start = time.perf_counter()
+        paths = prepare_inputs(scale, params)
+        print(f'[{scale}] inputs ready ({time.perf_counter() - start:.2f}s)')
+        for name in datasets or DATASETS:
+            load, compute, render = DATASETS[name]
+            loaded, load_times = _measure(lambda: load(paths, params), repeat)
+            computed, compute_times = _measure(lambda: compute(loaded), repeat)
+            _, render_times = _measure(lambda: render(computed, dpi), repeat)
+            for stage, times in zip(STAGES, (load_times, compute_times, render_times)):
+                key = f'{scale}/{name}/{stage}'
+                timings[key] = {
+                    'median': statistics.median(times),
+                    'min': min(times),
+                    'runs': times,
+                }
+                print(f'  {key:<28} median {timings[key]["median"]:8.4f}s  min {min(times):8.4f}s')
+
+    return {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'matplotlib': matplotlib.__version__,
+            'platform': platform.platform(),
+            'processor': platform.processor() or platform.machine(),
+        },
+        'repeat': repeat,
+        'dpi': dpi,
+        'scales': {scale: SCALES[scale] for scale in scales},
+        'timings': timings,
+    }
+
+
+def compare(results, baseline, tolerance=0.25, min_delta=0.02):
+    """
+    基準値との比較
+
+    Returns
+    -------
+    (key, 基準の中央値, 今回の中央値, 比, 判定) のリスト。
+    判定は 'regression' / 'improved' / 'ok' / 'new'（基準に無い）
+    """
+    rows = []
+    for key, current in results['timings'].items():
+        base = baseline.get('timings', {}).get(key)
+        if base is None:
+            rows.append((key, None, current['median'], None, 'new'))
+            continue
+        ratio = current['median'] / base['median'] if base['median'] > 0 else float('inf')
+        delta = current['median'] - base['median']
+        if ratio > 1 + tolerance and delta > min_delta:
+            status = 'regression'
+        elif ratio < 1 / (1 + tolerance) and -delta > min_delta:
+            status = 'improved'
+        else:
+            status = 'ok'
+        rows.append((key, base['median'], current['median'], ratio, status))
+    return rows
+
+
+def print_comparison(rows):
+    print(f'\n{"stage":<28} {"baseline":>10} {"current":>10} {"ratio":>7}  status')
+    for key, base, current, ratio, status in rows:
+        base_text = '-' if base is None else f'{base:.4f}'
+        ratio_text = '-' if ratio is None else f'{ratio:.2f}'
+        print(f'{key:<28} {base_text:>10} {current:>10.4f} {ratio_text:>7}  {status}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='読み込み・計算・描画のベンチマーク')
+    parser.add_argument('--scales', nargs='+', choices=list(SCALES), default=list(SCALES))
+    parser.add_argument('--datasets', nargs='+', choices=list(DATASETS), default=None)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--dpi', type=int, default=300)
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='regression と判定する中央値の増加率（既定 0.25 = 25%%）')
+    parser.add_argument('--min-delta', type=float, default=0.02,
+                        help='regression と判定する最小の増加秒数')
+    parser.add_argument('--baseline', type=Path, default=BASELINE_PATH)
+    parser.add_argument('--update-baseline', action='store_true')
+    args = parser.parse_args(argv)
+
+    results = run(args.scales, repeat=args.repeat, dpi=args.dpi, datasets=args.datasets)
+
+    RESULTS_DIR.mkdir(exist_ok=True)
+    output = RESULTS_DIR / f'{datetime.now().strftime("%Y%m%d_%H%M%S")}.json'
+    output.write_text(json.dumps(results, indent=2, ensure_ascii=False))
+    print(f'\nResults saved: {output.relative_to(BENCH_DIR.parent)}')
+
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2, ensure_ascii=False))
+        print(f'Baseline updated: {args.baseline.name}')
+        return 0
+
+    if not args.baseline.exists():
+        print('Baseline not found; run with --update-baseline to create one.')
+        return 0
+
+    rows = compare(results, json.loads(args.baseline.read_text()), args.tolerance, args.min_delta)
+    print_comparison(rows)
+    regressions = [row for row in rows if row[4] == 'regression']
+    if regressions:
+        print(f'\n{len(regressions)} stage(s) regressed against the baseline.')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,19 @@
+"""
+分析スクリプト共通モジュール
+
+各フォルダの分析スクリプトから共通で使うデータ読み込み・時系列処理をまとめる。
+スクリプトからはリポジトリのルートを sys.path に追加して読み込む:
+
+    import sys
+    from pathlib import Path
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    from common.cgpi import load_cgpi
+"""
+
+from pathlib import Path
+
+# リポジトリのルート
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# 計算結果のキャッシュ置き場（.gitignore 対象）
+CACHE_DIR = REPO_ROOT / '.cache'
@@ -0,0 +1,278 @@
+"""
+系列データのローカル HTTP API
+
+ダッシュボードが生成済みの CSV を読み直さずに済むよう、common.catalog の系列を
+期間・頻度・変換を指定して返す。
+
+    GET /series                      系列の一覧（JSON）
+    GET /series/<系列コード>?...      系列の値
+
+パラメータ:
+    start, end : 期間（'2015'・'2015-04'・'2015Q2' など。両端を含む）
+    freq       : 'M'・'Q'・'Y'・'FY'（元の頻度より粗い頻度のみ。期中の値がすべてそろった期の平均。
+                 年次の系列に Y・FY を指定したときは系列自身の年（暦年・年度）のまま）
+    transform  : 'level'（既定）・'yoy'（前年比 %）・'rebased'（base 年の平均 = 100）・
+                 'tot'（交易条件 = 系列 / 対の系列 × 100）。'tot,yoy' のようにカンマ区切りで順に適用
+    base       : rebased の基準年（既定 2020）
+    format     : 'json'（既定）または 'bin'
+
+JSON は {"code", "frequency", "transform", "periods": [...], "values": [...]}（値のない期は除き、
+0 からの変化率のように有限でない値は null）。
+bin はリトルエンディアンで、ヘッダー8バイト（頻度 4バイト ASCII・件数 uint32）、
+値 float64 × 件数、期 int32 × 件数の順。期は pandas の Period の序数
+（M: 1970年1月からの月数、Q: 1970Q1 からの四半期数、Y・FY: 1970年（度）からの年数）。
+
+変換結果と応答本体は LRU キャッシュに保持し（キーにデータファイルの更新日時を含むので、
+ファイルを更新すれば自動的に作り直す）、応答には ETag を付ける。If-None-Match が
+一致すれば 304 を返す。
+
+使い方（リポジトリのルートで）:
+    python -m common.api --port 8050
+    curl 'http://127.0.0.1:8050/series/cgpi.export_index?transform=tot,yoy&start=2015&freq=Q'
+"""
+
+import argparse
+import hashlib
+import json
+import struct
+import sys
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import numpy as np
+
+from common import periods
+from common.catalog import SERIES, SOURCES, get_series, list_series, source_version
+from common.transforms import T
+
+# 1年あたりの期数
+FREQUENCIES = {'M': 12, 'Q': 4, 'Y': 1, 'FY': 1}
+
+TRANSFORMS = ('level', 'yoy', 'rebased', 'tot')
+
+DEFAULT_BASE = 2020
+
+# LRU キャッシュの件数（変換結果・応答本体それぞれ）
+CACHE_SIZE = 512
+
+QUERY_PARAMS = ('start', 'end', 'freq', 'transform', 'base', 'format')
+
+CONTENT_TYPES = {'json': 'application/json', 'bin': 'application/octet-stream'}
+
+
+class QueryError(Exception):
+    """不正な問い合わせ（status は HTTP ステータス）"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _at_frequency(series, native, freq):
+    """粗い頻度へ平均で集約する（期中の値がそろわない期は NaN）"""
+    if freq == native:
+        return series
+    if FREQUENCIES[freq] > FREQUENCIES[native]:
+        raise QueryError(400, f'{series.name} は頻度 {native} より細かい頻度 {freq} に変換できません')
+    # 期の序数を粗い頻度の序数に変換して、その整数で集計する
+    grouped = series.groupby(periods.asfreq(periods.from_index(series.index), native, freq))
+    result = grouped.mean().where(grouped.count() == FREQUENCIES[native] // FREQUENCIES[freq])
+    result.index = periods.to_index(result.index.to_numpy(), freq)
+    return result
+
+
+def _series_at(code, freq):
+    return _at_frequency(get_series(code), SERIES[code].freq, freq)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _transformed(code, freq, transforms, base, versions):
+    """変換済みの系列（versions はキャッシュキー用のデータファイルの更新日時）"""
+    series = _series_at(code, freq)
+    base_rows = periods.year(periods.from_index(series.index), freq) == base
+    chain, inputs = T, [series]
+    for name in transforms:
+        if name == 'tot':
+            pair = SERIES[code].pair
+            if pair is None:
+                raise QueryError(400, f'{code} には交易条件（tot）の対になる系列がありません')
+            chain = chain.ratio()
+            inputs.append(_series_at(pair, freq).reindex(series.index))
+        elif name == 'yoy':
+            chain = chain.yoy(FREQUENCIES[freq])
+        elif name == 'rebased':
+            chain = chain.rebased(base_rows)
+    series = chain(*inputs)
+    if 'rebased' in transforms and not np.isfinite(series[base_rows]).any():
+        raise QueryError(400, f'{code} には基準年 {base} の値がありません')
+    return series.rename(code)
+
+
+def _encode_json(code, freq, transform, series):
+    payload = {
+        'code': code,
+        'frequency': freq,
+        'transform': transform,
+        'periods': periods.format(periods.from_index(series.index), freq).tolist(),
+        'values': [float(v) if np.isfinite(v) else None for v in series.to_numpy(dtype=float)],
+    }
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':'), allow_nan=False).encode('utf-8')
+
+
+def _encode_bin(freq, series):
+    values = series.to_numpy(dtype='<f8')
+    ordinals = periods.from_index(series.index).astype('<i4')
+    return struct.pack('<4sI', freq.encode('ascii').ljust(4), len(values)) + values.tobytes() + ordinals.tobytes()
+
+
+def _etag(body):
+    return '"' + hashlib.sha256(body).hexdigest()[:20] + '"'
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _response(code, freq, transforms, base, start, end, format, versions):
+    series = _transformed(code, freq, transforms, base, versions)
+    ordinals = periods.from_index(series.index)
+    in_range = np.ones(len(series), dtype=bool) if start is None else ordinals >= start
+    if end is not None:
+        in_range &= ordinals <= end
+    series = series[in_range].dropna()
+    if format == 'bin':
+        body = _encode_bin(freq, series)
+    else:
+        body = _encode_json(code, freq, ','.join(transforms), series)
+    return body, CONTENT_TYPES[format], _etag(body)
+
+
+def _parse_period(value, freq, how):
+    if value is None:
+        return None
+    try:
+        return periods.bound(value, freq, how)
+    except (ValueError, TypeError):
+        raise QueryError(400, f'期間を解釈できません: {value}') from None
+
+
+def query(code, start=None, end=None, freq=None, transform='level', base=None, format='json'):
+    """
+    系列を問い合わせる（パラメータはモジュールの説明を参照）
+
+    Returns
+    -------
+    (body, content_type, etag)
+
+    Raises
+    ------
+    QueryError : 未登録の系列コード（404）・不正なパラメータ（400）
+    """
+    if code not in SERIES:
+        raise QueryError(404, f'未登録の系列コード: {code}')
+    spec = SERIES[code]
+    freq = (freq or spec.freq).upper()
+    if freq not in FREQUENCIES:
+        raise QueryError(400, f'頻度は {"/".join(FREQUENCIES)} のいずれかです: {freq}')
+    if FREQUENCIES[freq] == FREQUENCIES[spec.freq] == 1:
+        freq = spec.freq
+    transforms = tuple(t.strip().lower() for t in (transform or 'level').split(',') if t.strip())
+    unknown = [t for t in transforms if t not in TRANSFORMS]
+    if unknown:
+        raise QueryError(400, f'未対応の変換: {",".join(unknown)}（{"/".join(TRANSFORMS)}）')
+    transforms = tuple(t for t in transforms if t != 'level') or ('level',)
+    try:
+        base = int(base) if base is not None else DEFAULT_BASE
+    except ValueError:
+        raise QueryError(400, f'基準年は整数で指定してください: {base}') from None
+    if format not in CONTENT_TYPES:
+        raise QueryError(400, f'形式は {"/".join(CONTENT_TYPES)} のいずれかです: {format}')
+
+    sources = [spec.source]
+    if 'tot' in transforms and spec.pair:
+        sources.append(SERIES[spec.pair].source)
+    versions = tuple(source_version(s) for s in sources)
+    if None in versions:
+        raise QueryError(503, f'{code} のデータファイルがありません')
+    return _response(code, freq, transforms, base,
+                     _parse_period(start, freq, 'start'), _parse_period(end, freq, 'end'),
+                     format, versions)
+
+
+@lru_cache(maxsize=8)
+def _catalog_response(versions):
+    body = json.dumps(list_series(), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return body, CONTENT_TYPES['json'], _etag(body)
+
+
+def catalog():
+    """系列の一覧の応答 (body, content_type, etag)"""
+    return _catalog_response(tuple(source_version(s) for s in SOURCES))
+
+
+class SeriesRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    quiet = False
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        try:
+            if url.path.rstrip('/') == '/series':
+                body, content_type, etag = catalog()
+            elif url.path.startswith('/series/'):
+                params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                unknown = sorted(set(params) - set(QUERY_PARAMS))
+                if unknown:
+                    raise QueryError(400, f'未対応のパラメータ: {",".join(unknown)}')
+                body, content_type, etag = query(unquote(url.path[len('/series/'):]), **params)
+            else:
+                raise QueryError(404, f'見つかりません: {url.path}')
+        except QueryError as e:
+            error = json.dumps({'error': str(e)}, ensure_ascii=False).encode('utf-8')
+            self._send(e.status, error, CONTENT_TYPES['json'])
+            return
+
+        if etag in (t.strip() for t in self.headers.get('If-None-Match', '').split(',')):
+            self._send(304, b'', None, etag)
+        else:
+            self._send(200, body, content_type, etag)
+
+    def _send(self, status, body, content_type, etag=None):
+        self.send_response(status)
+        if content_type:
+            self.send_header('Content-Type', content_type)
+        if etag:
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+
+def make_server(host='127.0.0.1', port=8050, quiet=False):
+    handler = type('Handler', (SeriesRequestHandler,), {'quiet': quiet})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m common.api', description='系列データのローカル HTTP API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8050)
+    parser.add_argument('--quiet', action='store_true', help='アクセスログを出力しない')
+    args = parser.parse_args(argv)
+
+    server = make_server(args.host, args.port, args.quiet)
+    print(f'http://{args.host}:{server.server_port}/series で待ち受け中（Ctrl+C で終了）')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
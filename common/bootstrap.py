@@ -0,0 +1,152 @@
+"""
+ブロック・ブートストラップによる信頼区間
+
+時系列は自己相関があるため、1時点ずつではなく連続した block 個の観測をまとめて
+復元抽出する（循環型の移動ブロック・ブートストラップ。系列の末尾は先頭につなげる）。
+
+全リプリケートの抽出位置を [リプリケート × 時点] の添字配列として一度に作り、
+各時点が選ばれた回数の行列 C（[リプリケート × 時点]）に直す。平均や相関に必要な
+和（Σx・Σxy など）は C と [時点 × 系列] の値の行列積1回で全リプリケート・全系列分が
+求まるため、数千リプリケート × 数百系列でも数秒で済む。欠損（NaN）は系列ごとに除く。
+
+区間はパーセンタイル法（既定 95%）。乱数は seed で固定するため、同じ入力なら
+同じ区間になる（レポートの数値が実行ごとに変わらない）。
+
+    from common.bootstrap import corr_ci, mean_ci, period_means_ci
+
+    ci = corr_ci(gdp, rate)                       # Interval(estimate, lower, upper)
+    ci = mean_ci(yoy_frame.to_numpy())            # 系列ごとの平均の区間（配列）
+    groups, ci = period_means_ci(tot, years // 10 * 10)
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+# 既定のリプリケート数・信頼水準・乱数の種
+REPLICATES = 2000
+LEVEL = 0.95
+SEED = 0
+
+# 推定値と信頼区間（系列が複数なら各要素が配列）
+Interval = namedtuple('Interval', ['estimate', 'lower', 'upper'])
+
+
+def block_length(n):
+    """既定のブロック長（観測数の 1/3 乗。n=37 で 3、n=550 で 8）"""
+    return max(1, int(round(n ** (1 / 3))))
+
+
+def block_indices(n, replicates=REPLICATES, block=None, seed=SEED, size=None):
+    """
+    循環型の移動ブロック・ブートストラップの抽出位置
+
+    size を指定すると、各リプリケートで size 個（n と異なってよい）を抽出する
+    （将来のシナリオを過去の観測のブロックをつないで作る場合など）。
+
+    Returns
+    -------
+    [replicates × size（既定は n）] の添字配列（各行が1つのリプリケート）
+    """
+    size = n if size is None else size
+    block = block_length(n) if block is None else min(block, n)
+    rng = np.random.default_rng(seed)
+    starts = rng.integers(0, n, size=(replicates, -(-size // block)))
+    indices = (starts[:, :, None] + np.arange(block)) % n
+    return indices.reshape(replicates, -1)[:, :size]
+
+
+def resample_counts(indices, n):
+    """添字配列を各時点が選ばれた回数の行列 [リプリケート × n] にする"""
+    replicates = indices.shape[0]
+    flat = (indices + np.arange(replicates)[:, None] * n).ravel()
+    return np.bincount(flat, minlength=replicates * n).reshape(replicates, n).astype(float)
+
+
+def _as_columns(values):
+    values = np.asarray(values, dtype=float)
+    return values[:, None] if values.ndim == 1 else values
+
+
+def _interval(estimate, replicates, level, squeeze):
+    alpha = (1 - level) / 2
+    lower, upper = np.nanquantile(replicates, [alpha, 1 - alpha], axis=0)
+    if squeeze:
+        return Interval(float(estimate[0]), float(lower[0]), float(upper[0]))
+    return Interval(estimate, lower, upper)
+
+
+def _counts(n, replicates, block, seed):
+    return resample_counts(block_indices(n, replicates, block, seed), n)
+
+
+def mean_ci(values, replicates=REPLICATES, level=LEVEL, block=None, seed=SEED):
+    """
+    平均の信頼区間
+
+    Parameters
+    ----------
+    values : [時点] または [時点 × 系列] の配列（NaN は系列ごとに除く）
+    replicates, level, block, seed : リプリケート数・信頼水準・ブロック長・乱数の種
+
+    Returns
+    -------
+    Interval。values が1次元なら float、2次元なら系列ごとの配列
+    """
+    squeeze = np.ndim(values) == 1
+    x = _as_columns(values)
+    valid = ~np.isnan(x)
+    counts = _counts(len(x), replicates, block, seed)
+    sums = counts @ np.where(valid, x, 0.0)
+    sizes = counts @ valid
+    with np.errstate(invalid='ignore', divide='ignore'):
+        boot = sums / sizes
+    estimate = np.nanmean(x, axis=0) if len(x) else np.full(x.shape[1], np.nan)
+    return _interval(estimate, boot, level, squeeze)
+
+
+def corr_ci(x, y, replicates=REPLICATES, level=LEVEL, block=None, seed=SEED):
+    """
+    相関係数の信頼区間（x と y は同じ時点の並び。片方が1次元なら全系列との相関）
+
+    両方の時点・同じ位置を一緒に抽出するため、x と y の同時の動きを保ったまま再標本化する。
+    """
+    squeeze = np.ndim(x) == 1 and np.ndim(y) == 1
+    x, y = np.broadcast_arrays(_as_columns(x), _as_columns(y))
+    valid = ~(np.isnan(x) | np.isnan(y))
+    # 平均を引いてから和を取る（桁落ちを防ぐ）
+    x = np.where(valid, x - np.nanmean(np.where(valid, x, np.nan), axis=0), 0.0)
+    y = np.where(valid, y - np.nanmean(np.where(valid, y, np.nan), axis=0), 0.0)
+
+    def corr(s1, sx, sy, sxx, syy, sxy):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return (s1 * sxy - sx * sy) / np.sqrt((s1 * sxx - sx * sx) * (s1 * syy - sy * sy))
+
+    terms = [valid.astype(float), x, y, x * x, y * y, x * y]
+    estimate = corr(*[t.sum(axis=0) for t in terms])
+    counts = _counts(len(x), replicates, block, seed)
+    boot = corr(*[counts @ t for t in terms])
+    return _interval(estimate, boot, level, squeeze)
+
+
+def period_means_ci(values, labels, replicates=REPLICATES, level=LEVEL, block=None, seed=SEED):
+    """
+    期間（年代・局面など）ごとの平均の信頼区間
+
+    期間ごとにその期間の観測だけをブロック・ブートストラップする。
+
+    Parameters
+    ----------
+    values : [時点] または [時点 × 系列] の配列
+    labels : 時点ごとの期間のラベル（年代の 1980 など）
+
+    Returns
+    -------
+    (期間のラベルの配列（出現順）, Interval。各要素は [期間] または [期間 × 系列])
+    """
+    values = np.asarray(values, dtype=float)
+    labels = np.asarray(labels)
+    _, first = np.unique(labels, return_index=True)
+    groups = labels[np.sort(first)]
+    intervals = [mean_ci(values[labels == g], replicates, level, block, seed) for g in groups]
+    return groups, Interval(*(np.array(part) for part in zip(*intervals)))
@@ -0,0 +1,183 @@
+"""
+プロジェクトのデータセットの系列カタログ
+
+各フォルダのデータファイルの系列に系列コード（'cgpi.export_index' など）を付け、
+PeriodIndex（月次 M・年次 Y）の pandas.Series として読み出す。年次の系列は年度ベース
+（頻度 FY。'1980' は1980年度。デフレーターは暦年で頻度 Y）。データファイルは更新日時ごとにキャッシュするため、
+ファイルを書き換えると次の読み出しから新しい内容になる。
+
+    from common.catalog import get_series, list_series
+
+    export = get_series('cgpi.export_index')
+"""
+
+import json
+import os
+from collections import namedtuple
+from functools import lru_cache
+
+import pandas as pd
+
+from common import REPO_ROOT, periods
+from common.cgpi import load_cgpi
+from common.fetch import FETCHED_DIR
+
+# 系列の定義
+#   source : SOURCES のキー
+#   column : データファイル内の列名
+#   freq : 'M'（月次）・'Y'（暦年）・'FY'（年度）。年度の系列も PeriodIndex は年次 Y
+#   unit : 単位
+#   pair : 交易条件（tot）の分母にする系列コード（輸出物価指数 → 輸入物価指数）
+SeriesSpec = namedtuple('SeriesSpec', 'source column freq unit description pair')
+
+
+def _read_cgpi(path):
+    data_df, _ = load_cgpi(path)
+    return data_df.set_index(periods.to_index(data_df['date'], 'M')).drop(columns='date')
+
+
+def _read_deficit(path):
+    df = pd.read_csv(path, encoding='utf-8-sig')
+    return df.set_index(periods.to_index(periods.parse(df['年度'], 'FY'), 'FY')).drop(columns='年度')
+
+
+def _read_gdp_interest(path):
+    with open(path, encoding='utf-8') as f:
+        df = pd.DataFrame(json.load(f)['data'])
+    return df.set_index(periods.to_index(periods.parse(df['年度'], 'FY'), 'FY')).drop(columns='年度')
+
+
+def _read_budget(path):
+    # 同じ年度の補正（'2020第1次'・'2020第2次' など）は年度ごとに合計する
+    df = pd.read_csv(path, encoding='utf-8')
+    fiscal_year = periods.parse(df['年度'].str[:4], 'FY')
+    amounts = df.drop(columns=['年度', '主な目的']).groupby(fiscal_year, sort=True).sum()
+    return amounts.set_index(periods.to_index(amounts.index.to_numpy(), 'FY'))
+
+
+def _read_deflator(path):
+    df = pd.read_csv(path, encoding='utf-8')
+    return df.set_index(periods.to_index(periods.parse(df['暦年'], 'Y'), 'Y')).drop(columns='暦年')
+
+
+# データファイル（リポジトリのルートからの相対パス）と読み込み関数
+SOURCES = {
+    'cgpi': ('企業物価指数/企業物価指数円ベースpr01_m_1.csv', _read_cgpi),
+    'deficit': ('government_deficit_gdp_analysis/government_deficit_gdp_ratio.csv', _read_deficit),
+    'gdp': ('GDP推移/japan_gdp_interest_data.json', _read_gdp_interest),
+    'deflator': ('GDPデフレーターと消費支出デフレーター/deflators.csv', _read_deflator),
+    'budget': ('最近の補正予算/補正予算データ.csv', _read_budget),
+}
+
+SERIES = {
+    'cgpi.export_index': SeriesSpec('cgpi', 'export_index', 'M', '2020=100',
+                                    '輸出物価指数（円ベース）', 'cgpi.import_index'),
+    'cgpi.import_index': SeriesSpec('cgpi', 'import_index', 'M', '2020=100',
+                                    '輸入物価指数（円ベース）', None),
+    'cgpi.domestic_index': SeriesSpec('cgpi', 'domestic_index', 'M', '2020=100',
+                                      '国内企業物価指数', None),
+    'cgpi.chain_index': SeriesSpec('cgpi', 'chain_index', 'M', '2020=100',
+                                   '国内企業物価指数（連鎖方式）', None),
+    'cgpi.summer_adj': SeriesSpec('cgpi', 'summer_adj', 'M', '2020=100',
+                                  '国内企業物価指数（夏季電力料金調整後）', None),
+    'cgpi.domestic_yoy': SeriesSpec('cgpi', 'domestic_yoy', 'M', '%', '国内企業物価指数の前年比', None),
+    'cgpi.export_yoy': SeriesSpec('cgpi', 'export_yoy', 'M', '%', '輸出物価指数（円ベース）の前年比', None),
+    'cgpi.import_yoy': SeriesSpec('cgpi', 'import_yoy', 'M', '%', '輸入物価指数（円ベース）の前年比', None),
+    'cgpi.chain_yoy': SeriesSpec('cgpi', 'chain_yoy', 'M', '%', '国内企業物価指数（連鎖方式）の前年比', None),
+    'deficit.balance': SeriesSpec('deficit', '一般政府資金過不足_億円', 'FY', '億円',
+                                  '一般政府資金過不足（年度）', None),
+    'deficit.gdp_ratio': SeriesSpec('deficit', '資金過不足GDP比_%', 'FY', '%',
+                                    '一般政府資金過不足の名目GDP比（年度）', None),
+    'deficit.nominal_gdp': SeriesSpec('deficit', '名目GDP_兆円', 'FY', '兆円', '名目GDP（年度）', None),
+    'gdp.nominal': SeriesSpec('gdp', '名目GDP', 'FY', '兆円', '名目GDP（年度）', None),
+    'gdp.long_rate': SeriesSpec('gdp', '長期金利', 'FY', '%', '長期金利（10年国債利回り、年度）', None),
+    'deflator.gdp': SeriesSpec('deflator', 'GDPデフレーター', 'Y', '2015=100', 'GDPデフレーター（暦年）', None),
+    'deflator.consumption': SeriesSpec('deflator', '民間最終消費支出デフレーター', 'Y', '2015=100',
+                                       '民間最終消費支出デフレーター（暦年）', None),
+    'budget.supplementary': SeriesSpec('budget', '補正予算額（兆円）', 'FY', '兆円',
+                                       '補正予算額（年度の合計）', None),
+    'budget.carryover': SeriesSpec('budget', '繰越額（兆円）', 'FY', '兆円', '補正予算の繰越額（年度の合計）', None),
+    'budget.unexecuted': SeriesSpec('budget', '未執行額（兆円）', 'FY', '兆円',
+                                    '補正予算の未執行額（年度の合計）', None),
+}
+
+
+def source_path(source):
+    """
+    データファイルのパス
+
+    common.fetch でダウンロードしたものがあり、リポジトリのファイルより新しければそちら
+    （ダウンロード後にリポジトリのファイルを手で更新した場合はリポジトリのファイルを読む）。
+    """
+    relative = SOURCES[source][0]
+    fetched, local = FETCHED_DIR / relative, REPO_ROOT / relative
+    try:
+        fetched_mtime = os.stat(fetched).st_mtime_ns
+    except FileNotFoundError:
+        return local
+    try:
+        return fetched if fetched_mtime >= os.stat(local).st_mtime_ns else local
+    except FileNotFoundError:
+        return fetched
+
+
+def source_version(source):
+    """データファイルの版（更新日時）。ファイルがなければ None"""
+    try:
+        return os.stat(source_path(source)).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+@lru_cache(maxsize=None)
+def _read_source(source, version):
+    _, read = SOURCES[source]
+    return read(source_path(source))
+
+
+def read_source(source):
+    """データファイル全体を PeriodIndex の DataFrame として読む（更新日時ごとにキャッシュ）"""
+    version = source_version(source)
+    if version is None:
+        raise FileNotFoundError(source_path(source))
+    return _read_source(source, version)
+
+
+def get_series(code):
+    """
+    系列を読み出す
+
+    欠けている期（5年おきのデータなど）は NaN で埋め、期が連続した Series にする。
+    未登録の系列コードなら KeyError。
+    """
+    spec = SERIES[code]
+    series = pd.to_numeric(read_source(spec.source)[spec.column], errors='coerce').dropna()
+    full = pd.period_range(series.index.min(), series.index.max(), freq=periods.PANDAS_FREQ[spec.freq])
+    return series.reindex(full).rename(code)
+
+
+def list_series():
+    """系列コードと定義・収録期間の一覧（dict のリスト）"""
+    entries = []
+    for code, spec in SERIES.items():
+        entry = {'code': code, 'frequency': spec.freq, 'unit': spec.unit,
+                 'description': spec.description, 'source': SOURCES[spec.source][0]}
+        if spec.pair:
+            entry['tot_pair'] = spec.pair
+        try:
+            series = get_series(code)
+            entry.update(start=str(series.index[0]), end=str(series.index[-1]))
+        except FileNotFoundError:
+            entry['missing'] = True
+        entries.append(entry)
+    return entries
+
+
+def column_metadata(source):
+    """
+    データファイルの列のメタデータ {列名: {'series': 系列コード, 'unit': ..., 'description': ...}}
+
+    common.output.save_table の columns に渡し、Parquet の列に系列コードと単位を付ける。
+    """
+    return {spec.column: {'series': code, 'unit': spec.unit, 'description': spec.description}
+            for code, spec in SERIES.items() if spec.source == source}
@@ -0,0 +1,133 @@
+"""
+日本銀行 時系列統計データ検索サイトの CSV（企業物価指数など）の読み込み
+
+ファイル構成（Shift-JIS）:
+    1行目  表題（主要時系列統計データ表）
+    2行目  作成日時
+    3行目  統計名
+    4〜9行目  系列名称・データコード・単位・収録開始期・収録終了期・最終更新日
+    10行目以降  'YYYY/MM',値,値,...
+
+date 列は月の序数（int32。common.periods）で返す。
+データ行は古い月から順に並ぶため、直近の数か月だけが必要な場合は load_cgpi(tail=...) で
+ファイルの末尾から必要な行だけを読む（履歴の長さによらずほぼ一定の時間で読める）。
+"""
+
+import csv
+import io
+import os
+
+import numpy as np
+import pandas as pd
+
+from common import periods
+
+# 企業物価指数円ベースpr01_m_1.csv の列名（分析スクリプトと共通）
+CGPI_COLUMNS = ['date', 'domestic_yoy', 'export_yoy', 'import_yoy', 'chain_yoy',
+                'domestic_index', 'summer_adj', 'export_index', 'import_index', 'chain_index']
+
+# メタデータ行（3行目をヘッダーとして読んだときの行位置）
+METADATA_ROWS = ['name', 'code', 'unit', 'start', 'end', 'updated']
+
+# データ行より前の行数（表題・作成日時・統計名 + メタデータ行）
+HEADER_LINES = 3 + len(METADATA_ROWS)
+
+ENCODING = 'shift_jis'
+
+
+def read_metadata(path, columns=CGPI_COLUMNS, encoding=ENCODING):
+    """
+    系列ごとのメタデータを DataFrame（行: 系列列名、列: name/code/unit/start/end/updated）で返す
+
+    ファイル先頭のメタデータ行だけを読む（系列数が多いファイルでも pandas の CSV 解析を通さない）。
+    """
+    with open(path, encoding=encoding, newline='') as f:
+        lines = [f.readline() for _ in range(HEADER_LINES)]
+    rows = list(csv.reader(lines[3:]))
+    meta = pd.DataFrame({name: [value or np.nan for value in row[1:]]
+                         for name, row in zip(METADATA_ROWS, rows)},
+                        index=pd.Index(columns[1:]), dtype=str)
+    return meta
+
+
+def read_tail(path, n_lines, block_size=1 << 16):
+    """
+    ファイル末尾の n_lines 行を bytes で返す（末尾の空行は除く）
+
+    ファイルの末尾からブロック単位でさかのぼって読み、必要な行数がそろった時点で止める。
+    ファイル全体が n_lines 行以下なら None を返す。Shift-JIS の2バイト目に改行（0x0A）は
+    現れないため、バイト列のまま行に分けてよい。
+    """
+    with open(path, 'rb') as f:
+        position = f.seek(0, os.SEEK_END)
+        chunks = []
+        newlines = 0
+        trailing = True
+        while position > 0:
+            size = min(block_size, position)
+            position -= size
+            f.seek(position)
+            chunk = f.read(size)
+            if trailing:
+                stripped = chunk.rstrip(b'\r\n')
+                if not stripped:
+                    continue
+                chunk, trailing = stripped, False
+            chunks.append(chunk)
+            newlines += chunk.count(b'\n')
+            if newlines >= n_lines:
+                data = b''.join(reversed(chunks))
+                return b'\n'.join(data.split(b'\n')[-n_lines:]) + b'\n'
+    return None
+
+
+def _read_tail_rows(path, n_rows, columns, encoding):
+    """
+    末尾の n_rows 件のデータ行（メタデータ行に届く・ファイルが短い・数値でない値がある場合は None）
+
+    数値列は float64 に固定する（末尾の数行だけでは整数の列と推定されることがあるため）。
+    """
+    data = read_tail(path, n_rows)
+    if data is None or not all(line[:1].isdigit() for line in data.splitlines()):
+        return None
+    try:
+        return pd.read_csv(io.BytesIO(data), encoding=encoding, header=None, names=columns,
+                           dtype=dict.fromkeys(columns[1:], 'float64'))
+    except ValueError:
+        return None
+
+
+def load_cgpi(path, columns=CGPI_COLUMNS, encoding=ENCODING, tail=None, lookback=0):
+    """
+    データ本体とメタデータを読み込む
+
+    Parameters
+    ----------
+    tail : 直近の月数。指定するとファイルの末尾から tail + lookback 行だけを読む
+    lookback : tail の前に追加で読む月数（前年同月比なら 12）
+
+    Returns
+    -------
+    data_df : date 列（月の序数 int32）と数値列の DataFrame
+    meta : read_metadata() の戻り値
+    """
+    # メタデータ行（文字列）とデータ行（数値）を別々に読み、データ行は型推定を1回で済ませる
+    meta = read_metadata(path, columns, encoding)
+    data_df = None
+    if tail is not None:
+        data_df = _read_tail_rows(path, tail + lookback, columns, encoding)
+    if data_df is None:
+        data_df = pd.read_csv(path, encoding=encoding, skiprows=HEADER_LINES, header=None,
+                              names=columns)
+        if tail is not None:
+            data_df = data_df.tail(tail + lookback).reset_index(drop=True)
+    data_df['date'] = periods.parse(data_df['date'])
+    non_numeric = [c for c in columns[1:] if not pd.api.types.is_numeric_dtype(data_df[c])]
+    if non_numeric:
+        data_df[non_numeric] = data_df[non_numeric].apply(pd.to_numeric, errors='coerce')
+    return data_df, meta
+
+
+def vintage(meta):
+    """データの版（系列の最終更新日のうち最新のもの）"""
+    return str(meta['updated'].max())
@@ -0,0 +1,262 @@
+"""
+全系列の SQLite への書き出し
+
+カタログの系列（common.catalog）・派生系列（common.derived）・資金循環統計の全系列を、
+1つの SQLite データベースの縦長の表に入れる。pandas を使わずに SQL で横断的に
+問い合わせられる（例: 交易条件が 70 未満で輸入物価の前年比が 20% を超える月）。
+
+    series       系列のメタデータ（系列コード・データセット・頻度・単位・説明・出典・版）
+    observation  (series_id, period, value)。主キー順に格納（WITHOUT ROWID）
+    period       期の表示（freq, period → label・start_date）
+    observations 系列コードと期の表示を付けたビュー
+
+period は common.periods の序数（M: 1970年1月からの月数、Y: 1970年（度）からの年数）。
+observation の主キー (series_id, period) が系列ごとの読み出しを、索引
+(period, series_id, value)・(series_id, value, period) が期ごとの横断と値の範囲での絞り込みを、
+それぞれ表を読まずに索引だけで処理する（カバリングインデックス）。
+
+書き込みは系列ごとに版（データファイルの更新日時・派生系列の式と入力の版）と頻度などのメタデータを比べ、
+変わった系列だけを1つのトランザクションの中で executemany（同じ準備済み文の再利用）で
+upsert する。値が同じ行は書き換えず、なくなった期の行は削除する。
+
+コマンドラインから（リポジトリのルートで）:
+    python -m common.database                       # .cache/series.sqlite を作成・更新
+    python -m common.database --query "SELECT * FROM observations WHERE code = 'gdp.long_rate' LIMIT 5"
+"""
+
+import argparse
+import sqlite3
+import sys
+import time
+from collections import Counter, namedtuple
+from functools import lru_cache
+from itertools import repeat
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from common import CACHE_DIR, REPO_ROOT, periods
+from common.catalog import SERIES, SOURCES, get_series, source_path, source_version
+from common.derived import EXPRESSIONS, Graph
+from common.fof import iter_chunks, read_header
+
+DEFAULT_PATH = CACHE_DIR / 'series.sqlite'
+
+# 資金循環統計（全系列を 'fof.<データコード>' として入れる）
+FOF_PATH = REPO_ROOT / 'government_deficit_gdp_analysis' / '資金循環統計 資金過不足1980.csv'
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS series (
+    series_id INTEGER PRIMARY KEY,
+    code TEXT NOT NULL UNIQUE,
+    dataset TEXT NOT NULL,
+    freq TEXT NOT NULL,
+    unit TEXT,
+    description TEXT,
+    source TEXT,
+    version TEXT
+);
+CREATE TABLE IF NOT EXISTS observation (
+    series_id INTEGER NOT NULL REFERENCES series (series_id),
+    period INTEGER NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (series_id, period)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS observation_by_period ON observation (period, series_id, value);
+CREATE INDEX IF NOT EXISTS observation_by_value ON observation (series_id, value, period);
+CREATE TABLE IF NOT EXISTS period (
+    freq TEXT NOT NULL,
+    period INTEGER NOT NULL,
+    label TEXT NOT NULL,
+    start_date TEXT NOT NULL,
+    PRIMARY KEY (freq, period)
+) WITHOUT ROWID;
+CREATE VIEW IF NOT EXISTS observations AS
+    SELECT s.code, s.freq, o.period, p.label, o.value
+    FROM observation o
+    JOIN series s USING (series_id)
+    JOIN period p ON p.freq = s.freq AND p.period = o.period;
+'''
+
+UPSERT = '''
+INSERT INTO observation (series_id, period, value) VALUES (?, ?, ?)
+ON CONFLICT (series_id, period) DO UPDATE SET value = excluded.value WHERE value != excluded.value
+'''
+
+# 系列の定義
+#   load : 値を読む関数（期の序数の配列・値の配列を返す）。版が前回と同じなら呼ばない
+Entry = namedtuple('Entry', 'code dataset freq unit description source version load')
+
+# 書き込み結果（系列ごと）
+ADDED = 'added'
+UPDATED = 'updated'
+UNCHANGED = 'unchanged'
+
+
+def _from_series(series):
+    series = series.dropna()
+    return periods.from_index(series.index), series.to_numpy(dtype=float)
+
+
+def catalog_entries():
+    for code, spec in SERIES.items():
+        yield Entry(code, spec.source, spec.freq, spec.unit, spec.description, SOURCES[spec.source][0],
+                    str(source_version(spec.source)), lambda code=code: _from_series(get_series(code)))
+
+
+def _base_freq(name):
+    while name in EXPRESSIONS:
+        name = EXPRESSIONS[name].inputs[0]
+    return SERIES[name].freq
+
+
+def derived_entries(graph=None):
+    graph = Graph() if graph is None else graph
+    for name, expr in EXPRESSIONS.items():
+        yield Entry(name, 'derived', _base_freq(name), expr.unit, expr.description,
+                    ' / '.join(expr.inputs), graph.fingerprint(name),
+                    lambda name=name: _from_series(graph.get(name)))
+
+
+@lru_cache(maxsize=1)
+def _read_fof(path, version):
+    frame = pd.concat(iter_chunks(path))
+    labels = frame.index.to_numpy()
+    freq = periods.infer_freq(labels[0]) if len(labels) else 'Y'
+    return freq, periods.parse(labels, freq), frame
+
+
+def fof_entries(path=FOF_PATH):
+    path = Path(path)
+    if not path.exists():
+        return
+    version = str(path.stat().st_mtime_ns)
+    freq, _, _ = _read_fof(path, version)
+    codes, names = read_header(path)
+
+    def load(code):
+        _, ordinals, frame = _read_fof(path, version)
+        values = frame[code].to_numpy(dtype=float)
+        valid = ~np.isnan(values)
+        return ordinals[valid], values[valid]
+
+    for code in codes:
+        yield Entry(f'fof.{code}', 'fof', freq, '億円', names.get(code, ''),
+                    path.relative_to(REPO_ROOT).as_posix() if path.is_relative_to(REPO_ROOT) else str(path),
+                    version, lambda code=code: load(code))
+
+
+def all_entries():
+    """書き出す系列の定義（カタログ・派生系列・資金循環統計。データファイルがないものは除く）"""
+    for entry in catalog_entries():
+        if source_path(entry.dataset).exists():
+            yield entry
+    for entry in derived_entries():
+        yield entry
+    yield from fof_entries()
+
+
+def connect(path=DEFAULT_PATH):
+    """データベースを開く（なければ作り、表・索引・ビューを用意する）"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.execute('PRAGMA synchronous = NORMAL')
+    conn.execute('PRAGMA foreign_keys = ON')
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _write_series(conn, series_id, ordinals, values):
+    """1系列の値を upsert し、なくなった期の行を削除する。変わった行数を返す"""
+    before = conn.total_changes
+    conn.executemany(UPSERT, zip(repeat(series_id), ordinals.tolist(), values.tolist()))
+    stored = np.fromiter((row[0] for row in conn.execute(
+        'SELECT period FROM observation WHERE series_id = ?', (series_id,))), dtype=np.int64)
+    stale = np.setdiff1d(stored, ordinals)
+    conn.executemany('DELETE FROM observation WHERE series_id = ? AND period = ?',
+                     zip(repeat(series_id), stale.tolist()))
+    return conn.total_changes - before
+
+
+def _write_periods(conn, used):
+    for freq, ordinals in used.items():
+        ordinals = np.unique(np.concatenate(ordinals))
+        labels = periods.format(ordinals, freq)
+        dates = np.datetime_as_string(periods.to_datetime64(ordinals, freq), unit='D')
+        conn.executemany('INSERT OR IGNORE INTO period (freq, period, label, start_date) VALUES (?, ?, ?, ?)',
+                         zip(repeat(freq), ordinals.tolist(), labels.tolist(), dates.tolist()))
+
+
+def export(conn, entries=None, force=False):
+    """
+    系列をデータベースに書き出す（1つのトランザクション）
+
+    Parameters
+    ----------
+    conn : connect の戻り値
+    entries : Entry の並び（省略時は all_entries()）
+    force : True なら版が同じ系列も読み直して書き込む
+
+    Returns
+    -------
+    {系列コード: ADDED・UPDATED・UNCHANGED}
+    """
+    known = {row[1]: (row[0], row[2:]) for row in conn.execute(
+        'SELECT series_id, code, dataset, freq, unit, description, source, version FROM series')}
+    results, used = {}, {}
+    with conn:
+        for entry in all_entries() if entries is None else entries:
+            series_id, stored = known.get(entry.code, (None, None))
+            meta = (entry.dataset, entry.freq, entry.unit, entry.description, entry.source, entry.version)
+            if series_id is not None and stored == meta and not force:
+                results[entry.code] = UNCHANGED
+                continue
+            if series_id is None:
+                series_id = conn.execute(
+                    'INSERT INTO series (code, dataset, freq, unit, description, source, version) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?)', (entry.code,) + meta).lastrowid
+            else:
+                conn.execute('UPDATE series SET dataset = ?, freq = ?, unit = ?, description = ?, source = ?, '
+                             'version = ? WHERE series_id = ?', meta + (series_id,))
+            ordinals, values = entry.load()
+            changed = _write_series(conn, series_id, ordinals, values)
+            used.setdefault(entry.freq, []).append(ordinals)
+            results[entry.code] = ADDED if stored is None else UPDATED if changed else UNCHANGED
+        _write_periods(conn, used)
+    return results
+
+
+def query(sql, params=(), path=DEFAULT_PATH):
+    """SQL の結果を DataFrame で返す"""
+    conn = sqlite3.connect(path)
+    try:
+        return pd.read_sql_query(sql, conn, params=params)
+    finally:
+        conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m common.database', description='全系列の SQLite への書き出し')
+    parser.add_argument('--db', type=Path, default=DEFAULT_PATH, help='データベースのパス')
+    parser.add_argument('--force', action='store_true', help='版が同じ系列も書き直す')
+    parser.add_argument('--query', help='書き出しのあとに実行する SQL')
+    args = parser.parse_args(argv)
+
+    conn = connect(args.db)
+    start = time.perf_counter()
+    results = export(conn, force=args.force)
+    elapsed = time.perf_counter() - start
+    rows = conn.execute('SELECT COUNT(*) FROM observation').fetchone()[0]
+    conn.close()
+    counts = ', '.join(f'{k}={v}' for k, v in sorted(Counter(results.values()).items()))
+    print(f'{args.db}: {len(results)}系列 {rows}行 ({counts}, {elapsed:.2f}s)')
+    if args.query:
+        print(query(args.query, path=args.db).to_string(index=False))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
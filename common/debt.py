@@ -0,0 +1,240 @@
+"""
+政府債務残高（名目GDP比）のシナリオ分析
+
+一般政府の資金過不足の名目GDP比（government_deficit_gdp_ratio.csv）と、名目GDP・長期金利
+（GDP推移/japan_gdp_interest_data.*）を組み合わせ、債務残高の名目GDP比 d の推移を
+r − g と基礎的財政収支（プライマリーバランス）pb から投影する。
+
+    d[t] = d[t-1] × (1 + r[t]) / (1 + g[t]) − pb[t]
+
+    r : 債務の実効金利（長期金利の過去 maturity 年の平均。借り換えが徐々に進むことの近似）
+    g : 名目GDP成長率
+    pb : 基礎的財政収支の名目GDP比（黒字が正）
+
+データファイルには債務残高がないため、最新年度の債務残高 initial_debt（%）を仮定として与え、
+資金過不足 b（利払いを含む収支）との関係 d[t] = d[t-1] / (1 + g[t]) − b[t] で過去に遡って
+債務残高を復元し、過去の pb[t] = b[t] + r[t] × d[t-1] / (1 + g[t]) を求める。
+ただし資金過不足だけでは債務の増加を説明しきれず、遡るほど債務残高が実際より大きく復元される
+（1991年度で約150%）。長期金利で近似した利払いもこれに掛かるため、1997年度以前の pb は +3〜+14%
+と実際にはありえない黒字になる。既定ではこの期間を除き、SINCE（1998年度）以降を使う。
+
+シナリオは過去の年の (金利の前年差, 成長率, pb) の組をブロック・ブートストラップ
+（common.bootstrap）でつないで作る。同じ年の値を一緒に抽出するため、金利・成長率・収支の
+同時の動きが保たれる。成長率と pb はそのまま使う。金利は最新値から前年差を積み上げるが、
+過去の期間は金利の低下が続いた（前年差の平均が約 −0.2%ポイント）ため、前年差はその平均を
+引いてから使い（低下の傾向をシナリオに持ち込まない）、水準は rate_floor で下限を設ける。
+rate_shift・growth_shift・primary_shift で全シナリオに一律の上乗せができる。
+
+債務残高の漸化式は累積積・累積和で閉じた形に直して [シナリオ × 年] の配列演算で解くため、
+数万シナリオでも1秒かからない（ファンチャートを対話的に描き直せる）。
+
+    from common.debt import fan, history, simulate
+
+    past = history()
+    paths = simulate(past, horizon=30, scenarios=10000, rate_shift=1.0)
+    bands = fan(paths.debt)          # {パーセンタイル: [年]}
+
+コマンドラインから（リポジトリのルートで）:
+    python -m common.debt --horizon 30 --scenarios 10000 --rate-shift 1 --plot debt_fan.png
+"""
+
+import argparse
+import sys
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from common.bootstrap import SEED, block_indices
+
+# 最新年度の一般政府債務残高（総債務、名目GDP比 %）の仮定（データファイルにないため）
+INITIAL_DEBT = 240.0
+
+# シナリオの元にする過去の期間の最初の年度（1997年度以前は復元した pb が過大な黒字になる）
+SINCE = 1998
+
+# 実効金利とする長期金利の平均の年数（国債の平均残存期間の概数）
+MATURITY = 8
+
+# シナリオの長期金利の下限（%。過去の最低はおおむね −0.3% 程度）
+RATE_FLOOR = -0.5
+
+# 既定のシナリオ数・投影年数・ファンチャートのパーセンタイル
+SCENARIOS = 10000
+HORIZON = 30
+PERCENTILES = (5, 10, 25, 50, 75, 90, 95)
+
+# 過去の値（年度ごとの配列。単位はすべて %）
+#   rate : 長期金利、rate_change : その前年差、effective : 実効金利、growth : 名目GDP成長率、
+#   balance : 資金過不足、primary : 基礎的財政収支、debt : 復元した債務残高（いずれも名目GDP比）
+History = namedtuple('History', 'years rate rate_change effective growth balance primary debt')
+
+# シナリオ（[シナリオ × 年] の配列。debt は投影開始時点を含めて年数 + 1 列）
+Scenarios = namedtuple('Scenarios', 'years rate effective growth primary debt')
+
+
+def _effective(rates, maturity):
+    """最後の軸方向の maturity 年移動平均（先頭はそろっている年だけの平均）"""
+    c = np.concatenate([np.zeros(rates.shape[:-1] + (1,)), np.cumsum(rates, axis=-1)], axis=-1)
+    end = np.arange(1, rates.shape[-1] + 1)
+    start = np.maximum(end - maturity, 0)
+    return (c[..., end] - c[..., start]) / (end - start)
+
+
+def history(initial_debt=INITIAL_DEBT, maturity=MATURITY, since=SINCE):
+    """
+    過去の金利・成長率・収支と、復元した債務残高・基礎的財政収支
+
+    3つの系列がそろい、名目GDP成長率が前年から計算できる年度のうち、最新年度まで
+    連続する期間の since 年度以降を使う（None ならその期間すべて）。債務残高は最新年度から
+    遡って復元するため、since は過去の年度の値を変えず、使う年度を選ぶだけである。
+    """
+    import pandas as pd
+
+    from common.catalog import get_series
+
+    nominal = get_series('gdp.nominal')
+    rate = get_series('gdp.long_rate')
+    balance = get_series('deficit.gdp_ratio')
+    frame = pd.DataFrame({'rate': rate, 'rate_change': rate.diff(),
+                          'growth': nominal.pct_change(fill_method=None) * 100, 'balance': balance})
+    frame['effective'] = frame['rate'].rolling(maturity, min_periods=1).mean()
+    complete = frame.notna().all(axis=1).to_numpy()
+    # 最新年度まで連続してそろっている期間
+    start = len(complete) - np.argmin(complete[::-1]) if not complete.all() else 0
+    frame = frame.iloc[start:]
+    if since is not None:
+        frame = frame[frame.index.year >= since]
+    if frame.empty:
+        raise ValueError('金利・成長率・資金過不足がそろう年度がありません')
+
+    g = frame['growth'].to_numpy() / 100
+    b = frame['balance'].to_numpy() / 100
+    r = frame['effective'].to_numpy() / 100
+    # d[t-1] = (d[t] + b[t]) × (1 + g[t]) で最新年度から遡る
+    debt = np.empty(len(frame) + 1)
+    debt[-1] = initial_debt / 100
+    for t in range(len(frame) - 1, -1, -1):
+        debt[t] = (debt[t + 1] + b[t]) * (1 + g[t])
+    primary = b + r * debt[:-1] / (1 + g)
+    return History(frame.index.year.to_numpy(), frame['rate'].to_numpy(), frame['rate_change'].to_numpy(),
+                   frame['effective'].to_numpy(), frame['growth'].to_numpy(), frame['balance'].to_numpy(),
+                   primary * 100, debt[1:] * 100)
+
+
+def simulate(past, horizon=HORIZON, scenarios=SCENARIOS, maturity=MATURITY, block=None, seed=SEED,
+             rate_shift=0.0, growth_shift=0.0, primary_shift=0.0, initial_debt=None, rate_floor=RATE_FLOOR):
+    """
+    債務残高の名目GDP比のシナリオを一括で投影する
+
+    Parameters
+    ----------
+    past : history() の戻り値
+    horizon, scenarios : 投影する年数・シナリオ数
+    maturity : 実効金利とする長期金利の平均の年数
+    block, seed : ブロック・ブートストラップのブロック長・乱数の種
+    rate_shift, growth_shift, primary_shift : 金利・成長率・基礎的財政収支への上乗せ（%ポイント）
+    initial_debt : 投影開始時点の債務残高（省略時は past の最新年度の値）
+    rate_floor : 長期金利の下限（%。rate_shift を加える前の水準に適用）
+
+    Returns
+    -------
+    Scenarios（単位は %）
+    """
+    n = len(past.years)
+    indices = block_indices(n, scenarios, block, seed, size=horizon)
+    # 前年差は過去の平均を引いてから積み上げる（過去の低下傾向を将来に延ばさない）
+    changes = past.rate_change - past.rate_change.mean()
+    rate = np.maximum(past.rate[-1] + np.cumsum(changes[indices], axis=1), rate_floor) + rate_shift
+    # 実効金利は直近 maturity − 1 年の長期金利と新しい金利の平均
+    tail = past.rate[n - min(maturity - 1, n):]
+    rates = np.concatenate([np.broadcast_to(tail, (scenarios, len(tail))), rate], axis=1)
+    effective = _effective(rates, maturity)[:, len(tail):]
+    growth = past.growth[indices] + growth_shift
+    primary = past.primary[indices] + primary_shift
+
+    # d[t] = P[t] × (d0 − Σ_{s≤t} pb[s] / P[s])、P[t] = Π_{u≤t} (1 + r[u]) / (1 + g[u])
+    factor = np.cumprod((1 + effective / 100) / (1 + growth / 100), axis=1)
+    d0 = (past.debt[-1] if initial_debt is None else initial_debt) / 100
+    debt = factor * (d0 - np.cumsum(primary / 100 / factor, axis=1))
+    debt = np.concatenate([np.full((scenarios, 1), d0), debt], axis=1) * 100
+    years = past.years[-1] + np.arange(horizon + 1)
+    return Scenarios(years, rate, effective, growth, primary, debt)
+
+
+def fan(paths, percentiles=PERCENTILES):
+    """シナリオ（[シナリオ × 年]）の年ごとのパーセンタイル {パーセンタイル: [年]}"""
+    values = np.percentile(paths, percentiles, axis=0)
+    return dict(zip(percentiles, values))
+
+
+def plot_fan(ax, years, bands, past=None, color='tab:red'):
+    """
+    ファンチャートを描く（外側のパーセンタイルから順に帯を重ね、中央値を線で描く）
+
+    past を渡すと復元した過去の債務残高も描く。
+    """
+    levels = sorted(bands)
+    pairs = [(lo, hi) for lo, hi in zip(levels, levels[::-1]) if lo < hi]
+    for i, (lo, hi) in enumerate(pairs):
+        ax.fill_between(years, bands[lo], bands[hi], color=color, alpha=0.15 + 0.1 * i, linewidth=0,
+                        label=f'{lo}-{hi} percentile')
+    if 50 in bands:
+        ax.plot(years, bands[50], color=color, linewidth=2, label='Median')
+    if past is not None:
+        ax.plot(past.years, past.debt, color='black', linewidth=1.5, label='Reconstructed history')
+    ax.set_xlabel('Fiscal Year')
+    ax.set_ylabel('Debt / Nominal GDP (%)')
+    ax.grid(True, alpha=0.3)
+    ax.legend(loc='upper left')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m common.debt', description='政府債務残高の名目GDP比のシナリオ分析')
+    parser.add_argument('--horizon', type=int, default=HORIZON, help='投影する年数')
+    parser.add_argument('--scenarios', type=int, default=SCENARIOS, help='シナリオ数')
+    parser.add_argument('--initial-debt', type=float, default=INITIAL_DEBT, help='最新年度の債務残高（名目GDP比 %%）')
+    parser.add_argument('--maturity', type=int, default=MATURITY, help='実効金利とする長期金利の平均の年数')
+    parser.add_argument('--rate-shift', type=float, default=0.0, help='金利の上乗せ（%%ポイント）')
+    parser.add_argument('--growth-shift', type=float, default=0.0, help='名目成長率の上乗せ（%%ポイント）')
+    parser.add_argument('--primary-shift', type=float, default=0.0, help='基礎的財政収支の上乗せ（%%ポイント）')
+    parser.add_argument('--rate-floor', type=float, default=RATE_FLOOR, help='長期金利の下限（%%）')
+    parser.add_argument('--since', type=int, default=SINCE,
+                        help='シナリオの元にする過去の期間の最初の年度（0 ならデータのある全期間）')
+    parser.add_argument('--seed', type=int, default=SEED, help='乱数の種')
+    parser.add_argument('--plot', help='ファンチャートの保存先（PNG など）')
+    args = parser.parse_args(argv)
+
+    past = history(args.initial_debt, args.maturity, args.since or None)
+    print(f'過去: {past.years[0]}～{past.years[-1]}年度 ({len(past.years)}年、--since {args.since})')
+    print(f'  平均  実効金利 {past.effective.mean():.2f}%  名目成長率 {past.growth.mean():.2f}%  '
+          f'r−g {np.mean(past.effective - past.growth):+.2f}%  基礎的財政収支 {past.primary.mean():+.2f}%')
+
+    start = time.perf_counter()
+    paths = simulate(past, args.horizon, args.scenarios, args.maturity, seed=args.seed,
+                     rate_shift=args.rate_shift, growth_shift=args.growth_shift,
+                     primary_shift=args.primary_shift, rate_floor=args.rate_floor)
+    bands = fan(paths.debt)
+    elapsed = time.perf_counter() - start
+
+    print(f'\n債務残高の名目GDP比（%、{args.scenarios}シナリオ、{elapsed:.2f}s）')
+    print('年度  ' + ' '.join(f'{f"p{p}":>7s}' for p in bands))
+    for i in range(0, args.horizon + 1, 5):
+        print(f'{paths.years[i]}  ' + ' '.join(f'{bands[p][i]:7.1f}' for p in bands))
+    rising = np.mean(paths.debt[:, -1] > paths.debt[:, 0])
+    print(f'\n{paths.years[-1]}年度に現在より上昇しているシナリオの割合: {rising:.1%}')
+
+    if args.plot:
+        from common.figures import new_figure
+        from common.output import save_figure
+
+        fig, ax = new_figure(figsize=(12, 6))
+        plot_fan(ax, paths.years, bands, past)
+        ax.set_title('Japan General Government Debt / GDP: Stochastic r - g Scenarios')
+        fig.tight_layout()
+        print(f'{args.plot}: {save_figure(fig, args.plot, dpi=150)}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,244 @@
+"""
+派生系列の遅延評価グラフ
+
+交易条件・その前年同月比・資金過不足の名目GDP比・デフレーターの差などの派生系列を、
+カタログの系列（common.catalog の系列コード）や他の派生系列に対する式として宣言する。
+
+    from common.derived import evaluate
+
+    values = evaluate(['cgpi.tot_yoy', 'deflator.gap'])   # {名前: Series}
+
+評価は要求された系列に必要なノードだけをたどり、共通の部分式（交易条件など）は
+1回だけ計算する。計算したノードはプロセス内に保持し、.cache/derived/ にも保存する。
+キャッシュのキーは式と入力データファイルの版（更新日時）から作るため、データを
+更新すると関係するノードだけが計算し直され、ディスクにある派生系列は元データを
+読まずに使われる。
+
+コマンドラインから（リポジトリのルートで）:
+    python -m common.derived cgpi.tot_yoy deflator.gap --explain
+"""
+
+import argparse
+import hashlib
+import json
+import sys
+from collections import Counter, namedtuple
+
+import numpy as np
+import pandas as pd
+
+from common import CACHE_DIR, periods
+from common.catalog import SERIES, get_series, source_version
+from common.transforms import T
+
+# 派生系列の定義
+#   chain : common.transforms の変換（inputs の2つ目以降は spread・ratio の相手）
+#   inputs : 入力の系列名（カタログの系列コードまたは派生系列名）。2つ目以降は1つ目の期にそろえる
+Expr = namedtuple('Expr', 'chain inputs unit description')
+
+EXPRESSIONS = {
+    'cgpi.terms_of_trade': Expr(T.ratio(), ('cgpi.export_index', 'cgpi.import_index'), '指数',
+                                '交易条件（輸出物価指数 / 輸入物価指数 × 100）'),
+    'cgpi.tot_yoy': Expr(T.yoy(12), ('cgpi.terms_of_trade',), '%', '交易条件の前年同月比'),
+    'deficit.nominal_gdp_oku': Expr(T.scale(10000), ('deficit.nominal_gdp',), '億円',
+                                    '名目GDP（億円、年度）'),
+    'deficit.balance_gdp_ratio': Expr(T.ratio(), ('deficit.balance', 'deficit.nominal_gdp_oku'), '%',
+                                      '一般政府資金過不足の名目GDP比（年度）'),
+    'deflator.gdp_yoy': Expr(T.yoy(1), ('deflator.gdp',), '%', 'GDPデフレーターの前年比'),
+    'deflator.consumption_yoy': Expr(T.yoy(1), ('deflator.consumption',), '%',
+                                     '民間最終消費支出デフレーターの前年比'),
+    'deflator.gdp_cumulative': Expr(T.cumulative(), ('deflator.gdp',), '%',
+                                    'GDPデフレーターの始点からの累積変化率'),
+    'deflator.consumption_cumulative': Expr(T.cumulative(), ('deflator.consumption',), '%',
+                                            '民間最終消費支出デフレーターの始点からの累積変化率'),
+    'deflator.gap': Expr(T.spread(), ('deflator.consumption', 'deflator.gdp'), 'ポイント',
+                         'デフレーターの差（消費支出 − GDP）'),
+}
+
+
+class NodeCache:
+    """計算済みノードのキャッシュ（.npz。値・期の序数（int32）・頻度）"""
+
+    def __init__(self, directory=None):
+        self.directory = CACHE_DIR / 'derived' if directory is None else directory
+
+    def path(self, name, fingerprint):
+        return self.directory / f'{name}.{fingerprint}.npz'
+
+    def exists(self, name, fingerprint):
+        return self.path(name, fingerprint).exists()
+
+    def load(self, name, fingerprint):
+        path = self.path(name, fingerprint)
+        if not path.exists():
+            return None
+        with np.load(path) as data:
+            index = pd.PeriodIndex.from_ordinals(data['ordinals'].astype(np.int64), freq=str(data['freq']))
+            return pd.Series(data['values'], index=index, name=name)
+
+    def save(self, name, fingerprint, series):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for stale in self.directory.glob(f'{name}.*.npz'):
+            stale.unlink()
+        np.savez(self.path(name, fingerprint), values=series.to_numpy(dtype=float),
+                 ordinals=periods.from_index(series.index), freq=np.array(series.index.freqstr))
+
+
+class Graph:
+    """
+    派生系列の評価器
+
+    Parameters
+    ----------
+    expressions : {名前: Expr}（省略時は EXPRESSIONS）
+    cache : NodeCache。False ならディスクのキャッシュを使わない
+
+    stats には評価ごとのノードの出どころ（memory・disk・computed・base）の件数が加算される。
+    """
+
+    def __init__(self, expressions=None, cache=None):
+        self.expressions = EXPRESSIONS if expressions is None else expressions
+        self.cache = NodeCache() if cache is None else cache
+        self.stats = Counter()
+        self._memory = {}
+
+    def _fingerprint(self, name, fingerprints, path=()):
+        if name in fingerprints:
+            return fingerprints[name]
+        if name in path:
+            raise ValueError(f'派生系列の定義が循環しています: {" → ".join(path + (name,))}')
+        if name in self.expressions:
+            expr = self.expressions[name]
+            parts = [name, expr.chain.key] + [self._fingerprint(i, fingerprints, path + (name,))
+                                              for i in expr.inputs]
+        elif name in SERIES:
+            parts = [name, source_version(SERIES[name].source)]
+        else:
+            raise KeyError(f'未登録の系列: {name}')
+        text = json.dumps(parts, ensure_ascii=False)
+        fingerprints[name] = hashlib.sha1(text.encode('utf-8')).hexdigest()[:16]
+        return fingerprints[name]
+
+    def _value(self, name, fingerprints):
+        fingerprint = fingerprints[name]
+        series = self._memory.get(fingerprint)
+        if series is not None:
+            self.stats['memory'] += 1
+            return series
+        if name in self.expressions:
+            series = self.cache.load(name, fingerprint) if self.cache else None
+            if series is not None:
+                self.stats['disk'] += 1
+            else:
+                expr = self.expressions[name]
+                inputs = [self._value(i, fingerprints) for i in expr.inputs]
+                inputs = inputs[:1] + [s.reindex(inputs[0].index) for s in inputs[1:]]
+                series = expr.chain(*inputs).rename(name)
+                self.stats['computed'] += 1
+                if self.cache:
+                    self.cache.save(name, fingerprint, series)
+        else:
+            series = get_series(name)
+            self.stats['base'] += 1
+        self._memory[fingerprint] = series
+        return series
+
+    def evaluate(self, names):
+        """要求された系列だけを評価して {名前: Series} を返す"""
+        fingerprints = {}
+        for name in names:
+            self._fingerprint(name, fingerprints)
+        return {name: self._value(name, fingerprints).copy() for name in names}
+
+    def get(self, name):
+        return self.evaluate([name])[name]
+
+    def fingerprint(self, name):
+        """系列の版（式と入力データファイルの版から作るキャッシュのキー）"""
+        return self._fingerprint(name, {})
+
+    def explain(self, names):
+        """
+        評価の計画（評価順の (名前, 出どころ) のリスト。出どころは memory・disk・compute・base）
+
+        キャッシュにあるノードの入力はたどらないため、計画に出てこない系列は読まれない。
+        """
+        fingerprints = {}
+        for name in names:
+            self._fingerprint(name, fingerprints)
+        plan, seen = [], set()
+
+        def visit(name):
+            if name in seen:
+                return
+            seen.add(name)
+            fingerprint = fingerprints[name]
+            if fingerprint in self._memory:
+                plan.append((name, 'memory'))
+            elif name not in self.expressions:
+                plan.append((name, 'base'))
+            elif self.cache and self.cache.exists(name, fingerprint):
+                plan.append((name, 'disk'))
+            else:
+                for i in self.expressions[name].inputs:
+                    visit(i)
+                plan.append((name, 'compute'))
+
+        for name in names:
+            visit(name)
+        return plan
+
+
+_default = Graph()
+
+
+def evaluate(names):
+    """既定のグラフ（EXPRESSIONS・.cache/derived/）で評価する"""
+    return _default.evaluate(names)
+
+
+def get(name):
+    return _default.get(name)
+
+
+def column_metadata(columns):
+    """
+    {列名: 派生系列名} から列のメタデータ {列名: {'series', 'unit', 'description'}} を作る
+
+    common.output.save_table の columns に渡す（カタログの系列は common.catalog.column_metadata）。
+    """
+    return {column: {'series': name, 'unit': EXPRESSIONS[name].unit,
+                     'description': EXPRESSIONS[name].description}
+            for column, name in columns.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m common.derived', description='派生系列の評価')
+    parser.add_argument('names', nargs='*', help='系列名（省略時は派生系列の一覧を表示）')
+    parser.add_argument('--explain', action='store_true', help='評価せずに計画を表示する')
+    parser.add_argument('--no-cache', action='store_true', help='ディスクのキャッシュを使わない')
+    args = parser.parse_args(argv)
+
+    if not args.names:
+        for name, expr in EXPRESSIONS.items():
+            print(f'{name:34s} {expr.unit:6s} {expr.description}  ← {", ".join(expr.inputs)}')
+        return 0
+    graph = Graph(cache=False) if args.no_cache else _default
+    if args.explain:
+        for name, status in graph.explain(args.names):
+            print(f'{status:8s} {name}')
+        return 0
+    values = graph.evaluate(args.names)
+    # 頻度（月次・年度など）ごとに表にする（混ぜると期がそろわず欠損ばかりになる）
+    by_freq = {}
+    for name, series in values.items():
+        by_freq.setdefault(series.index.freqstr, {})[name] = series
+    for group in by_freq.values():
+        print(pd.DataFrame(group).tail(12).to_string())
+        print()
+    print(', '.join(f'{k}={v}' for k, v in sorted(graph.stats.items())))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
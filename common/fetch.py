@@ -0,0 +1,583 @@
+"""
+統計データ（日本銀行・財務省・内閣府）の一括ダウンロード
+
+asyncio で多数のファイルを並列に取得し、ローダーのキャッシュ（.cache/sources/）に
+リポジトリと同じ相対パスで書き込む。common.catalog はキャッシュのファイルがリポジトリの
+ファイルより新しければそちらを読む。
+
+- 接続プール: ホストごとに keep-alive の接続を再利用（同時接続数は connections まで）
+- 条件付き取得: 前回の ETag・Last-Modified を If-None-Match・If-Modified-Since で送り、
+  304 ならファイルに触れない
+- 再試行: 接続エラー・タイムアウト・429・5xx を指数バックオフで再試行（Retry-After に従う）
+- 流量制限: ホストごとのトークンバケット（RATE_LIMITS、既定 DEFAULT_RATE 件/秒）
+
+取得の記録（ETag・Last-Modified・内容のハッシュ）は .cache/sources/index.json に保存する。
+
+オフラインで動作と処理量を確かめるため、記録済みの応答を返す代替サーバー（MockServer）を持つ。
+記録済みの応答にはリポジトリにある手動ダウンロード済みのファイルを使う。
+
+使い方（リポジトリのルートで）:
+    python -m common.fetch run                                  # 実際の配信元から取得
+    python -m common.fetch serve --port 8765                    # 代替サーバーを起動
+    python -m common.fetch run --mock http://127.0.0.1:8765     # 代替サーバーから取得
+    python -m common.fetch bench --targets 500 --latency 0.02   # 代替サーバーで処理量を測定
+"""
+
+import argparse
+import asyncio
+import email.utils
+import gzip
+import json
+import random
+import ssl
+import sys
+import time
+from collections import namedtuple
+from pathlib import Path
+from urllib.parse import urljoin, urlsplit
+
+from common import CACHE_DIR, REPO_ROOT
+from common.output import content_hash, write_if_changed
+
+# ローダーのキャッシュ（common.catalog が参照する）
+FETCHED_DIR = CACHE_DIR / 'sources'
+INDEX_NAME = 'index.json'
+
+# 取得対象: name は識別名、url は配信元、dest はキャッシュ内（＝リポジトリ内）の相対パス
+Target = namedtuple('Target', 'name url dest')
+
+TARGETS = [
+    Target('boj.cgpi_yen', 'https://www.stat-search.boj.or.jp/ssi/mtshtml/csv/pr01_m_1.csv',
+           '企業物価指数/企業物価指数円ベースpr01_m_1.csv'),
+]
+
+# ホストごとの流量制限（件/秒）
+DEFAULT_RATE = 2.0
+RATE_LIMITS = {
+    'www.stat-search.boj.or.jp': 1.0,
+    'www.mof.go.jp': 1.0,
+    'www.esri.cao.go.jp': 1.0,
+}
+
+# 再試行する HTTP ステータス
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_REDIRECTS = 5
+USER_AGENT = 'japan-macro-analysis-fetcher/1.0'
+
+# 取得結果
+UPDATED = 'updated'
+UNCHANGED = 'unchanged'
+NOT_MODIFIED = 'not_modified'
+FAILED = 'failed'
+
+Response = namedtuple('Response', 'status headers body')
+
+
+class ProtocolError(Exception):
+    """HTTP 応答を解釈できない"""
+
+
+class RateLimiter:
+    """トークンバケット（rate 件/秒、最大 burst 件）。rate が 0・None なら制限しない"""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        if not self.rate:
+            return
+        async with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self.tokens = 0
+                self.updated = time.monotonic()
+            else:
+                self.tokens -= 1
+
+
+# ---- HTTP/1.1 クライアント
+
+async def _read_headers(reader):
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if not line:
+            raise asyncio.IncompleteReadError(b'', None)
+        line = line.decode('latin-1').rstrip('\r\n')
+        if not line:
+            return headers
+        name, sep, value = line.partition(':')
+        if not sep:
+            raise ProtocolError(f'不正なヘッダー: {line!r}')
+        headers[name.strip().lower()] = value.strip()
+
+
+async def _read_chunked(reader):
+    chunks = []
+    while True:
+        size = int((await reader.readline()).split(b';')[0].strip() or b'0', 16)
+        if size == 0:
+            await _read_headers(reader)  # トレーラー
+            return b''.join(chunks)
+        chunks.append(await reader.readexactly(size))
+        await reader.readexactly(2)
+
+
+class HostPool:
+    """1つのホストへの接続プール"""
+
+    def __init__(self, scheme, host, port, connections=4, rate=DEFAULT_RATE):
+        self.scheme = scheme
+        self.host = host
+        self.port = port
+        self.idle = []
+        self.slots = asyncio.Semaphore(connections)
+        self.limiter = RateLimiter(rate)
+        self.opened = 0
+
+    async def _connect(self):
+        ssl_context = ssl.create_default_context() if self.scheme == 'https' else None
+        self.opened += 1
+        return await asyncio.open_connection(self.host, self.port, ssl=ssl_context)
+
+    async def _exchange(self, reader, writer, method, path, headers):
+        default_port = 443 if self.scheme == 'https' else 80
+        host = self.host if self.port == default_port else f'{self.host}:{self.port}'
+        lines = [f'{method} {path} HTTP/1.1', f'Host: {host}', f'User-Agent: {USER_AGENT}',
+                 'Accept-Encoding: gzip', 'Connection: keep-alive']
+        lines += [f'{k}: {v}' for k, v in headers.items()]
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+        await writer.drain()
+
+        status_line = await reader.readline()
+        if not status_line:
+            raise asyncio.IncompleteReadError(b'', None)
+        parts = status_line.decode('latin-1').split(' ', 2)
+        if len(parts) < 2 or not parts[0].startswith('HTTP/'):
+            raise ProtocolError(f'不正なステータス行: {status_line!r}')
+        version, status = parts[0], int(parts[1])
+        response_headers = await _read_headers(reader)
+
+        keep_alive = version == 'HTTP/1.1' and response_headers.get('connection', '').lower() != 'close'
+        if method == 'HEAD' or status in (204, 304) or 100 <= status < 200:
+            body = b''
+        elif 'chunked' in response_headers.get('transfer-encoding', '').lower():
+            body = await _read_chunked(reader)
+        elif 'content-length' in response_headers:
+            body = await reader.readexactly(int(response_headers['content-length']))
+        else:
+            body = await reader.read()
+            keep_alive = False
+        if response_headers.get('content-encoding', '').lower() == 'gzip':
+            body = gzip.decompress(body)
+        return Response(status, response_headers, body), keep_alive
+
+    async def request(self, method, path, headers, timeout):
+        await self.limiter.acquire()
+        async with self.slots:
+            reused = bool(self.idle)
+            reader, writer = self.idle.pop() if reused else await self._connect()
+            try:
+                response, keep_alive = await asyncio.wait_for(
+                    self._exchange(reader, writer, method, path, headers), timeout)
+            except (asyncio.IncompleteReadError, ConnectionError) as e:
+                writer.close()
+                if not reused:
+                    raise
+                # サーバー側で閉じられた keep-alive 接続: 新しい接続でやり直す
+                reader, writer = await self._connect()
+                try:
+                    response, keep_alive = await asyncio.wait_for(
+                        self._exchange(reader, writer, method, path, headers), timeout)
+                except BaseException:
+                    writer.close()
+                    raise e from None
+            except BaseException:
+                writer.close()
+                raise
+            if keep_alive:
+                self.idle.append((reader, writer))
+            else:
+                writer.close()
+            return response
+
+    def close(self):
+        for _, writer in self.idle:
+            writer.close()
+        self.idle.clear()
+
+
+# ---- 取得
+
+def _retry_after(response):
+    """Retry-After ヘッダーの待ち時間（秒）。ヘッダーがないか読めなければ None（指数バックオフで待つ）"""
+    value = response.headers.get('retry-after')
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        parsed = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(parsed.timestamp() - time.time(), 0.0)
+
+
+class Fetcher:
+    """
+    取得対象を並列にダウンロードしてキャッシュに書き込む
+
+    Parameters
+    ----------
+    cache_dir : 書き込み先（既定はローダーのキャッシュ）
+    connections : ホストごとの同時接続数
+    rate : 流量制限（件/秒）。None なら RATE_LIMITS・DEFAULT_RATE、0 なら制限なし
+    retries : 再試行の回数
+    timeout : 1回の要求のタイムアウト（秒）
+    backoff : 再試行の待ち時間の初期値（秒、試行ごとに倍）
+    """
+
+    def __init__(self, cache_dir=FETCHED_DIR, connections=4, rate=None, retries=4, timeout=30.0,
+                 backoff=0.5):
+        self.cache_dir = Path(cache_dir)
+        self.connections = connections
+        self.rate = rate
+        self.retries = retries
+        self.timeout = timeout
+        self.backoff = backoff
+        self.pools = {}
+        self.index_path = self.cache_dir / INDEX_NAME
+        self.index = json.loads(self.index_path.read_text(encoding='utf-8')) if self.index_path.exists() else {}
+
+    def _pool(self, url):
+        parts = urlsplit(url)
+        port = parts.port or (443 if parts.scheme == 'https' else 80)
+        key = (parts.scheme, parts.hostname, port)
+        if key not in self.pools:
+            rate = self.rate if self.rate is not None else RATE_LIMITS.get(parts.hostname, DEFAULT_RATE)
+            self.pools[key] = HostPool(parts.scheme, parts.hostname, port, self.connections, rate)
+        return self.pools[key]
+
+    async def _get(self, url, headers):
+        """リダイレクトをたどって GET する（再試行なし）"""
+        for _ in range(MAX_REDIRECTS + 1):
+            parts = urlsplit(url)
+            path = parts.path or '/'
+            if parts.query:
+                path += '?' + parts.query
+            response = await self._pool(url).request('GET', path, headers, self.timeout)
+            if response.status in (301, 302, 303, 307, 308) and 'location' in response.headers:
+                url = urljoin(url, response.headers['location'])
+                continue
+            return response
+        raise ProtocolError(f'リダイレクトが多すぎます: {url}')
+
+    async def fetch(self, target, url=None):
+        """
+        1件を取得する（url を渡すと target.url の代わりに使う。代替サーバー用）
+
+        Returns
+        -------
+        {'name', 'status', 'bytes', 'attempts', 'error'}
+        """
+        url = url or target.url
+        dest = self.cache_dir / target.dest
+        entry = self.index.get(target.name, {}) if dest.exists() else {}
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+
+        result = {'name': target.name, 'status': FAILED, 'bytes': 0, 'attempts': 0, 'error': None}
+        for attempt in range(1, self.retries + 2):
+            result['attempts'] = attempt
+            delay = self.backoff * 2 ** (attempt - 1)
+            try:
+                response = await self._get(url, headers)
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ProtocolError) as e:
+                result['error'] = f'{type(e).__name__}: {e}'
+            else:
+                if response.status not in RETRY_STATUSES:
+                    break
+                result['error'] = f'HTTP {response.status}'
+                retry_after = _retry_after(response)
+                if retry_after is not None:
+                    delay = retry_after
+            if attempt <= self.retries:
+                await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+        else:
+            return result
+
+        if response.status == 304:
+            result.update(status=NOT_MODIFIED, error=None)
+            return result
+        if response.status != 200:
+            result['error'] = f'HTTP {response.status}'
+            return result
+
+        status = write_if_changed(dest, response.body)
+        self.index[target.name] = {
+            'url': target.url,
+            'dest': target.dest,
+            'etag': response.headers.get('etag'),
+            'last_modified': response.headers.get('last-modified'),
+            'sha256': content_hash(response.body),
+            'fetched_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        }
+        result.update(status=UPDATED if status == 'written' else UNCHANGED,
+                      bytes=len(response.body), error=None)
+        return result
+
+    async def fetch_all(self, targets, mock=None):
+        """
+        すべての取得対象を並列に取得する（mock は代替サーバーの URL）
+
+        接続数・流量はホストごとに制限されるため、対象はすべて同時に投入する。
+        """
+        try:
+            results = await asyncio.gather(*(self.fetch(t, mock_url(t.url, mock) if mock else None)
+                                             for t in targets))
+        finally:
+            for pool in self.pools.values():
+                pool.close()
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            self.index_path.write_text(json.dumps(self.index, indent=1, ensure_ascii=False), encoding='utf-8')
+        return results
+
+    @property
+    def connections_opened(self):
+        return sum(pool.opened for pool in self.pools.values())
+
+
+def mock_url(url, mock):
+    """配信元の URL を代替サーバーの URL（/<ホスト>/<パス>）に置き換える"""
+    parts = urlsplit(url)
+    query = f'?{parts.query}' if parts.query else ''
+    return f'{mock.rstrip("/")}/{parts.hostname}{parts.path}{query}'
+
+
+# ---- 代替サーバー
+
+def recorded_routes(targets=TARGETS, root=REPO_ROOT):
+    """代替サーバーの経路 {'/<ホスト>/<パス>': 記録済みの応答（ファイル）}"""
+    routes = {}
+    for target in targets:
+        parts = urlsplit(target.url)
+        routes[f'/{parts.hostname}{parts.path}'] = Path(root) / target.dest
+    return routes
+
+
+class MockServer:
+    """
+    記録済みの応答を返す HTTP/1.1 サーバー（keep-alive・ETag・Last-Modified・gzip に対応）
+
+    Parameters
+    ----------
+    routes : {パス: ファイル}
+    latency : 応答ごとの遅延（秒）
+    error_rate : 503（Retry-After: 0）を返す割合（再試行の確認用）
+    """
+
+    def __init__(self, routes, latency=0.0, error_rate=0.0, seed=0):
+        self.routes = routes
+        self.latency = latency
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.bodies = {}
+        self.requests = 0
+        self.server = None
+        self.writers = set()
+
+    def _body(self, path):
+        file = self.routes[path]
+        mtime = file.stat().st_mtime
+        cached = self.bodies.get(path)
+        if cached is None or cached[0] != mtime:
+            data = file.read_bytes()
+            cached = (mtime, data, gzip.compress(data, mtime=0), f'"{content_hash(data)[:20]}"',
+                      email.utils.formatdate(mtime, usegmt=True))
+            self.bodies[path] = cached
+        return cached[1:]
+
+    async def start(self, host='127.0.0.1', port=0):
+        self.server = await asyncio.start_server(self._handle, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        self.server.close()
+        for writer in list(self.writers):
+            writer.close()
+        await self.server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        self.writers.add(writer)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode('latin-1').split(' ', 2)
+                headers = await _read_headers(reader)
+                self.requests += 1
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                self._respond(writer, method, path.split('?')[0], headers)
+                await writer.drain()
+                if headers.get('connection', '').lower() == 'close':
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError, asyncio.CancelledError):
+            # 接続の切断・サーバーの終了
+            pass
+        finally:
+            self.writers.discard(writer)
+            writer.close()
+
+    def _respond(self, writer, method, path, headers):
+        extra = {}
+        if path not in self.routes or not self.routes[path].exists():
+            status, body = 404, b''
+        elif self.error_rate and self.random.random() < self.error_rate:
+            status, body, extra = 503, b'', {'Retry-After': '0'}
+        else:
+            data, compressed, etag, last_modified = self._body(path)
+            extra = {'ETag': etag, 'Last-Modified': last_modified}
+            if headers.get('if-none-match') == etag or (
+                    'if-none-match' not in headers and headers.get('if-modified-since') == last_modified):
+                status, body = 304, b''
+            elif 'gzip' in headers.get('accept-encoding', ''):
+                status, body = 200, compressed
+                extra['Content-Encoding'] = 'gzip'
+            else:
+                status, body = 200, data
+        lines = [f'HTTP/1.1 {status} {"OK" if status == 200 else "-"}', f'Content-Length: {len(body)}']
+        lines += [f'{k}: {v}' for k, v in extra.items()]
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+        if method != 'HEAD' and status != 304:
+            writer.write(body)
+
+
+# ---- 処理量の測定
+
+def bench_targets(n, directory):
+    """代替サーバー用の合成の取得対象（企業物価指数 CSV 形式、初回のみ生成）"""
+    from benchmarks.generate_inputs import write_cgpi
+
+    targets = []
+    for i in range(n):
+        dest = f'series_{i:05d}.csv'
+        path = Path(directory) / dest
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            write_cgpi(path, n_series=9, n_months=550, seed=i)
+        targets.append(Target(f'bench.{i:05d}', f'https://bench.invalid/{dest}', dest))
+    return targets
+
+
+async def _bench(n_targets, latency, error_rate, connections, rate, rounds):
+    bench_dir = CACHE_DIR / 'fetch_bench'
+    targets = bench_targets(n_targets, bench_dir / 'recordings')
+    server = MockServer(recorded_routes(targets, bench_dir / 'recordings'), latency, error_rate)
+    port = await server.start()
+    mock = f'http://127.0.0.1:{port}'
+    try:
+        for n in range(1, rounds + 1):
+            fetcher = Fetcher(bench_dir / 'cache', connections=connections, rate=rate, backoff=0.01)
+            start = time.perf_counter()
+            results = await fetcher.fetch_all(targets, mock=mock)
+            elapsed = time.perf_counter() - start
+            counts = {}
+            for r in results:
+                counts[r['status']] = counts.get(r['status'], 0) + 1
+            total_bytes = sum(r['bytes'] for r in results)
+            retries = sum(r['attempts'] - 1 for r in results)
+            print(f'round {n}: {len(targets)}件 {elapsed:.2f}秒 '
+                  f'({len(targets) / elapsed:.0f}件/秒, {total_bytes / elapsed / 1e6:.1f}MB/秒) '
+                  f'接続 {fetcher.connections_opened} 再試行 {retries} '
+                  + ' '.join(f'{k}={v}' for k, v in sorted(counts.items())))
+    finally:
+        await server.close()
+
+
+def _print_results(results):
+    for r in results:
+        detail = f" {r['bytes'] / 1024:.0f}KB" if r['bytes'] else ''
+        error = f" ({r['error']})" if r['error'] else ''
+        print(f"{r['name']}: {r['status']}{detail} 試行{r['attempts']}回{error}")
+
+
+def _select(names):
+    if not names:
+        return TARGETS
+    unknown = sorted(set(names) - {t.name for t in TARGETS})
+    if unknown:
+        raise SystemExit(f'未登録の取得対象: {", ".join(unknown)}')
+    return [t for t in TARGETS if t.name in names]
+
+
+async def _serve(port, latency, error_rate):
+    server = MockServer(recorded_routes(), latency, error_rate)
+    port = await server.start(port=port)
+    print(f'代替サーバー: http://127.0.0.1:{port}（Ctrl+C で終了）')
+    for path in server.routes:
+        print(f'  {path}')
+    await server.server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m common.fetch', description='統計データの一括ダウンロード')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    run = sub.add_parser('run', help='取得対象をダウンロードしてキャッシュに書き込む')
+    run.add_argument('names', nargs='*', help='取得対象の名前（省略時はすべて）')
+    run.add_argument('--mock', help='代替サーバーの URL')
+    run.add_argument('--connections', type=int, default=4, help='ホストごとの同時接続数')
+    run.add_argument('--rate', type=float, default=None, help='流量制限（件/秒、0 で制限なし）')
+    run.add_argument('--retries', type=int, default=4)
+    run.add_argument('--list', action='store_true', help='取得対象の一覧を表示して終了')
+
+    serve = sub.add_parser('serve', help='記録済みの応答を返す代替サーバーを起動')
+    serve.add_argument('--port', type=int, default=8765)
+    serve.add_argument('--latency', type=float, default=0.0, help='応答ごとの遅延（秒）')
+    serve.add_argument('--error-rate', type=float, default=0.0, help='503 を返す割合')
+
+    bench = sub.add_parser('bench', help='代替サーバーで処理量を測定')
+    bench.add_argument('--targets', type=int, default=200)
+    bench.add_argument('--latency', type=float, default=0.02)
+    bench.add_argument('--error-rate', type=float, default=0.02)
+    bench.add_argument('--connections', type=int, default=8)
+    bench.add_argument('--rate', type=float, default=0)
+    bench.add_argument('--rounds', type=int, default=2, help='2回目以降は条件付き取得（304）になる')
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        targets = _select(args.names)
+        if args.list:
+            for t in targets:
+                print(f'{t.name}: {t.url} → {t.dest}')
+            return 0
+        fetcher = Fetcher(connections=args.connections, rate=args.rate, retries=args.retries)
+        results = asyncio.run(fetcher.fetch_all(targets, mock=args.mock))
+        _print_results(results)
+        return 1 if any(r['status'] == FAILED for r in results) else 0
+    if args.command == 'serve':
+        try:
+            asyncio.run(_serve(args.port, args.latency, args.error_rate))
+        except KeyboardInterrupt:
+            pass
+        return 0
+    asyncio.run(_bench(args.targets, args.latency, args.error_rate, args.connections, args.rate, args.rounds))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,283 @@
+"""
+資金循環統計 CSV のストリーミング処理
+
+ファイル構成（日本銀行 時系列統計データ検索サイトの資金循環統計、Shift-JIS）:
+    1行目  データコード,<系列コード>,...
+    2行目  系列名称,<系列名称>,...
+    3行目以降  <期>,<値>,...（億円）
+
+全部門・全取引項目を含む四半期の出力のような大きなファイルでも、行を chunksize 行ずつ、
+列を column_batch 列ずつ読み、名目GDP比と集計を逐次計算して結果を書き出しながら処理する。
+使うメモリは chunksize × column_batch の範囲に収まり、ファイル全体の大きさによらない
+（列のかたまりごとにファイルを読み直すため、列が少ないファイルでは column_batch は不要）。
+
+    from common.fof import read_nominal_gdp, stream_gdp_ratios
+
+    summary, totals, status = stream_gdp_ratios('資金循環統計 資金過不足1980.csv',
+                                                read_nominal_gdp('nominal_gdp.csv'), 'ratios.csv')
+
+コマンドラインから（リポジトリのルートで）:
+    python -m common.fof <資金循環統計.csv> <nominal_gdp.csv> -o ratios.csv --summary summary.csv
+"""
+
+import argparse
+import csv
+import hashlib
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from common import periods
+from common.output import UNCHANGED, WRITTEN, save_table
+
+ENCODING = 'shift_jis'
+PERIOD_COLUMN = 'データコード'
+
+# 1回に読む行数
+CHUNK_ROWS = 2000
+
+# 長い形式の出力の列
+OUTPUT_COLUMNS = ['期', 'データコード', '値_億円', '名目GDP_億円', 'GDP比_%']
+
+
+def read_header(path, encoding=ENCODING):
+    """系列コードのリストと {系列コード: 系列名称}（先頭2行だけを読む）"""
+    with open(path, encoding=encoding, newline='') as f:
+        rows = csv.reader([f.readline(), f.readline()])
+        codes, names = next(rows), next(rows)
+    codes = codes[1:]
+    return codes, dict(zip(codes, names[1:]))
+
+
+def iter_chunks(path, codes=None, chunksize=CHUNK_ROWS, encoding=ENCODING):
+    """
+    データ行を chunksize 行ずつ読む
+
+    Yields
+    ------
+    DataFrame（index: 期の文字列、列: 系列コード、値: float）。codes を渡すとその列だけを読む
+    """
+    usecols = None if codes is None else [PERIOD_COLUMN] + list(codes)
+    reader = pd.read_csv(path, encoding=encoding, skiprows=[1], usecols=usecols,
+                         dtype={PERIOD_COLUMN: str}, chunksize=chunksize)
+    with reader:
+        for chunk in reader:
+            chunk = chunk.set_index(PERIOD_COLUMN)
+            if codes is not None:
+                chunk = chunk[list(codes)]
+            yield chunk.astype(float)
+
+
+def read_nominal_gdp(path):
+    """nominal_gdp.csv（年度,名目GDP_兆円）を 期 → 名目GDP（億円）の Series で読む"""
+    gdp = pd.read_csv(path)
+    return pd.Series(gdp['名目GDP_兆円'].to_numpy() * 10000, index=gdp['年度'].astype(str))
+
+
+class RunningStats:
+    """
+    列ごとの件数・平均・分散・最小・最大を、行のかたまりを加えながら計算する
+
+    平均と分散はかたまりごとの値を並列版 Welford 法で合成する（全データを保持しない）。
+    """
+
+    def __init__(self, columns):
+        n = len(columns)
+        self.columns = list(columns)
+        self.count = np.zeros(n)
+        self.mean = np.zeros(n)
+        self.m2 = np.zeros(n)
+        self.min = np.full(n, np.inf)
+        self.max = np.full(n, -np.inf)
+        self.min_label = np.full(n, None, dtype=object)
+        self.max_label = np.full(n, None, dtype=object)
+
+    def update(self, values, labels):
+        """values: (行, 列) の配列、labels: 行のラベル"""
+        valid = ~np.isnan(values)
+        count = valid.sum(axis=0)
+        has = count > 0
+        if not has.any():
+            return
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.where(has, np.nansum(values, axis=0) / count, 0.0)
+            m2 = np.nansum((values - mean) ** 2, axis=0)
+        total = self.count + count
+        delta = mean - self.mean
+        ratio = np.divide(count, total, out=np.zeros_like(total), where=total > 0)
+        self.m2 = self.m2 + m2 + delta ** 2 * self.count * ratio
+        self.mean = self.mean + delta * ratio
+        self.count = total
+
+        labels = np.asarray(labels, dtype=object)
+        filled_min = np.where(valid, values, np.inf)
+        filled_max = np.where(valid, values, -np.inf)
+        rows_min, rows_max = filled_min.argmin(axis=0), filled_max.argmax(axis=0)
+        cols = np.arange(values.shape[1])
+        chunk_min, chunk_max = filled_min[rows_min, cols], filled_max[rows_max, cols]
+        lower, higher = chunk_min < self.min, chunk_max > self.max
+        self.min = np.where(lower, chunk_min, self.min)
+        self.max = np.where(higher, chunk_max, self.max)
+        self.min_label = np.where(lower, labels[rows_min], self.min_label)
+        self.max_label = np.where(higher, labels[rows_max], self.max_label)
+
+    def frame(self):
+        with np.errstate(invalid='ignore'):
+            std = np.sqrt(self.m2 / (self.count - 1))
+        empty = self.count == 0
+        return pd.DataFrame({
+            'count': self.count.astype(int),
+            'mean': np.where(empty, np.nan, self.mean),
+            'std': np.where(self.count > 1, std, np.nan),
+            'min': np.where(empty, np.nan, self.min),
+            'min_period': self.min_label,
+            'max': np.where(empty, np.nan, self.max),
+            'max_period': self.max_label,
+        }, index=pd.Index(self.columns, name='データコード'))
+
+
+def _batches(codes, size):
+    if not size:
+        return [codes]
+    return [codes[i:i + size] for i in range(0, len(codes), size)]
+
+
+def _file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def stream_gdp_ratios(path, gdp, out_path, codes=None, chunksize=CHUNK_ROWS, column_batch=None,
+                      encoding=ENCODING, out_encoding='utf-8'):
+    """
+    系列の名目GDP比を逐次計算し、長い形式の CSV に書き出しながら集計する
+
+    Parameters
+    ----------
+    path : 資金循環統計 CSV
+    gdp : 期（文字列）→ 名目GDP（億円）の Series（read_nominal_gdp の戻り値など）。
+          四半期のファイルには四半期の名目GDP（年率）を渡す。GDP のない期の比率は空欄
+    out_path : 出力 CSV（列は OUTPUT_COLUMNS。行は読んだかたまりの順。内容が前回と同じなら書き換えない）
+    codes : 対象の系列コード（省略時は全系列）
+    chunksize : 1回に読む行数
+    column_batch : 1回に読む列数（省略時は全列。列が非常に多いファイルで指定する）
+
+    Returns
+    -------
+    summary : 系列ごとの名目GDP比の統計（count, mean, std, min, min_period, max, max_period）と系列名称
+    totals : 期ごとの対象系列の合計（値_億円・GDP比_%。全部門を対象にすれば資金過不足の合計はほぼ0）
+    status : 出力の書き込み結果（WRITTEN・UNCHANGED）
+    """
+    all_codes, names = read_header(path, encoding)
+    codes = list(all_codes if codes is None else codes)
+    stats = RunningStats(codes)
+    period_totals = {}
+    period_gdp = {}
+    # 名目GDP は期の序数で引く（かたまりごとに期の文字列で reindex しない）
+    freq = periods.infer_freq(gdp.index[0]) if len(gdp) else 'Y'
+    gdp_periods = periods.parse(gdp.index.astype(str), freq)
+    gdp_values = gdp.to_numpy(dtype=float)
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=out_path.parent, prefix=f'.{out_path.name}.', suffix='.tmp')
+
+    try:
+        with os.fdopen(fd, 'w', encoding=out_encoding, newline='') as out:
+            out.write(','.join(OUTPUT_COLUMNS) + '\n')
+            offset = 0
+            for batch in _batches(codes, column_batch):
+                batch_stats = RunningStats(batch)
+                for chunk in iter_chunks(path, batch, chunksize, encoding):
+                    values = chunk.to_numpy()
+                    labels = chunk.index.to_numpy()
+                    gdp_oku = periods.align(periods.parse(labels, freq), gdp_periods, gdp_values)
+                    with np.errstate(invalid='ignore', divide='ignore'):
+                        ratio = values / gdp_oku[:, None] * 100
+                    batch_stats.update(ratio, labels)
+
+                    for period, row_sum, denominator in zip(labels, np.nansum(values, axis=1), gdp_oku):
+                        period_totals[period] = period_totals.get(period, 0.0) + row_sum
+                        period_gdp[period] = denominator
+
+                    # 長い形式で書き出す（かたまりの中は系列ごとに期の順、値のない期は除く）
+                    n_rows = len(labels)
+                    long = pd.DataFrame({
+                        '期': np.tile(labels, len(batch)),
+                        'データコード': np.repeat(np.asarray(batch, dtype=object), n_rows),
+                        '値_億円': values.T.ravel(),
+                        '名目GDP_億円': np.tile(gdp_oku, len(batch)),
+                        'GDP比_%': ratio.T.ravel(),
+                    })
+                    long[long['値_億円'].notna()].to_csv(out, header=False, index=False,
+                                                        lineterminator='\n')
+                _merge(stats, batch_stats, offset)
+                offset += len(batch)
+
+        if out_path.exists() and _file_hash(out_path) == _file_hash(tmp):
+            os.unlink(tmp)
+            status = UNCHANGED
+        else:
+            os.replace(tmp, out_path)
+            status = WRITTEN
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+    summary = stats.frame()
+    summary.insert(0, '系列名称', [names.get(code, '') for code in codes])
+    totals = pd.DataFrame({'期': list(period_totals), '値_億円': list(period_totals.values())})
+    with np.errstate(invalid='ignore', divide='ignore'):
+        totals['GDP比_%'] = totals['値_億円'].to_numpy() / np.array([period_gdp[p] for p in period_totals]) * 100
+    return summary, totals, status
+
+
+def _merge(stats, batch_stats, offset):
+    """列のかたまりごとの統計を全体の統計の該当位置に移す"""
+    part = slice(offset, offset + len(batch_stats.columns))
+    for name in ('count', 'mean', 'm2', 'min', 'max', 'min_label', 'max_label'):
+        getattr(stats, name)[part] = getattr(batch_stats, name)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m common.fof',
+                                     description='資金循環統計の名目GDP比のストリーミング計算')
+    parser.add_argument('fof', type=Path, help='資金循環統計 CSV（Shift-JIS）')
+    parser.add_argument('gdp', type=Path, help='名目GDP CSV（年度,名目GDP_兆円）')
+    parser.add_argument('-o', '--output', type=Path, required=True, help='名目GDP比の出力 CSV（長い形式）')
+    parser.add_argument('--summary', type=Path, help='系列ごとの統計の出力 CSV')
+    parser.add_argument('--totals', type=Path, help='期ごとの合計の出力 CSV')
+    parser.add_argument('--codes', nargs='*', help='対象の系列コード（省略時は全系列）')
+    parser.add_argument('--chunksize', type=int, default=CHUNK_ROWS, help='1回に読む行数')
+    parser.add_argument('--column-batch', type=int, default=None, help='1回に読む列数')
+    args = parser.parse_args(argv)
+
+    summary, totals, status = stream_gdp_ratios(args.fof, read_nominal_gdp(args.gdp), args.output,
+                                                codes=args.codes, chunksize=args.chunksize,
+                                                column_batch=args.column_batch)
+    print(f'{args.output}: {len(summary)}系列 × {len(totals)}期 ({status})')
+    source = {'source': args.fof.name}
+    if args.summary:
+        status = save_table(summary, args.summary, encoding='utf-8-sig',
+                            metadata={'title': '系列ごとの名目GDP比の統計', **source},
+                            columns={c: {'unit': '%'} for c in ('mean', 'std', 'min', 'max')})
+        print(f'{args.summary}: ({status})')
+    if args.totals:
+        status = save_table(totals, args.totals, encoding='utf-8-sig', index=False,
+                            metadata={'title': '期ごとの合計', **source},
+                            columns={'値_億円': {'unit': '億円'}, 'GDP比_%': {'unit': '%'}})
+        print(f'{args.totals}: ({status})')
+    if not args.summary:
+        print(summary.head(10).to_string())
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,380 @@
+"""
+月次系列の自己回帰モデルによる短期予測
+
+各系列の対数の前月差 y に定数項付きの AR(p) を当てはめ（対数水準の ARIMA(p,1,0)）、
+数か月先までの点予測と予測区間を求める。
+
+    y[t] = c + φ1 y[t-1] + … + φp y[t-p] + e[t]
+
+[時点 × 系列] の配列からラグの計画行列を [時点 × 系列 × (p+1)] で作り、正規方程式の
+X'X・X'y を einsum で全系列分まとめて求めて、(p+1) 次の連立方程式を系列の軸で一括に解く
+（系列ごとの Python のループはない）。数百系列 × 数百か月でも数十ミリ秒で済む。
+系列ごとの収録開始時点の違いや途中の欠損は、その時点を含む行を除いて扱う。
+
+予測は漸化式を系列の軸で一括に進める。区間は誤差の分散 σ² と MA(∞) 表現の重み ψ から
+h 期先の予測誤差の分散を求め（前月差を取る場合は ψ の累積和を使う）、対数水準で正規分布を
+仮定して元の水準に戻す（点予測は中央値、区間は上下非対称になる）。系列ごとに最後の観測の
+月が違っていれば、それぞれの最後の観測から予測して全系列の予測の月をそろえる。
+
+推定に使った和（X'X・X'y・y'y・行数）は系列コードごとに、モデルの設定・版（データの最後の月）
+ごとのファイルにまとめて .cache/forecast/ に保存する。新しい月が加わったときは、前の版までの
+値が変わっていなければ保存した和に新しい月の行の分だけを足して解き直す（値が改定されていれば
+全期間で推定し直す）。
+
+    from common.forecast import forecast_frame
+
+    outlook = forecast_frame(data_df, ['export_index', 'import_index'], horizon=12,
+                             codes=['cgpi.export_index', 'cgpi.import_index'])
+    # date（月の序数）と、列ごとの予測値・<列>_lower・<列>_upper の DataFrame
+
+コマンドラインから（リポジトリのルートで）:
+    python -m common.forecast --horizon 12 --order 3
+"""
+
+import argparse
+import hashlib
+import json
+import sys
+import time
+from collections import Counter, namedtuple
+from statistics import NormalDist
+
+import numpy as np
+
+from common import CACHE_DIR, periods
+
+# 既定の自己回帰の次数・予測する月数・予測区間の水準
+ORDER = 3
+HORIZON = 12
+LEVEL = 0.95
+
+# キャッシュの形式（保存する和の定義を変えたら上げる）
+CACHE_FORMAT = 1
+
+# 推定結果（系列ごと）
+FITTED = 'fitted'      # 全期間で推定
+UPDATED = 'updated'    # 前の版の和に新しい月の分を足して推定
+CACHED = 'cached'      # 同じ版の和をそのまま使用
+
+# 推定結果
+#   coef : [系列 × (order + 1)]（定数項, φ1, …, φp）
+#   sigma2 : 誤差の分散、nobs : 推定に使った行数、status : 系列ごとの FITTED・UPDATED・CACHED
+Fit = namedtuple('Fit', 'coef sigma2 nobs status')
+
+# 予測（ordinals は予測する月の序数、ほかは [月 × 系列]。値が1次元なら [月]）
+Forecast = namedtuple('Forecast', 'ordinals mean lower upper')
+
+
+def default_codes():
+    """既定で予測する系列（カタログの月次の物価指数と交易条件）"""
+    from common.catalog import SERIES
+
+    codes = [code for code, spec in SERIES.items() if spec.freq == 'M' and spec.unit != '%']
+    return codes + ['cgpi.terms_of_trade']
+
+
+def _as_columns(values):
+    values = np.asarray(values, dtype=float)
+    return values[:, None] if values.ndim == 1 else values
+
+
+def _months(ordinals):
+    months = periods.as_ordinals(ordinals)
+    if len(months) > 1 and not (np.diff(months) == 1).all():
+        raise ValueError("予測には欠けのない連続した月次データが必要です")
+    return months
+
+
+def _transform(values, log, difference):
+    """(水準（log なら対数）, モデルを当てはめる系列 y)"""
+    level = values
+    if log:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            level = np.where(values > 0, np.log(values), np.nan)
+    if not difference:
+        return level, level
+    return level, np.concatenate([np.full((1,) + level.shape[1:], np.nan), np.diff(level, axis=0)])
+
+
+def _last_valid(values):
+    """系列ごとの最後の観測の行（観測がなければ -1）"""
+    valid = ~np.isnan(values)
+    return np.where(valid.any(axis=0), len(values) - 1 - np.argmax(valid[::-1], axis=0), -1)
+
+
+def _lags(y, order):
+    """[時点 × 系列 × (order + 1)] の計画行列（定数項と1〜order期前の値）"""
+    lags = np.full(y.shape + (order + 1,), np.nan)
+    lags[:, :, 0] = 1.0
+    for i in range(1, order + 1):
+        lags[i:, :, i] = y[:len(y) - i]
+    return lags
+
+
+def _moments(y, order, since):
+    """
+    since[系列] 行目以降を目的変数とする行の X'X・X'y・y'y・行数
+
+    since より前の行は読まないため、新しい月の分だけを足すときは末尾の数行の計算で済む。
+    """
+    start = int(since.min()) if len(since) else len(y)
+    lo = max(start - order, 0)
+    lags = _lags(y[lo:], order)[start - lo:]
+    target = y[start:]
+    rows = np.arange(start, len(y))[:, None]
+    valid = (rows >= since) & ~np.isnan(target) & ~np.isnan(lags).any(axis=2)
+    lags = np.where(valid[:, :, None], lags, 0.0)
+    target = np.where(valid, target, 0.0)
+    return (np.einsum('tni,tnj->nij', lags, lags), np.einsum('tni,tn->ni', lags, target),
+            (target * target).sum(axis=0), valid.sum(axis=0))
+
+
+def _solve(xtx, xty, yy, nobs, order):
+    """正規方程式を系列の軸で一括に解く（行数が足りない系列は NaN）"""
+    coef = np.einsum('nij,nj->ni', np.linalg.pinv(xtx), xty)
+    dof = nobs - (order + 1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sigma2 = np.where(dof > 0, (yy - (coef * xty).sum(axis=1)) / dof, np.nan)
+    coef[dof <= 0] = np.nan
+    return coef, np.maximum(sigma2, 0.0)
+
+
+def _digest(values):
+    return hashlib.sha1(np.ascontiguousarray(values, dtype=float).tobytes()).hexdigest()
+
+
+class ForecastCache:
+    """
+    推定に使った和のキャッシュ（モデルの設定・版ごとに1つの .npz）
+
+    版はデータの最後の月。1つのファイルに系列コードごとの和をまとめて持ち、同じ版で
+    別の系列の組を推定したときは既存の系列に追加する（読み書きは呼び出しごとに1回ずつ）。
+    """
+
+    def __init__(self, directory=None):
+        self.directory = CACHE_DIR / 'forecast' if directory is None else directory
+
+    def key(self, order, log, difference):
+        text = json.dumps([CACHE_FORMAT, order, log, difference])
+        return hashlib.sha1(text.encode('utf-8')).hexdigest()[:12]
+
+    def path(self, key, vintage):
+        return self.directory / f'{key}.{vintage}.npz'
+
+    def vintages(self, key):
+        """保存されている版（'2025-09' の形式、古い順）"""
+        return sorted(p.name[len(key) + 1:-len('.npz')] for p in self.directory.glob(f'{key}.*.npz'))
+
+    def _read(self, path):
+        with np.load(path) as data:
+            return {name: data[name] for name in data.files}
+
+    def load(self, key, vintage):
+        """vintage 以前で最新の版の {系列コード: 和の辞書}（なければ空）"""
+        earlier = [v for v in self.vintages(key) if v <= vintage]
+        if not earlier:
+            return {}
+        data = self._read(self.path(key, earlier[-1]))
+        return {str(code): {name: part[i] for name, part in data.items()} for i, code in enumerate(data['code'])}
+
+    def save(self, key, vintage, entries):
+        """{系列コード: 和の辞書} を同じ版のファイルに書き足す"""
+        path = self.path(key, vintage)
+        if path.exists():
+            entries = {**self.load(key, vintage), **entries}
+        self.directory.mkdir(parents=True, exist_ok=True)
+        codes = sorted(entries)
+        arrays = {name: np.stack([entries[code][name] for code in codes])
+                  for name in next(iter(entries.values())) if name != 'code'}
+        np.savez(path, code=np.array(codes), **arrays)
+
+
+def fit(values, ordinals, codes=None, order=ORDER, log=True, difference=True, cache=None):
+    """
+    [時点 × 系列] の月次系列に AR(order) を一括で当てはめる
+
+    Parameters
+    ----------
+    values : 月次の値 [T × N]（1次元なら1系列として扱う）。系列ごとの先頭・末尾・途中の欠損は可
+    ordinals : 各行の月の序数（欠けのない連続した月）
+    codes : 各列の系列コード。指定したときだけキャッシュを使う
+    order : 自己回帰の次数（0 ならドリフト付きランダムウォーク）
+    log, difference : 対数を取るか・前月差を取るか（既定は対数の前月差）
+    cache : ForecastCache（省略時は既定の置き場所）
+
+    Returns
+    -------
+    Fit
+    """
+    raw = _as_columns(values)
+    months = _months(ordinals)
+    _, y = _transform(raw, log, difference)
+    n = raw.shape[1]
+    last = _last_valid(raw)
+
+    since = np.zeros(n, dtype=np.int64)
+    base = [np.zeros((n, order + 1, order + 1)), np.zeros((n, order + 1)), np.zeros(n), np.zeros(n, dtype=np.int64)]
+    status = np.full(n, FITTED, dtype=object)
+    if codes is not None:
+        cache = ForecastCache() if cache is None else cache
+        key = cache.key(order, log, difference)
+        vintage = periods.format(months[-1], 'M')
+        stored = cache.load(key, vintage)
+        for k, code in enumerate(codes):
+            entry = stored.get(code)
+            if last[k] < 0 or entry is None or int(entry['start']) != months[0]:
+                continue
+            end = int(entry['end'] - months[0])
+            # 前の版までの値が変わっていなければ、その後の行の分だけを足す
+            if end > last[k] or _digest(raw[:end + 1, k]) != str(entry['digest']):
+                continue
+            since[k] = end + 1
+            for part, name in zip(base, ('xtx', 'xty', 'yy', 'nobs')):
+                part[k] = entry[name]
+            status[k] = CACHED if end == last[k] else UPDATED
+
+    moments = [part + new for part, new in zip(base, _moments(y, order, since))]
+    coef, sigma2 = _solve(*moments, order)
+
+    # 新しい版のファイルには、推定し直さなかった系列の和も入れておく
+    if codes is not None and (status != CACHED).any():
+        cache.save(key, vintage, {
+            codes[k]: {'start': months[0], 'end': months[last[k]], 'digest': _digest(raw[:last[k] + 1, k]),
+                       'xtx': moments[0][k], 'xty': moments[1][k], 'yy': moments[2][k], 'nobs': moments[3][k]}
+            for k in np.flatnonzero(last >= 0)})
+    return Fit(coef, sigma2, moments[3], status)
+
+
+def predict(values, ordinals, fitted, horizon=HORIZON, level=LEVEL, log=True, difference=True):
+    """
+    fit の結果から horizon か月先までを一括で予測する
+
+    values・ordinals・log・difference は fit に渡したものと同じにする。
+
+    Returns
+    -------
+    Forecast（最後の行の翌月から horizon か月。系列ごとの最後の観測からの予測をそろえたもの）
+    """
+    squeeze = np.ndim(values) == 1
+    raw = _as_columns(values)
+    months = _months(ordinals)
+    level_values, y = _transform(raw, log, difference)
+    n = raw.shape[1]
+    order = fitted.coef.shape[1] - 1
+    last = _last_valid(raw)
+    gap = np.where(last >= 0, len(raw) - 1 - last, 0)
+    steps = horizon + (int(gap.max()) if n else 0)
+    columns = np.arange(n)
+
+    # 系列ごとの最後の観測から order 期分の y（新しい順）
+    rows = last[:, None] - np.arange(order)
+    recent = np.where(rows >= 0, y[np.maximum(rows, 0), columns[:, None]], np.nan)
+    const, phi = fitted.coef[:, 0], fitted.coef[:, 1:]
+    path = np.empty((steps, n))
+    psi = np.zeros((steps, n))
+    psi[0] = 1.0
+    for s in range(steps):
+        path[s] = const + (phi * recent).sum(axis=1)
+        if order:
+            recent = np.column_stack([path[s], recent[:, :-1]])
+        if s:
+            m = min(s, order)
+            psi[s] = (phi[:, :m] * psi[s - 1::-1][:m].T).sum(axis=1)
+
+    if difference:
+        center = np.where(last >= 0, level_values[np.maximum(last, 0), columns], np.nan) + np.cumsum(path, axis=0)
+        weights = np.cumsum(psi, axis=0)
+    else:
+        center, weights = path, psi
+    se = np.sqrt(fitted.sigma2 * np.cumsum(weights * weights, axis=0))
+
+    pick = gap + np.arange(horizon)[:, None]
+    center = np.take_along_axis(center, pick, axis=0)
+    se = np.take_along_axis(se, pick, axis=0)
+    z = NormalDist().inv_cdf(0.5 + level / 2)
+    bands = [center, center - z * se, center + z * se]
+    if log:
+        bands = [np.exp(b) for b in bands]
+    if squeeze:
+        bands = [b[:, 0] for b in bands]
+    return Forecast(months[-1] + 1 + np.arange(horizon, dtype=months.dtype), *bands)
+
+
+def forecast(values, ordinals, codes=None, horizon=HORIZON, order=ORDER, level=LEVEL,
+             log=True, difference=True, cache=None):
+    """fit と predict をまとめて行う（引数は両者と同じ）"""
+    fitted = fit(values, ordinals, codes, order, log, difference, cache)
+    return predict(values, ordinals, fitted, horizon, level, log, difference)
+
+
+def forecast_frame(df, columns, codes=None, horizon=HORIZON, order=ORDER, level=LEVEL, cache=None):
+    """
+    DataFrame の月次系列を一括で予測する（対数の前月差の AR）
+
+    Parameters
+    ----------
+    df : 'date' 列（月の序数）またはインデックス（PeriodIndex）で期がわかる、連続した月次の DataFrame
+    columns : 予測する列名のリスト
+    codes : 各列の系列コード（指定したときだけ推定に使った和をキャッシュする）
+
+    Returns
+    -------
+    'date'（予測する月の序数）と、列ごとの予測値・<列>_lower・<列>_upper の DataFrame
+    """
+    import pandas as pd
+
+    columns = list(columns)
+    months = df['date'] if 'date' in df else df.index
+    result = forecast(df[columns].to_numpy(dtype=float), months, codes, horizon, order, level, cache=cache)
+    frame = {'date': result.ordinals}
+    for i, column in enumerate(columns):
+        frame[column] = result.mean[:, i]
+        frame[f'{column}_lower'] = result.lower[:, i]
+        frame[f'{column}_upper'] = result.upper[:, i]
+    return pd.DataFrame(frame)
+
+
+def load_frame(codes):
+    """系列コード（カタログ・派生系列）の月次の値を列に並べた DataFrame（PeriodIndex）"""
+    import pandas as pd
+
+    from common.catalog import SERIES, get_series
+    from common.derived import Graph
+
+    graph = Graph()
+    series = {code: get_series(code) if code in SERIES else graph.get(code) for code in codes}
+    frame = pd.concat(series, axis=1).sort_index()
+    return frame.reindex(pd.period_range(frame.index[0], frame.index[-1], freq='M'))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m common.forecast', description='月次系列の AR モデルによる短期予測')
+    parser.add_argument('codes', nargs='*', help='系列コード（省略時は月次の物価指数と交易条件）')
+    parser.add_argument('--horizon', type=int, default=HORIZON, help='予測する月数')
+    parser.add_argument('--order', type=int, default=ORDER, help='自己回帰の次数')
+    parser.add_argument('--level', type=float, default=LEVEL, help='予測区間の水準')
+    parser.add_argument('--no-cache', action='store_true', help='推定に使った和のキャッシュを使わない')
+    args = parser.parse_args(argv)
+
+    codes = args.codes or default_codes()
+    frame = load_frame(codes)
+    values, months = frame.to_numpy(dtype=float), periods.from_index(frame.index)
+
+    start = time.perf_counter()
+    fitted = fit(values, months, None if args.no_cache else codes, args.order)
+    result = predict(values, months, fitted, args.horizon, args.level)
+    elapsed = time.perf_counter() - start
+
+    counts = ', '.join(f'{k}={v}' for k, v in sorted(Counter(fitted.status).items()))
+    print(f'AR({args.order}) 対数の前月差 {len(codes)}系列 ({counts}, {elapsed * 1000:.1f}ms)')
+    first, final = periods.format(result.ordinals[[0, -1]], 'M', '%Y/%m')
+    print(f'{"系列":24s} {"最新":>8s} {first:>8s} {final:>8s}  {args.level:.0%}区間（{final}）')
+    for k, code in enumerate(codes):
+        latest = frame[code].dropna()
+        print(f'{code:24s} {latest.iloc[-1]:8.2f} {result.mean[0, k]:8.2f} {result.mean[-1, k]:8.2f}'
+              f'  {result.lower[-1, k]:.2f} ～ {result.upper[-1, k]:.2f}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
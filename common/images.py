@@ -0,0 +1,195 @@
+"""
+グラフ画像の軽量版の書き出し
+
+300dpi のフルカラー PNG（印刷用のマスター）はそのまま残し、マスターを1回読み込んで
+次の軽量版を各フォルダの compact/ に書き出す。
+
+- <名前>.png        256色パレットの PNG（Markdown のレポート・プレゼン資料への埋め込み用）
+- <名前>.webp       ロスレス WebP（ブラウザ・HTML 用）
+- <名前>_thumb.png  幅 800px のパレット PNG（README のプレビュー用）
+
+複数のマスターはプロセスプールで並列に処理する。内容が変わらないファイルは
+書き込まず（common.output.write_if_changed）、マスターが前回と同じなら処理自体を省略する。
+
+使い方（リポジトリのルートで）:
+    python -m common.images                          # 全フォルダの PNG を処理
+    python -m common.images 企業物価指数/*.png --workers 4
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from common import CACHE_DIR, REPO_ROOT
+from common.output import content_hash, write_if_changed
+
+COMPACT_DIR = 'compact'
+
+# パレット化の色数とサムネイルの最大幅（px）
+PALETTE_COLORS = 256
+THUMBNAIL_WIDTH = 800
+
+MANIFEST_PATH = CACHE_DIR / 'images' / 'manifest.json'
+
+# マスターの検索から除くフォルダ
+EXCLUDED_DIRS = {'common', 'benchmarks'}
+
+
+def _flatten(image):
+    """透過を白背景に合成した RGB 画像"""
+    from PIL import Image
+
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def _palette(image):
+    from PIL import Image
+
+    return image.quantize(colors=PALETTE_COLORS, method=Image.Quantize.FASTOCTREE,
+                          dither=Image.Dither.NONE)
+
+
+def _encode(image, **kwargs):
+    buffer = io.BytesIO()
+    image.save(buffer, **kwargs)
+    return buffer.getvalue()
+
+
+def variant_paths(master):
+    """マスターに対応する軽量版のパス {'palette', 'webp', 'thumbnail'}"""
+    master = Path(master)
+    directory = master.parent / COMPACT_DIR
+    return {
+        'palette': directory / f'{master.stem}.png',
+        'webp': directory / f'{master.stem}.webp',
+        'thumbnail': directory / f'{master.stem}_thumb.png',
+    }
+
+
+def export_variants(master):
+    """
+    1つのマスター PNG から軽量版を書き出す
+
+    Returns
+    -------
+    {'master': パス, 'sizes': {種類: バイト数}, 'written': [書き込んだ種類]}
+    """
+    from PIL import Image
+
+    master = Path(master)
+    with Image.open(master) as source:
+        image = _flatten(source)
+
+    thumbnail = image.copy()
+    thumbnail.thumbnail((THUMBNAIL_WIDTH, image.height), Image.Resampling.LANCZOS)
+    encoded = {
+        'palette': _encode(_palette(image), format='PNG', optimize=True),
+        'webp': _encode(image, format='WEBP', lossless=True, method=4),
+        'thumbnail': _encode(_palette(thumbnail), format='PNG', optimize=True),
+    }
+
+    written = []
+    for kind, path in variant_paths(master).items():
+        if write_if_changed(path, encoded[kind]) == 'written':
+            written.append(kind)
+    return {
+        'master': str(master),
+        'sizes': {'master': master.stat().st_size, **{k: len(v) for k, v in encoded.items()}},
+        'written': written,
+    }
+
+
+def discover_masters(root=REPO_ROOT):
+    """各フォルダ直下の PNG（compact/ の軽量版は含まない）"""
+    masters = []
+    for folder in sorted(p for p in root.iterdir() if p.is_dir()):
+        if folder.name in EXCLUDED_DIRS or folder.name.startswith('.'):
+            continue
+        masters += sorted(folder.glob('*.png'))
+    return masters
+
+
+def _relative(path):
+    try:
+        return Path(os.path.abspath(path)).relative_to(REPO_ROOT).as_posix()
+    except ValueError:
+        return str(path)
+
+
+def export_all(masters, workers=None, force=False):
+    """
+    複数のマスターをプロセスプールで処理する
+
+    マスターの内容が前回の処理時と同じで、軽量版がすべて存在するものは省略する。
+    処理したマスターの export_variants() の結果のリストを返す。
+    """
+    manifest = json.loads(MANIFEST_PATH.read_text(encoding='utf-8')) if MANIFEST_PATH.exists() else {}
+    hashes = {}
+    pending = []
+    for master in masters:
+        master = Path(master)
+        key = _relative(master)
+        hashes[key] = content_hash(master.read_bytes())
+        outputs_exist = all(p.exists() for p in variant_paths(master).values())
+        if force or manifest.get(key) != hashes[key] or not outputs_exist:
+            pending.append(master)
+
+    results = []
+    if pending:
+        if workers == 1 or len(pending) == 1:
+            results = [export_variants(m) for m in pending]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(export_variants, pending))
+
+    for result in results:
+        key = _relative(result['master'])
+        manifest[key] = hashes[key]
+    MANIFEST_PATH.parent.mkdir(parents=True, exist_ok=True)
+    MANIFEST_PATH.write_text(json.dumps(manifest, indent=1, ensure_ascii=False), encoding='utf-8')
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m common.images',
+                                     description='グラフ画像の軽量版（パレット PNG・WebP・サムネイル）の書き出し')
+    parser.add_argument('masters', nargs='*', type=Path, help='マスター PNG（省略時は全フォルダ）')
+    parser.add_argument('--workers', type=int, default=None, help='並列数（既定は CPU 数）')
+    parser.add_argument('--force', action='store_true', help='マスターが前回と同じでも処理する')
+    args = parser.parse_args(argv)
+
+    masters = args.masters or discover_masters()
+    results = export_all(masters, workers=args.workers, force=args.force)
+
+    totals = {}
+    for result in results:
+        sizes = result['sizes']
+        for kind, size in sizes.items():
+            totals[kind] = totals.get(kind, 0) + size
+        print(f"{_relative(result['master'])}: {sizes['master'] / 1024:.0f}KB → "
+              f"palette {sizes['palette'] / 1024:.0f}KB, webp {sizes['webp'] / 1024:.0f}KB, "
+              f"thumb {sizes['thumbnail'] / 1024:.0f}KB"
+              + ('' if result['written'] else ' (unchanged)'))
+    skipped = len(masters) - len(results)
+    if totals:
+        master_total = totals['master']
+        print(f"\n合計: master {master_total / 1024 / 1024:.1f}MB → "
+              f"palette {totals['palette'] / 1024 / 1024:.1f}MB "
+              f"({totals['palette'] / master_total * 100:.0f}%), "
+              f"webp {totals['webp'] / 1024 / 1024:.1f}MB ({totals['webp'] / master_total * 100:.0f}%)")
+    if skipped:
+        print(f'マスターが前回と同じため省略: {skipped}件')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
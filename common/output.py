@@ -0,0 +1,497 @@
+"""
+出力ファイル（PNG・CSV・Parquet・HTML）の書き込み
+
+- 内容が既存のファイルと同じなら書き込まない（更新日時も Git の差分も変わらない）
+- 図は決定的に保存する（PNG の Software、PDF・SVG の作成日時などのメタデータを除く）
+- render_figure は、入力データ・描画の設定・描画関数のソース（関数が使うリポジトリ内の
+  モジュールのソースとスクリプトの定数を含む）から計算した描画キーが前回と同じで、
+  出力ファイルも前回のままなら描画そのものを省略する
+
+- save_table は CSV と同じ名前の Parquet（型付き・zstd 圧縮・単位などのメタデータ付き）も
+  書き出し、リポジトリの tables.json（表の一覧）に登録する
+
+前回の描画キーと内容のハッシュは .cache/outputs/manifest.json に保存する。
+matplotlib・numpy・pandas・pyarrow は図や DataFrame を扱う関数の中で読み込むため、
+write_text だけを使うスクリプト（標準ライブラリのみのもの）にも使える。
+pyarrow がなければ save_table は CSV だけを書き出す。
+
+    from common.output import render_figure, save_csv, save_figure, save_table
+
+    save_figure(fig, 'terms_of_trade_yoy.png', dpi=300, bbox_inches='tight')
+    save_csv(summary_df, 'summary_statistics.csv', index=False)
+    save_table(ratio_df, 'government_deficit_gdp_ratio.csv', period_columns={'年度': 'FY'}, index=False)
+    render_figure('price_spread.png', plot_spread, data_df, dpi=300, bbox_inches='tight')
+"""
+
+import hashlib
+import inspect
+import io
+import json
+import os
+import stat
+import tempfile
+import warnings
+from pathlib import Path
+
+from common import CACHE_DIR, REPO_ROOT
+from common.trace import span
+
+MANIFEST_PATH = CACHE_DIR / 'outputs' / 'manifest.json'
+
+# save_table で書き出した Parquet の一覧（リポジトリに含める）
+TABLES_PATH = REPO_ROOT / 'tables.json'
+
+# Parquet の圧縮方式
+PARQUET_COMPRESSION = 'zstd'
+
+# 保存形式ごとに除くメタデータ（None を渡すと matplotlib はそのキーを書き込まない）
+DETERMINISTIC_METADATA = {
+    'png': {'Software': None},
+    'pdf': {'Creator': None, 'Producer': None, 'CreationDate': None},
+    'svg': {'Creator': None, 'Date': None},
+}
+
+# 書き込み結果
+WRITTEN = 'written'
+UNCHANGED = 'unchanged'
+SKIPPED = 'skipped'
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+# 新しく作るファイルの権限（初回に umask から求める）
+_file_mode = None
+
+
+def _new_file_mode():
+    """新しく作るファイルの権限（open() で作ったときと同じく 0o666 から umask を除いたもの）"""
+    global _file_mode
+    if _file_mode is None:
+        umask = os.umask(0)
+        os.umask(umask)
+        _file_mode = 0o666 & ~umask
+    return _file_mode
+
+
+def write_if_changed(path, data):
+    """
+    bytes をファイルに書き込む（既存のファイルと同じ内容なら書き込まない）
+
+    書き込みは一時ファイルへの書き出しと置き換えで行う（途中で失敗しても壊れたファイルを残さない）。
+    置き換えたファイルの権限は既存のファイルと同じ（新しいファイルなら umask に従う）にする。
+
+    Returns
+    -------
+    WRITTEN または UNCHANGED
+    """
+    path = Path(path)
+    with span('save', 'write', path):
+        if path.exists() and path.stat().st_size == len(data) and path.read_bytes() == data:
+            return UNCHANGED
+        path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            mode = stat.S_IMODE(path.stat().st_mode)
+        except FileNotFoundError:
+            mode = _new_file_mode()
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.chmod(tmp, mode)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        return WRITTEN
+
+
+def write_text(path, text, encoding='utf-8'):
+    """テキストファイル（HTML など）を内容が変わったときだけ書き込む"""
+    return write_if_changed(path, text.encode(encoding))
+
+
+def save_csv(df, path, encoding='utf-8', **kwargs):
+    """DataFrame.to_csv と同じ引数で CSV を作り、内容が変わったときだけ書き込む"""
+    with span('save', 'to_csv', path):
+        return write_if_changed(path, df.to_csv(**kwargs).encode(encoding))
+
+
+# ---- 列指向の表（Parquet）
+
+def _period_dates(values, freq):
+    """期の列（文字列・年の整数・日付）を期首の日付（datetime64[D]。Parquet では date32）にする"""
+    import pandas as pd
+
+    from common import periods
+
+    if pd.api.types.is_integer_dtype(values):
+        ordinals = periods.parse(values, freq)
+    else:
+        ordinals = periods.as_ordinals(values, freq)
+    return periods.to_datetime64(ordinals, freq).astype('datetime64[D]')
+
+
+def _encode_metadata(metadata):
+    return {str(k): str(v) for k, v in (metadata or {}).items() if v is not None}
+
+
+def parquet_bytes(df, index=False, metadata=None, columns=None, period_columns=None,
+                  compression=PARQUET_COMPRESSION):
+    """
+    DataFrame を Parquet の bytes にする
+
+    Parameters
+    ----------
+    index : True なら DataFrame のインデックスも列として書き出す
+    metadata : 表全体のメタデータ {キー: 値}（title・source など）
+    columns : 列ごとのメタデータ {列名: {'unit': ..., 'description': ..., 'series': ...}}
+    period_columns : 期の列 {列名: 頻度（'M'・'Q'・'Y'・'FY'）}。'2023/11'・'1980年度' などの文字列や
+        年の整数を期首の日付（date32）にし、列のメタデータに freq を付ける
+    compression : Parquet の圧縮方式
+
+    Returns
+    -------
+    (bytes, pyarrow.Schema)
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    period_columns = period_columns or {}
+    frame = df
+    if period_columns:
+        frame = df.copy()
+        for name, freq in period_columns.items():
+            frame[name] = _period_dates(df[name], freq)
+    table = pa.Table.from_pandas(frame, preserve_index=bool(index))
+
+    fields = []
+    for field in table.schema:
+        extra = dict((columns or {}).get(field.name, {}))
+        if field.name in period_columns:
+            extra['freq'] = period_columns[field.name]
+            field = pa.field(field.name, pa.date32(), nullable=True)
+        extra = _encode_metadata(extra)
+        fields.append(field.with_metadata(extra) if extra else field)
+    schema = pa.schema(fields, metadata={**table.schema.metadata, **_encode_metadata(metadata)})
+    table = pa.Table.from_pandas(frame, schema=schema, preserve_index=bool(index))
+
+    sink = pa.BufferOutputStream()
+    pq.write_table(table, sink, compression=compression)
+    return sink.getvalue().to_pybytes(), table.schema
+
+
+def _register_table(path, csv_path, schema, rows, data):
+    """tables.json に表を登録する（リポジトリの外のファイルは登録しない）"""
+    key = _manifest_key(path)
+    if Path(key).is_absolute():
+        return
+    entry = {
+        'csv': _manifest_key(csv_path),
+        'rows': rows,
+        'compression': PARQUET_COMPRESSION,
+        'sha256': content_hash(data),
+        'metadata': {k.decode(): v.decode() for k, v in (schema.metadata or {}).items() if k != b'pandas'},
+        'columns': [{'name': field.name, 'type': str(field.type),
+                     **{k.decode(): v.decode() for k, v in (field.metadata or {}).items()}}
+                    for field in schema],
+    }
+    tables = read_tables()
+    if tables.get(key) == entry:
+        return
+    tables[key] = entry
+    text = json.dumps(dict(sorted(tables.items())), indent=1, ensure_ascii=False) + '\n'
+    write_if_changed(TABLES_PATH, text.encode('utf-8'))
+
+
+_warned_pyarrow = False
+
+
+def save_table(df, path, encoding='utf-8', metadata=None, columns=None, period_columns=None,
+               **kwargs):
+    """
+    CSV（save_csv と同じ）と、同じ名前の Parquet（拡張子 .parquet）を書き出す
+
+    metadata・columns・period_columns は parquet_bytes と同じ。kwargs は DataFrame.to_csv に渡し、
+    index は Parquet にも使う（to_csv と同じく省略時は True）。Parquet は tables.json に登録する。
+    pyarrow がなければ警告を1回出して CSV だけを書き出す。
+
+    Returns
+    -------
+    CSV の書き込み結果（WRITTEN または UNCHANGED）
+    """
+    global _warned_pyarrow
+
+    status = save_csv(df, path, encoding=encoding, **kwargs)
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        if not _warned_pyarrow:
+            warnings.warn('pyarrow がないため Parquet を書き出しません（CSV のみ）', stacklevel=2)
+            _warned_pyarrow = True
+        return status
+    parquet_path = Path(path).with_suffix('.parquet')
+    data, schema = parquet_bytes(df, kwargs.get('index', True), metadata, columns, period_columns)
+    write_if_changed(parquet_path, data)
+    _register_table(parquet_path, path, schema, len(df), data)
+    return status
+
+
+def read_tables():
+    """tables.json（{Parquet のパス（リポジトリのルートからの相対）: 行数・列の型と単位・メタデータ}）"""
+    if TABLES_PATH.exists():
+        return json.loads(TABLES_PATH.read_text(encoding='utf-8'))
+    return {}
+
+
+def load_table(name, columns=None):
+    """
+    tables.json に登録した表をメモリマップで読む（pyarrow.Table。DataFrame は .to_pandas()）
+
+    name は Parquet または元の CSV の、リポジトリのルートからの相対パス。
+    """
+    import pyarrow.parquet as pq
+
+    tables = read_tables()
+    if name not in tables:
+        matches = [key for key, entry in tables.items() if entry['csv'] == name]
+        if not matches:
+            raise KeyError(f'tables.json に登録されていない表: {name}')
+        name = matches[0]
+    return pq.read_table(REPO_ROOT / name, columns=columns, memory_map=True)
+
+
+def figure_bytes(fig, format='png', **kwargs):
+    """図を決定的な内容（メタデータなし）の bytes として書き出す"""
+    import matplotlib
+
+    metadata = dict(DETERMINISTIC_METADATA.get(format, {}))
+    metadata.update(kwargs.pop('metadata', {}))
+    buffer = io.BytesIO()
+    with matplotlib.rc_context({'svg.hashsalt': 'static'}):
+        fig.savefig(buffer, format=format, metadata=metadata, **kwargs)
+    return buffer.getvalue()
+
+
+def save_figure(fig, path, close=True, **kwargs):
+    """
+    図を保存する（内容が変わったときだけ書き込む）
+
+    kwargs は Figure.savefig に渡す（dpi, bbox_inches など）。close=True なら保存後に図を閉じる。
+    """
+    path = Path(path)
+    format = kwargs.pop('format', path.suffix.lstrip('.').lower() or 'png')
+    with span('save', 'savefig', path, ambient='transform'):
+        data = figure_bytes(fig, format=format, **kwargs)
+        if close:
+            from common.figures import release
+
+            release(fig)
+        status = write_if_changed(path, data)
+    _update_manifest(path, content=content_hash(data))
+    return status
+
+
+# ---- 描画の省略
+
+def _fingerprint(obj, digest):
+    """入力データの内容をハッシュに加える（DataFrame・Series・ndarray・基本型）"""
+    import numpy as np
+    import pandas as pd
+
+    if isinstance(obj, pd.DataFrame):
+        digest.update(b'DataFrame')
+        digest.update(repr((list(obj.columns), [str(t) for t in obj.dtypes])).encode())
+        digest.update(pd.util.hash_pandas_object(obj, index=True).to_numpy().tobytes())
+    elif isinstance(obj, (pd.Series, pd.Index)):
+        digest.update(b'Series')
+        digest.update(repr((obj.name, str(obj.dtype))).encode())
+        digest.update(pd.util.hash_pandas_object(obj, index=isinstance(obj, pd.Series)).to_numpy().tobytes())
+    elif isinstance(obj, np.ndarray):
+        digest.update(b'ndarray')
+        digest.update(repr((obj.dtype.str, obj.shape)).encode())
+        digest.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, dict):
+        digest.update(b'dict')
+        for key in sorted(obj, key=repr):
+            _fingerprint(key, digest)
+            _fingerprint(obj[key], digest)
+    elif isinstance(obj, (list, tuple)):
+        digest.update(type(obj).__name__.encode())
+        for item in obj:
+            _fingerprint(item, digest)
+    else:
+        digest.update(repr(obj).encode())
+
+
+# 描画キーに値をそのまま含める大域変数の型（定数・ラベルなど）
+_CONSTANT_TYPES = (int, float, str, bytes, bool, tuple, frozenset, type(None))
+
+
+def _code_names(code):
+    """関数（内側の関数・内包表記を含む）が参照する名前"""
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            names |= _code_names(const)
+    return names
+
+
+def _repo_module(obj):
+    """obj（モジュール・関数・クラス・インスタンス）を定義したリポジトリ内のモジュール（なければ None）"""
+    import sys
+
+    if inspect.ismodule(obj):
+        module = obj
+    else:
+        name = getattr(obj, '__module__', None) if (inspect.isroutine(obj) or inspect.isclass(obj)) else None
+        module = sys.modules.get(name or type(obj).__module__)
+    path = getattr(module, '__file__', None)
+    if module is None or path is None or module.__name__ == '__main__':
+        return None
+    return module if Path(path).resolve().is_relative_to(REPO_ROOT) else None
+
+
+def _module_sources(module, digest, seen):
+    """リポジトリ内のモジュールのソースと、そのモジュールが使うリポジトリ内のモジュールのソース"""
+    if module.__name__ in seen:
+        return
+    seen.add(module.__name__)
+    digest.update(module.__name__.encode())
+    digest.update(Path(module.__file__).read_bytes())
+    for value in list(vars(module).values()):
+        dependency = _repo_module(value)
+        if dependency is not None:
+            _module_sources(dependency, digest, seen)
+
+
+def _render_sources(func, digest, seen):
+    """
+    描画関数のソースと、それが参照する大域変数
+
+    同じスクリプトの関数はソースを（さらにその参照先も）、リポジトリ内のモジュールの
+    関数・定数・モジュールはそのモジュールのソースを、スクリプトの定数は値を含める
+    （common.forecast の ORDER や periods.to_datetime64 を変えても描画し直す）。
+    """
+    if id(func) in seen:
+        return
+    seen.add(id(func))
+    try:
+        digest.update(inspect.getsource(func).encode())
+    except (OSError, TypeError):
+        digest.update(getattr(func, '__qualname__', repr(func)).encode())
+    code = getattr(func, '__code__', None)
+    if code is None:
+        return
+    namespace = func.__globals__
+    for name in sorted(_code_names(code)):
+        if name not in namespace:
+            continue
+        value = namespace[name]
+        module = _repo_module(value)
+        if module is not None:
+            _module_sources(module, digest, seen)
+        elif inspect.isfunction(value) and value.__module__ == func.__module__:
+            _render_sources(value, digest, seen)
+        elif isinstance(value, _CONSTANT_TYPES):
+            digest.update(f'{name}={value!r}'.encode())
+
+
+def render_key(render, inputs, spec=None, savefig_kwargs=None):
+    """
+    描画キー: 入力データ・spec・保存設定・matplotlib の設定と、描画関数のソース・参照する
+    リポジトリ内のモジュールのソース・スクリプトの定数のハッシュ
+    """
+    import matplotlib
+
+    digest = hashlib.sha256()
+    _fingerprint(list(inputs), digest)
+    _fingerprint(spec, digest)
+    _fingerprint(savefig_kwargs or {}, digest)
+    _render_sources(render, digest, set())
+    digest.update(matplotlib.__version__.encode())
+    digest.update(repr(sorted((k, repr(v)) for k, v in matplotlib.rcParams.items())).encode())
+    return digest.hexdigest()
+
+
+def _manifest_key(path):
+    path = Path(os.path.abspath(path))
+    try:
+        return path.relative_to(REPO_ROOT).as_posix()
+    except ValueError:
+        return path.as_posix()
+
+
+def _load_manifest():
+    if MANIFEST_PATH.exists():
+        return json.loads(MANIFEST_PATH.read_text(encoding='utf-8'))
+    return {}
+
+
+def _update_manifest(path, content, key=None):
+    manifest = _load_manifest()
+    manifest[_manifest_key(path)] = {'render_key': key, 'content': content}
+    MANIFEST_PATH.parent.mkdir(parents=True, exist_ok=True)
+    MANIFEST_PATH.write_text(json.dumps(manifest, indent=1, ensure_ascii=False), encoding='utf-8')
+
+
+def render_to_path(path, render, inputs, spec=None, force=False, **kwargs):
+    """
+    render_figure の本体（manifest は読むだけで更新しない）
+
+    並列に描画するワーカーが使い、結果は親プロセスが record_renders でまとめて記録する。
+
+    Returns
+    -------
+    (status, content, key)。SKIPPED のとき content は None
+    """
+    from common.figures import release
+
+    path = Path(path)
+    key = render_key(render, inputs, spec, kwargs)
+    entry = _load_manifest().get(_manifest_key(path))
+    if (not force and entry and entry.get('render_key') == key and path.exists()
+            and content_hash(path.read_bytes()) == entry.get('content')):
+        return SKIPPED, None, key
+
+    fig = render(*inputs)
+    format = kwargs.pop('format', path.suffix.lstrip('.').lower() or 'png')
+    with span('save', 'savefig', path, ambient='transform'):
+        data = figure_bytes(fig, format=format, **kwargs)
+        release(fig)
+        status = write_if_changed(path, data)
+    return status, content_hash(data), key
+
+
+def record_renders(results):
+    """render_to_path の結果 [(path, content, key), ...] を manifest にまとめて記録する"""
+    manifest = _load_manifest()
+    for path, content, key in results:
+        if content is not None:
+            manifest[_manifest_key(path)] = {'render_key': key, 'content': content}
+    MANIFEST_PATH.parent.mkdir(parents=True, exist_ok=True)
+    MANIFEST_PATH.write_text(json.dumps(manifest, indent=1, ensure_ascii=False), encoding='utf-8')
+
+
+def render_figure(path, render, *inputs, spec=None, force=False, **kwargs):
+    """
+    render(*inputs) で図を作って保存する（前回と同じ描画なら render を呼ばない）
+
+    Parameters
+    ----------
+    path : 出力ファイル
+    render : 入力データを受け取って Figure を返す関数
+    inputs : render に渡す入力データ（描画キーの計算にも使う）
+    spec : 描画キーに含める追加の設定（ラベル・期間など、inputs 以外で結果を左右するもの）
+    force : True なら常に描画する
+    kwargs : Figure.savefig に渡す引数
+
+    Returns
+    -------
+    SKIPPED（描画を省略）・UNCHANGED（描画したが内容は同じ）・WRITTEN のいずれか
+    """
+    status, content, key = render_to_path(path, render, inputs, spec, force, **kwargs)
+    if status != SKIPPED:
+        _update_manifest(path, content=content, key=key)
+    return status
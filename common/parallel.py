@@ -0,0 +1,329 @@
+"""
+共有メモリを使ったグラフの並列描画
+
+系列の行列（期 × 系列の float64）と期のインデックスを multiprocessing.shared_memory の
+1つのブロックに1回だけ置き、ワーカーはそれを複製せずに参照する。描画ジョブが
+ワーカーに渡すのは系列名と行の範囲（Ref）だけで、DataFrame を pickle しない。
+ワーカーの数を増やしてもデータのメモリは1つ分のままになる。
+
+    from common.parallel import RenderJob, SeriesStore, render_parallel
+
+    with SeriesStore.create(data_df.set_index('date')[columns]) as store:
+        jobs = [RenderJob('price_spread.png', plot_spread,
+                          [store.ref(['import_index', 'export_index'])],
+                          savefig={'dpi': 300, 'bbox_inches': 'tight'})]
+        statuses = render_parallel(jobs, store, workers=4)
+
+系列は列ごとに連続して置く（列優先）。1系列の Series と、連続した列の DataFrame は
+共有メモリのビューのまま渡す（離れた列を集めた DataFrame は選んだ列だけ複製する）。
+ワーカーに渡した配列は読み取り専用。描画の省略・書き込みは common.output と同じで、
+manifest は親プロセスがまとめて更新する。描画関数はモジュールの関数（pickle できるもの）にする。
+
+ベンチマーク（リポジトリのルートで）:
+    python -m common.parallel --series 1000 --figures 120 --workers 4
+"""
+
+import argparse
+import os
+import pickle
+import sys
+import tempfile
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from common.output import SKIPPED, record_renders, render_to_path
+
+# 共有メモリのブロックを開くための情報（ワーカーに1回だけ渡す）
+#   index_kind : 'datetime'・'period'・'int'
+#   index_spec : PeriodIndex の頻度・DatetimeIndex の dtype
+StoreHandle = namedtuple('StoreHandle', 'shm_name n_rows columns index_kind index_spec index_name')
+
+# 描画の入力: names が文字列なら Series、リストなら DataFrame。rows は行位置の slice
+Ref = namedtuple('Ref', 'names rows', defaults=(None,))
+
+# 描画ジョブ: render(*inputs) の Figure を path に保存する（savefig は Figure.savefig の引数）
+RenderJob = namedtuple('RenderJob', 'path render inputs spec savefig force', defaults=(None, None, False))
+
+
+def _index_parts(index):
+    if isinstance(index, pd.PeriodIndex):
+        return 'period', index.freqstr, index.asi8
+    if isinstance(index, pd.DatetimeIndex):
+        return 'datetime', str(index.dtype), index.asi8
+    return 'int', None, np.asarray(index, dtype=np.int64)
+
+
+def _build_index(kind, spec, ordinals, name):
+    if kind == 'period':
+        return pd.PeriodIndex.from_ordinals(ordinals, freq=spec, name=name)
+    if kind == 'datetime':
+        return pd.DatetimeIndex(ordinals.view(spec), name=name)
+    return pd.Index(ordinals, name=name)
+
+
+class SeriesStore:
+    """
+    共有メモリ上の系列の行列
+
+    create() で作った側（親プロセス）がブロックを所有し、close() で解放する。
+    attach() はワーカー側で同じブロックを開く（解放はしない）。
+    """
+
+    def __init__(self, shm, handle, owner):
+        self._shm = shm
+        self.handle = handle
+        self.owner = owner
+        n_rows, n_cols = handle.n_rows, len(handle.columns)
+        self._matrix = np.ndarray((n_rows, n_cols), dtype=np.float64, buffer=shm.buf, order='F')
+        ordinals = np.ndarray(n_rows, dtype=np.int64, buffer=shm.buf, offset=n_rows * n_cols * 8)
+        if not owner:
+            self._matrix.flags.writeable = False
+            ordinals.flags.writeable = False
+        self.index = _build_index(handle.index_kind, handle.index_spec, ordinals, handle.index_name)
+        self._positions = {name: i for i, name in enumerate(handle.columns)}
+
+    @classmethod
+    def create(cls, frame):
+        """DataFrame（index: 期、列: 系列）の値を共有メモリに複製する"""
+        kind, spec, ordinals = _index_parts(frame.index)
+        n_rows, n_cols = frame.shape
+        shm = shared_memory.SharedMemory(create=True, size=max(n_rows * (n_cols + 1) * 8, 1))
+        np.ndarray((n_rows, n_cols), dtype=np.float64, buffer=shm.buf,
+                   order='F')[:] = frame.to_numpy(dtype=np.float64)
+        np.ndarray(n_rows, dtype=np.int64, buffer=shm.buf, offset=n_rows * n_cols * 8)[:] = ordinals
+        handle = StoreHandle(shm.name, n_rows, tuple(frame.columns), kind, spec, frame.index.name)
+        return cls(shm, handle, owner=True)
+
+    @classmethod
+    def attach(cls, handle):
+        # ワーカーは親プロセスの resource_tracker を共有するため、登録の解除はしない
+        # （解除すると親の unlink 時に tracker がエラーを出す）
+        return cls(shared_memory.SharedMemory(name=handle.shm_name), handle, owner=False)
+
+    @property
+    def columns(self):
+        return self.handle.columns
+
+    @property
+    def nbytes(self):
+        return self._shm.size
+
+    def ref(self, names, rows=None):
+        return Ref(names if isinstance(names, str) else list(names), rows)
+
+    def rows_between(self, start=None, end=None):
+        """ラベルの範囲（両端を含む）の行位置の slice"""
+        return self.index.slice_indexer(start, end)
+
+    def values(self, name, rows=None):
+        """1系列の値（共有メモリのビュー）"""
+        column = self._matrix[:, self._positions[name]]
+        return column if rows is None else column[rows]
+
+    def series(self, name, rows=None):
+        index = self.index if rows is None else self.index[rows]
+        return pd.Series(self.values(name, rows), index=index, name=name, copy=False)
+
+    def frame(self, names, rows=None):
+        positions = [self._positions[n] for n in names]
+        first = positions[0] if positions else 0
+        if positions == list(range(first, first + len(positions))):
+            block = self._matrix[:, first:first + len(positions)]
+        else:
+            block = self._matrix[:, positions]
+        index = self.index
+        if rows is not None:
+            block, index = block[rows], index[rows]
+        return pd.DataFrame(block, index=index, columns=list(names), copy=False)
+
+    def resolve(self, ref):
+        if isinstance(ref.names, str):
+            return self.series(ref.names, ref.rows)
+        return self.frame(ref.names, ref.rows)
+
+    def close(self):
+        # ビューを先に手放す（残っていると共有メモリを閉じられない）
+        self._matrix = self.index = None
+        self._shm.close()
+        if self.owner:
+            self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ---- ワーカー
+
+_worker_store = None
+
+
+def _init_matplotlib(rc):
+    import matplotlib
+
+    matplotlib.rcParams.update(rc)
+
+
+def _init_worker(handle, rc):
+    global _worker_store
+    _init_matplotlib(rc)
+    _worker_store = SeriesStore.attach(handle)
+
+
+def _run_job(job, store=None):
+    store = store or _worker_store
+    inputs = [store.resolve(ref) if isinstance(ref, Ref) else ref for ref in job.inputs]
+    status, content, key = render_to_path(job.path, job.render, inputs, job.spec, job.force,
+                                          **(job.savefig or {}))
+    return status, content, key
+
+
+def _rc_snapshot():
+    """親プロセスの rcParams（バックエンドを含む。描画キーをワーカーと親で一致させる）"""
+    import matplotlib
+
+    return dict(matplotlib.rcParams.items())
+
+
+def render_parallel(jobs, store, workers=None):
+    """
+    描画ジョブを並列に実行する（render_figure と同じく、前回と同じ描画は省略する）
+
+    Parameters
+    ----------
+    jobs : RenderJob のリスト。inputs の Ref はワーカーで store の系列に置き換える
+    store : SeriesStore（create() で作ったもの）
+    workers : プロセス数（既定は CPU 数。1 ならこのプロセスで順に描画する）
+
+    Returns
+    -------
+    ジョブの順の書き込み結果（WRITTEN・UNCHANGED・SKIPPED）
+    """
+    jobs = list(jobs)
+    if workers == 1 or len(jobs) <= 1:
+        results = [_run_job(job, store) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(store.handle, _rc_snapshot())) as pool:
+            results = list(pool.map(_run_job, jobs))
+    record_renders([(job.path, content, key) for job, (status, content, key) in zip(jobs, results)
+                    if status != SKIPPED])
+    return [status for status, _, _ in results]
+
+
+# ---- ベンチマーク
+
+def _private_mb():
+    """このプロセスだけが使っているメモリ（共有メモリのページを除く、MB）"""
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            fields = dict(line.split(':', 1) for line in f if line.startswith('Private_'))
+        return sum(int(v.split()[0]) for v in fields.values()) / 1024
+    except (OSError, ValueError):
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _bench_figure(frame):
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(6, 3))
+    ax = fig.subplots()
+    ax.plot(frame.index.year + (frame.index.month - 1) / 12, frame.to_numpy(), linewidth=0.8)
+    ax.set_title(f'{frame.columns[0]} ... ({len(frame)} months)', fontsize=8)
+    fig.tight_layout()
+    return fig
+
+
+def _bench_pickled(path, frame, names):
+    """比較用: 10年分の全系列の DataFrame を受け取って描画する（素朴な並列化）"""
+    from common.output import figure_bytes
+
+    Path(path).write_bytes(figure_bytes(_bench_figure(frame[names]), dpi=72))
+    return os.getpid(), _private_mb()
+
+
+def _bench_shared(path, ref):
+    from common.output import figure_bytes
+
+    Path(path).write_bytes(figure_bytes(_bench_figure(_worker_store.resolve(ref)), dpi=72))
+    return os.getpid(), _private_mb()
+
+
+def bench(n_series=1000, n_months=780, n_figures=120, per_figure=8, workers=4):
+    rng = np.random.default_rng(0)
+    index = pd.period_range('1960-01', periods=n_months, freq='M')
+    values = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (n_months, n_series)), axis=0))
+    frame = pd.DataFrame(values, index=index, columns=[f's{i:04d}' for i in range(n_series)])
+    decades = [slice(start, min(start + 120, n_months)) for start in range(0, n_months, 120)]
+
+    plan = []
+    for i in range(n_figures):
+        first = (i * per_figure) % (n_series - per_figure)
+        plan.append((list(frame.columns[first:first + per_figure]), decades[i % len(decades)]))
+
+    results = {}
+    with tempfile.TemporaryDirectory() as out:
+        t = time.perf_counter()
+        sent = 0
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_matplotlib,
+                                 initargs=(_rc_snapshot(),)) as pool:
+            futures = []
+            for i, (names, rows) in enumerate(plan):
+                args = (f'{out}/p{i}.png', frame.iloc[rows], names)
+                sent += len(pickle.dumps(args, protocol=pickle.HIGHEST_PROTOCOL))
+                futures.append(pool.submit(_bench_pickled, *args))
+            memory = {}
+            for future in futures:
+                pid, mb = future.result()
+                memory[pid] = max(memory.get(pid, 0), mb)
+        results['pickle'] = (time.perf_counter() - t, sent, sum(memory.values()), len(memory))
+
+        t = time.perf_counter()
+        with SeriesStore.create(frame) as store:
+            sent = len(pickle.dumps(store.handle, protocol=pickle.HIGHEST_PROTOCOL)) * workers
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(store.handle, _rc_snapshot())) as pool:
+                futures = []
+                for i, (names, rows) in enumerate(plan):
+                    args = (f'{out}/s{i}.png', store.ref(names, rows))
+                    sent += len(pickle.dumps(args, protocol=pickle.HIGHEST_PROTOCOL))
+                    futures.append(pool.submit(_bench_shared, *args))
+                memory = {}
+                for future in futures:
+                    pid, mb = future.result()
+                    memory[pid] = max(memory.get(pid, 0), mb)
+            shared_mb = store.nbytes / 1e6
+        results['shared'] = (time.perf_counter() - t, sent, sum(memory.values()), len(memory))
+
+    print(f'{n_series}系列 × {n_months}か月（{frame.memory_usage().sum() / 1e6:.1f}MB）、'
+          f'{n_figures}図、ワーカー {workers}、共有メモリ {shared_mb:.1f}MB')
+    for mode, (seconds, sent, private, n_workers) in results.items():
+        print(f'{mode:7s} {seconds:6.2f}秒  送信 {sent / 1e6:8.2f}MB  '
+              f'ワーカーの専有メモリ合計 {private:7.1f}MB（{n_workers}プロセス）')
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m common.parallel',
+                                     description='共有メモリと pickle での並列描画の比較')
+    parser.add_argument('--series', type=int, default=1000)
+    parser.add_argument('--months', type=int, default=780)
+    parser.add_argument('--figures', type=int, default=120)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args(argv)
+    bench(args.series, args.months, args.figures, workers=args.workers)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,424 @@
+"""
+期（月・四半期・暦年・年度）の int32 序数表現
+
+期は頻度ごとの序数（int32）の配列として持ち、変換・書式化・結合はすべて配列演算で行う。
+序数は pandas の Period と同じ（年度は暦年と同じ数え方で、1980年度 = 10）:
+
+    M  : 1970年1月からの月数          '1980/01' → 120
+    Q  : 1970Q1 からの四半期数        '1980Q1'  → 40
+    Y  : 1970年からの年数             '1980'    → 10
+    FY : 1970年度（1970年4月〜）からの年度数
+
+datetime64[ns] の半分の大きさで、年の比較（dt.year == 2020）や文字列への変換のたびに
+Timestamp や一時的な配列を作らずに済む。欠損は NAT（int32 の最小値）で表す。
+
+    from common import periods
+
+    data_df['date'] = periods.parse(data_df['date'])            # '1980/01' → 120
+    in_2020 = periods.within(data_df['date'], 2020, 2020)         # 2020年の月のマスク
+    labels = periods.format(data_df['date'], 'M', '%Y年%m月')
+    ax.plot(periods.to_datetime64(data_df['date']), values)       # グラフの x 軸
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+# 1年あたりの期数
+FREQUENCIES = {'M': 12, 'Q': 4, 'Y': 1, 'FY': 1}
+
+# 欠損の期
+NAT = np.iinfo(np.int32).min
+
+# pandas の頻度（年度は暦年の Period に年度の値をそのまま入れる。catalog の年次系列と同じ扱い）
+PANDAS_FREQ = {'M': 'M', 'Q': 'Q', 'Y': 'Y', 'FY': 'Y'}
+
+DEFAULT_FORMATS = {'M': '%Y-%m', 'Q': '%YQ%q', 'Y': '%Y', 'FY': '%Y'}
+
+# 固定幅の高速経路で扱えない文字列に使う（'1980/1'・'1980年度'・'1980-Q1' など）
+_PATTERN = re.compile(r'^\s*(\d{4})\s*(?:年度|年|[-/.])?\s*(?:(Q)\s*([1-4])|(\d{1,2})\s*月?)?\s*$')
+
+# 月を含まない年度（'1980年度'）と、小数で書いた年（'1980.0'。'1980.1' は1980年1月）
+_FISCAL = re.compile(r'^\s*\d{4}\s*年度\s*$')
+_FLOAT_YEAR = re.compile(r'^\s*(\d{4})\.0+\s*$')
+
+_ZERO, _NINE, _MONTH = ord('0'), ord('9'), ord('月')
+
+
+def _check_freq(freq):
+    if freq not in FREQUENCIES:
+        raise ValueError(f'頻度は {"/".join(FREQUENCIES)} のいずれかです: {freq}')
+
+
+# 欠損として扱う文字列（文字列配列にしたときの None・NaN・NaT の表記を含む）
+_MISSING = {'', 'None', 'nan', 'NaN', 'NaT', '<NA>'}
+
+
+def _as_str_array(values):
+    if isinstance(values, (pd.Series, pd.Index)):
+        arr = values.to_numpy(dtype=str)
+    else:
+        arr = np.asarray(values, dtype=str)
+    return np.ascontiguousarray(arr.ravel())
+
+
+def _digit(column):
+    # 符号なしの引き算で '0' より小さい符号位置も大きな値になるため、比較1回で判定できる
+    return column - np.uint32(_ZERO) <= 9
+
+
+def _fast_fields(arr):
+    """
+    固定幅の文字列（'YYYY'・'YYYY/MM'・'YYYY-MM'・'YYYY年MM月'・'YYYYQn'）から年と期を取り出す
+
+    文字列配列を UCS4 の符号位置の2次元配列として見て、列（桁）ごとの演算で読む。
+    Returns (year, month, quarter, ok)。month・quarter は該当しない行で 0
+    """
+    n, width = len(arr), arr.dtype.itemsize // 4
+    zeros = np.zeros(n, dtype=np.int32)
+    if width < 4:
+        return zeros, zeros, zeros, np.zeros(n, dtype=bool)
+    c = arr.view(np.uint32).reshape(n, width)
+
+    def value(i):
+        return c[:, i].astype(np.int32) - _ZERO
+
+    year = value(0) * 1000 + value(1) * 100 + value(2) * 10 + value(3)
+    ok = _digit(c[:, 0]) & _digit(c[:, 1]) & _digit(c[:, 2]) & _digit(c[:, 3])
+    if width == 4:
+        return year, zeros, zeros, ok
+    year_only = c[:, 4] == 0
+    if width < 6:
+        return year, zeros, zeros, ok & year_only
+
+    # 'YYYYQn'
+    is_quarter = (c[:, 4] == ord('Q')) & (c[:, 5] - np.uint32(ord('1')) <= 3)
+    # 'YYYY/MM'・'YYYY-MM'・'YYYY年MM月'（区切り1文字 + 2桁の月 + 「月」があってもよい）
+    is_month = ~year_only & ~_digit(c[:, 4]) & ~is_quarter
+    if width >= 7:
+        is_quarter &= c[:, 6] == 0
+        is_month &= _digit(c[:, 5]) & _digit(c[:, 6])
+        if width >= 8:
+            is_month &= (c[:, 7] == 0) | (c[:, 7] == _MONTH)
+            if width > 8:
+                tail_empty = c[:, 8] == 0
+                is_month &= tail_empty
+                is_quarter &= tail_empty
+        month = value(5) * 10 + value(6)
+        month[~is_month] = 0
+    else:
+        is_month[:] = False
+        month = zeros
+    is_month &= (month >= 1) & (month <= 12)
+    quarter = value(5)
+    quarter[~is_quarter] = 0
+    return year, month, quarter, ok & (year_only | is_quarter | is_month)
+
+
+def _slow_fields(text):
+    """固定幅でない文字列から (年, 月, 四半期) を読む（月を含まない年度は4月）"""
+    text = str(text)
+    float_year = _FLOAT_YEAR.match(text)
+    if float_year:
+        return int(float_year.group(1)), 0, 0
+    if _FISCAL.match(text):
+        return int(text.strip()[:4]), 4, 0
+    match = _PATTERN.match(text)
+    if match is None:
+        raise ValueError(f'期を解釈できません: {text!r}')
+    year, q, quarter, month = match.groups()
+    month = int(month) if month else 0
+    if month > 12 or (match.group(4) and month == 0):
+        raise ValueError(f'期を解釈できません: {text!r}')
+    return int(year), month, int(quarter) if q else 0
+
+
+def _fields_to_ordinals(year, month, quarter, freq):
+    """年・月・四半期（0 は指定なし）を freq の序数にする（指定のない細かい単位は期首）"""
+    year = year.astype(np.int32) - 1970
+    months = np.where(month > 0, month - 1, np.where(quarter > 0, (quarter - 1) * 3, 0))
+    # 年だけの文字列は freq が年度なら年度、それ以外は暦年の期首
+    if freq == 'FY':
+        return np.where((month > 0) | (quarter > 0), from_month(year * 12 + months, 'FY'), year)
+    return from_month(year * 12 + months, freq)
+
+
+def parse(values, freq='M'):
+    """
+    期の文字列（または年の整数）を freq の序数（int32 の配列）にする
+
+    '1980/01'・'1980-01'・'1980年01月'・'1980/1'・'1980Q1'・'1980'・'1980年度'・'1980.0' などを読む。
+    freq より粗い期（freq='M' に '1980' など）は期首の期になる（'1980年度' は1980年4月）。
+    欠損・空文字は NAT、解釈できない文字列・整数でない年は ValueError。
+
+    >>> parse(['1980年度', '1980'], 'M').tolist()
+    [123, 120]
+    >>> parse(np.array([1980.0, np.nan]), 'Y').tolist() == [10, NAT]
+    True
+    """
+    _check_freq(freq)
+    if isinstance(values, (pd.Series, pd.Index, np.ndarray)) and np.asarray(values).dtype.kind in 'iuf':
+        # 年の整数（年度の列など。欠損を含む列は浮動小数点になる）
+        numbers = np.asarray(values, dtype=float)
+        missing = np.isnan(numbers)
+        if not np.array_equal(numbers[~missing], np.floor(numbers[~missing])):
+            raise ValueError(f'年は整数で指定してください: {numbers[~missing][numbers[~missing] % 1 != 0][:3]}')
+        year = np.where(missing, 1970, numbers).astype(np.int32) - np.int32(1970)
+        ordinals = year if freq in ('Y', 'FY') else from_month(year * 12, freq).astype(np.int32)
+        ordinals[missing] = NAT
+        return ordinals
+    if np.ndim(values) == 0:
+        if isinstance(values, (float, np.floating)):
+            return parse(np.array([values]), freq)[0]
+        return parse([values], freq)[0]
+
+    arr = _as_str_array(values)
+    if len(arr) == 0:
+        return np.empty(0, dtype=np.int32)
+    year, month, quarter, ok = _fast_fields(arr)
+    missing = np.zeros(len(arr), dtype=bool)
+    bad = np.flatnonzero(~ok)
+    if len(bad):
+        year, month, quarter = year.copy(), month.copy(), quarter.copy()
+        for i in bad:
+            if arr[i].strip() in _MISSING:
+                missing[i] = True
+            else:
+                year[i], month[i], quarter[i] = _slow_fields(arr[i])
+    ordinals = _fields_to_ordinals(year, month, quarter, freq).astype(np.int32)
+    ordinals[missing] = NAT
+    return ordinals
+
+
+def infer_freq(text):
+    """期の文字列の頻度（'1980Q1' → 'Q'、'1980' → 'Y'、'1980年度' → 'FY'、それ以外は 'M'）"""
+    if _FISCAL.match(str(text)):
+        return 'FY'
+    year, month, quarter = _slow_fields(str(text))
+    if quarter:
+        return 'Q'
+    if month:
+        return 'M'
+    return 'Y'
+
+
+def ordinal(year, period=1, freq='M'):
+    """年と期（月・四半期。年次では無視）から序数を作る（配列も可）"""
+    _check_freq(freq)
+    year = np.asarray(year, dtype=np.int32) - np.int32(1970)
+    period = np.asarray(period, dtype=np.int32)
+    if freq == 'M':
+        result = year * 12 + period - 1
+    elif freq == 'Q':
+        result = year * 4 + period - 1
+    else:
+        result = year
+    return result.astype(np.int32) if result.ndim else int(result)
+
+
+def as_ordinals(values, freq='M'):
+    """
+    序数の配列・PeriodIndex・日付（datetime64・DatetimeIndex）・期の文字列を freq の序数にする
+
+    整数の配列はすでに freq の序数とみなしてそのまま（int32 にして）返す。
+    """
+    _check_freq(freq)
+    if isinstance(values, pd.Series):
+        values = pd.Index(values) if isinstance(values.dtype, pd.PeriodDtype) else values.to_numpy()
+    if isinstance(values, pd.PeriodIndex):
+        return from_index(values.asfreq(PANDAS_FREQ[freq], how='start') if freq != 'FY' else values)
+    if isinstance(values, pd.Index):
+        values = values.to_numpy()
+    arr = np.asarray(values)
+    if arr.dtype.kind in 'iu':
+        return arr.astype(np.int32, copy=False)
+    if arr.dtype.kind == 'M':
+        months = arr.astype('datetime64[M]')
+        result = from_month(months.astype(np.int64), freq).astype(np.int32)
+        result[np.isnat(months)] = NAT
+        return result
+    return parse(arr, freq)
+
+
+def from_month(months, freq):
+    """月の序数を freq の序数にする（その月を含む期）"""
+    if freq == 'M':
+        return months
+    if freq == 'Q':
+        return months // 3
+    if freq == 'Y':
+        return months // 12
+    return (months - 3) // 12
+
+
+def to_month(ordinals, freq, how='start'):
+    """freq の序数を期首（how='start'）または期末（'end'）の月の序数にする"""
+    end = how == 'end'
+    if freq == 'M':
+        return ordinals
+    if freq == 'Q':
+        return ordinals * 3 + 2 * end
+    if freq == 'Y':
+        return ordinals * 12 + 11 * end
+    return ordinals * 12 + 3 + 11 * end
+
+
+def asfreq(ordinals, freq, to, how='start'):
+    """
+    頻度を変換する（細かい頻度へは期首または期末の期、粗い頻度へはその期を含む期）
+    """
+    _check_freq(freq)
+    _check_freq(to)
+    ordinals = np.asarray(ordinals)
+    result = from_month(to_month(ordinals.astype(np.int64), freq, how), to)
+    if result.ndim == 0:
+        return int(result)
+    result = result.astype(np.int32)
+    result[ordinals == NAT] = NAT
+    return result
+
+
+def year(ordinals, freq='M'):
+    """暦年（年度の序数なら年度）"""
+    return _part(ordinals, freq, lambda o: (o if freq in ('Y', 'FY') else from_month(to_month(o, freq), 'Y')) + 1970)
+
+
+def month(ordinals, freq='M'):
+    """月（1〜12。四半期・年次では期首の月）"""
+    return _part(ordinals, freq, lambda o: to_month(o, freq) % 12 + 1)
+
+
+def quarter(ordinals, freq='M'):
+    """四半期（1〜4。年次では期首の四半期）"""
+    return _part(ordinals, freq, lambda o: from_month(to_month(o, freq), 'Q') % 4 + 1)
+
+
+def fiscal_year(ordinals, freq='M'):
+    """年度（4月〜翌年3月。期首の月で決める）"""
+    return _part(ordinals, freq, lambda o: from_month(to_month(o, freq), 'FY') + 1970)
+
+
+def _part(ordinals, freq, compute):
+    _check_freq(freq)
+    arr = np.asarray(ordinals)
+    if arr.ndim == 0:
+        return int(compute(int(arr)))
+    return compute(arr.astype(np.int32, copy=False)).astype(np.int32, copy=False)
+
+
+def bound(value, freq, how='start'):
+    """
+    期間の端（期の文字列または年の整数）を freq の序数にする
+
+    粗い期は how='start' なら期首、'end' なら期末の期（'2015' → 2015年1月・12月）。None はそのまま。
+    """
+    if value is None:
+        return None
+    if isinstance(value, (int, np.integer)):
+        return asfreq(int(value) - 1970, 'Y' if freq != 'FY' else 'FY', freq, how)
+    value_freq = infer_freq(value)
+    if value_freq == 'Y' and freq == 'FY':
+        value_freq = 'FY'
+    return asfreq(parse(value, value_freq), value_freq, freq, how)
+
+
+def within(ordinals, start=None, end=None, freq='M'):
+    """
+    start〜end（両端を含む）の期のマスク
+
+    start・end は期の文字列（'2015/01'・'2015Q2'・'2015' など）または年の整数で、
+    粗い期なら start は期首、end は期末まで含む（within(o, 2020, 2020) は2020年の12か月）。
+    """
+    ordinals = np.asarray(ordinals)
+    lo, hi = bound(start, freq, 'start'), bound(end, freq, 'end')
+    mask = ordinals != NAT
+    if lo is not None:
+        mask &= ordinals >= lo
+    if hi is not None:
+        mask &= ordinals <= hi
+    return mask
+
+
+def _format_one(o, freq, fmt):
+    m = to_month(o, freq)
+    y = (o if freq in ('Y', 'FY') else m // 12) + 1970
+    return (fmt.replace('%Y', f'{y:04d}').replace('%m', f'{m % 12 + 1:02d}')
+            .replace('%q', str(m % 12 // 3 + 1)))
+
+
+def format(ordinals, freq='M', fmt=None):
+    """
+    序数を文字列にする（%Y 年・%m 2桁の月・%q 四半期。既定は pandas の Period と同じ表記）
+
+    配列なら object 配列（NAT は空文字）を返す。現れる期の範囲の表を1回作って引くため、
+    件数が多くても期ごとの書式化は1回ずつで済む。
+    """
+    _check_freq(freq)
+    fmt = DEFAULT_FORMATS[freq] if fmt is None else fmt
+    arr = np.asarray(ordinals)
+    if arr.ndim == 0:
+        return '' if int(arr) == NAT else _format_one(int(arr), freq, fmt)
+    arr = arr.astype(np.int64)
+    valid = arr != NAT
+    result = np.full(arr.shape, '', dtype=object)
+    if not valid.any():
+        return result
+    present = arr[valid]
+    lo, hi = int(present.min()), int(present.max())
+    if hi - lo <= 2 * len(present) + 1000:
+        table = np.array([_format_one(o, freq, fmt) for o in range(lo, hi + 1)], dtype=object)
+        result[valid] = table[present - lo]
+    else:
+        unique, inverse = np.unique(present, return_inverse=True)
+        table = np.array([_format_one(int(o), freq, fmt) for o in unique], dtype=object)
+        result[valid] = table[inverse]
+    return result
+
+
+def to_datetime64(ordinals, freq='M'):
+    """期首の日付（datetime64[ns]。グラフの x 軸用。NAT は NaT）"""
+    _check_freq(freq)
+    arr = np.asarray(ordinals)
+    months = to_month(arr.astype(np.int64), freq)
+    dates = months.astype('datetime64[M]').astype('datetime64[ns]')
+    dates[arr == NAT] = np.datetime64('NaT')
+    return dates
+
+
+def to_index(ordinals, freq='M', name=None):
+    """pandas.PeriodIndex にする（年度は頻度 'Y' の Period）"""
+    _check_freq(freq)
+    arr = np.asarray(ordinals).astype(np.int64)
+    arr[arr == NAT] = np.iinfo(np.int64).min
+    return pd.PeriodIndex.from_ordinals(arr, freq=PANDAS_FREQ[freq], name=name)
+
+
+def from_index(index):
+    """PeriodIndex の序数（int32。NaT は NAT）"""
+    values = index.asi8
+    result = values.astype(np.int32)
+    result[values == np.iinfo(np.int64).min] = NAT
+    return result
+
+
+def align(target, source, values, fill=np.nan):
+    """
+    source の期の values を target の期に並べ替える（期の序数どうしの結合）
+
+    source は重複のない序数。target にあって source にない期は fill。
+    文字列や Timestamp のハッシュを使わず、整数の二分探索で対応を取る。
+    """
+    target = np.asarray(target)
+    source = np.asarray(source)
+    values = np.asarray(values)
+    result = np.full(target.shape, fill, dtype=np.result_type(values.dtype, np.asarray(fill).dtype))
+    if len(source) == 0:
+        return result
+    order = np.argsort(source, kind='stable')
+    ordered = source[order]
+    position = np.searchsorted(ordered, target)
+    clipped = np.minimum(position, len(ordered) - 1)
+    hit = (position < len(ordered)) & (ordered[clipped] == target) & (target != NAT)
+    result[hit] = values[order[clipped[hit]]]
+    return result
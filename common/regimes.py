@@ -0,0 +1,183 @@
+"""
+構造変化点（レジーム）の検出
+
+二分割法（binary segmentation）で、平均の変化（model='mean'）または
+トレンド（傾き・水準）の変化（model='trend'）が起きた時点を検出する。
+
+区間の残差平方和は累積和から O(1) で求まるため、1回の分割探索は
+[系列 × 時点] の配列演算1回（O(N·T)）で済み、数百系列を同時に処理できる。
+分割は、残差平方和の減少がペナルティ（BIC 型: 区間あたりパラメータ数+1 × σ² × log n）を
+上回る限り、max_breaks 回まで繰り返す。
+
+検出したレジームは期間別集計（regime_masks）とグラフの背景色（shade_regimes）に
+そのまま渡せる。
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+# 1つのレジーム: 開始・終了のラベル（日付や年）と、元の配列での位置
+Regime = namedtuple('Regime', ['start', 'end', 'start_index', 'end_index', 'mean'])
+
+# shade_regimes の既定の背景色
+REGIME_COLORS = ['green', 'blue', 'yellow', 'red', 'purple', 'orange', 'gray']
+
+# 区間あたりのパラメータ数
+MODEL_PARAMS = {'mean': 1, 'trend': 2}
+
+
+def _prefix(a):
+    """[N × T] の先頭軸方向の累積和（先頭に0を付けた [N × (T+1)]）"""
+    return np.concatenate([np.zeros((a.shape[0], 1)), np.cumsum(a, axis=1)], axis=1)
+
+
+class _SegmentCost:
+    """累積和による区間 [a, b) の残差平方和"""
+
+    def __init__(self, y, x, model):
+        valid = ~np.isnan(y)
+        y0 = np.where(valid, y, 0.0)
+        x0 = np.where(valid, x[None, :], 0.0)
+        self.model = model
+        self.n = _prefix(valid.astype(float))
+        self.sy = _prefix(y0)
+        self.syy = _prefix(y0 * y0)
+        if model == 'trend':
+            self.sx = _prefix(x0)
+            self.sxx = _prefix(x0 * x0)
+            self.sxy = _prefix(x0 * y0)
+
+    @staticmethod
+    def _range(p, a, b):
+        return np.take_along_axis(p, b, axis=1) - np.take_along_axis(p, a, axis=1)
+
+    def count(self, a, b):
+        return self._range(self.n, a, b)
+
+    def __call__(self, a, b):
+        n = self.count(a, b)
+        safe_n = np.maximum(n, 1)
+        sy = self._range(self.sy, a, b)
+        rss = self._range(self.syy, a, b) - sy * sy / safe_n
+        if self.model == 'trend':
+            sx = self._range(self.sx, a, b)
+            vxx = self._range(self.sxx, a, b) - sx * sx / safe_n
+            vxy = self._range(self.sxy, a, b) - sx * sy / safe_n
+            with np.errstate(invalid='ignore', divide='ignore'):
+                rss = rss - np.where(vxx > 1e-12, vxy * vxy / vxx, 0.0)
+        return np.maximum(rss, 0.0)
+
+
+def _noise_variance(y, model):
+    """差分の MAD による系列ごとのノイズ分散の頑健推定"""
+    order, scale = (1, 2.0) if model == 'mean' else (2, 6.0)
+    variances = np.empty(y.shape[0])
+    for i, row in enumerate(y):
+        d = np.diff(row[~np.isnan(row)], n=order)
+        if len(d) == 0:
+            variances[i] = 0.0
+            continue
+        mad = np.median(np.abs(d - np.median(d))) / 0.6745
+        variances[i] = mad * mad / scale
+    return variances
+
+
+def find_breaks(values, model='mean', x=None, max_breaks=5, min_size=3, penalty=None):
+    """
+    複数系列の変化点を同時に検出
+
+    Parameters
+    ----------
+    values : [T] または [T × N] の配列（欠損値は区間の計算から除外）
+    model : 'mean'（平均の変化）または 'trend'（線形トレンドの変化）
+    x : トレンドの説明変数 [T]（年など。省略時は 0, 1, 2, ...）
+    max_breaks : 系列あたりの最大変化点数
+    min_size : 各レジームの最小観測数
+    penalty : 変化点1つあたりのペナルティ（スカラーまたは [N]）。省略時は BIC 型
+
+    Returns
+    -------
+    系列ごとの変化点（新しいレジームが始まる位置）の昇順リスト。
+    1次元の入力にはリスト1つを返す。
+    """
+    if model not in MODEL_PARAMS:
+        raise ValueError(f"model は {list(MODEL_PARAMS)} のいずれかを指定してください: {model!r}")
+    values = np.asarray(values, dtype=float)
+    squeeze = values.ndim == 1
+    y = (values[:, None] if squeeze else values).T
+    n_series, n_periods = y.shape
+
+    x = np.arange(n_periods, dtype=float) if x is None else np.asarray(x, dtype=float)
+    x = x - x.mean()
+    cost = _SegmentCost(y, x, model)
+
+    n_valid = (~np.isnan(y)).sum(axis=1)
+    if penalty is None:
+        penalty = ((MODEL_PARAMS[model] + 1) * _noise_variance(y, model)
+                   * np.log(np.maximum(n_valid, 2)))
+    penalty = np.broadcast_to(np.asarray(penalty, dtype=float), (n_series,))
+
+    # is_break[:, b] は位置 b でレジームが始まる（両端は常に True）
+    is_break = np.zeros((n_series, n_periods + 1), dtype=bool)
+    is_break[:, [0, n_periods]] = True
+    active = np.ones(n_series, dtype=bool)
+    positions = np.arange(n_periods + 1)
+    t = np.broadcast_to(positions[:n_periods], (n_series, n_periods))
+
+    for _ in range(max_breaks):
+        if not active.any():
+            break
+        # 各候補位置 t を含む現在の区間 [start, end)
+        start = np.maximum.accumulate(np.where(is_break[:, :n_periods], positions[:n_periods], 0), axis=1)
+        end = np.minimum.accumulate(
+            np.where(is_break[:, 1:], positions[1:], n_periods)[:, ::-1], axis=1)[:, ::-1]
+
+        gain = cost(start, end) - cost(start, t) - cost(t, end)
+        feasible = ((cost.count(start, t) >= min_size) & (cost.count(t, end) >= min_size)
+                    & ~is_break[:, :n_periods])
+        gain = np.where(feasible, gain, -np.inf)
+
+        best = np.argmax(gain, axis=1)
+        best_gain = gain[np.arange(n_series), best]
+        accept = active & (best_gain > penalty)
+        is_break[np.nonzero(accept)[0], best[accept]] = True
+        active &= accept
+
+    breaks = [[int(b) for b in np.nonzero(row[1:n_periods])[0] + 1] for row in is_break]
+    return breaks[0] if squeeze else breaks
+
+
+def detect_regimes(values, labels, model='mean', x=None, **kwargs):
+    """
+    1系列のレジームを検出し、Regime のリストを返す
+
+    labels は各時点のラベル（日付や年度）。end は次のレジームの開始ラベル
+    （最後のレジームは最終ラベル）で、グラフの背景色にそのまま使える。
+    """
+    values = np.asarray(values, dtype=float)
+    labels = list(labels)
+    breaks = find_breaks(values, model=model, x=x, **kwargs)
+    bounds = [0] + breaks + [len(values)]
+    regimes = []
+    for a, b in zip(bounds[:-1], bounds[1:]):
+        end_label = labels[b] if b < len(labels) else labels[-1]
+        regimes.append(Regime(labels[a], end_label, a, b, float(np.nanmean(values[a:b]))))
+    return regimes
+
+
+def regime_masks(regimes, length):
+    """各レジームの行に True を立てたブール配列のリスト（期間別集計用）"""
+    masks = []
+    for regime in regimes:
+        mask = np.zeros(length, dtype=bool)
+        mask[regime.start_index:regime.end_index] = True
+        masks.append(mask)
+    return masks
+
+
+def shade_regimes(ax, regimes, colors=REGIME_COLORS, alpha=0.08, labels=None):
+    """レジームごとに axvspan で背景色を付ける（labels を渡すと凡例用のラベルを付ける）"""
+    for i, regime in enumerate(regimes):
+        kwargs = {} if labels is None else {'label': labels[i]}
+        ax.axvspan(regime.start, regime.end, alpha=alpha, color=colors[i % len(colors)], **kwargs)
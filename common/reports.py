@@ -0,0 +1,332 @@
+"""
+統計量のキャッシュとテンプレートからのレポート生成
+
+レポート（統計サマリーのテキスト・Markdown の表や箇条書き）に書く数値を、名前付きの
+統計量として宣言し、テンプレートの {名前:書式} に差し込む。
+
+    @statistic('gdp', inputs=('gdp.nominal', 'gdp.long_rate'))
+    def gdp_summary(nominal, rate):
+        return {'nominal_first': ..., 'correlation': ...}
+
+    {gdp.nominal_first:.1f} 兆円            ← テンプレート（'gdp' の 'nominal_first'）
+    @each tot.decades: | {decade}年代 | {mean:.2f} |   ← リストの要素ごとに1行
+
+統計量は使われたものだけを1回の実行につき1回だけ計算し、.cache/reports/statistics.json
+にも保存する。キャッシュのキーは統計量の関数（とそのモジュール）のソースと入力（派生系列の版・データファイルの
+更新日時）から作るため、データも計算も変わっていなければ次の実行では元データを読まない。
+
+レポートは2種類:
+    FILE_REPORTS    テンプレート全体から作るファイル（GDP推移/statistical_summary.txt）
+    REGION_REPORTS  Markdown の <!-- report: テンプレート --> 〜 <!-- /report --> の間だけを
+                    テンプレートから作り直す（それ以外の本文は手書きのまま）
+
+テンプレートのパスはリポジトリのルート（領域はその Markdown のフォルダ）からの相対パス。
+値が None の欄は '-' になる。
+
+コマンドラインから（リポジトリのルートで）:
+    python -m common.reports            # すべてのレポートを作り直す
+"""
+
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import re
+import string
+import sys
+from collections import Counter, namedtuple
+from pathlib import Path
+
+from common import CACHE_DIR, REPO_ROOT
+from common.bootstrap import LEVEL, REPLICATES, corr_ci, mean_ci, period_means_ci
+from common.output import write_text
+
+CACHE_PATH = CACHE_DIR / 'reports' / 'statistics.json'
+
+# 統計量の定義
+#   inputs : 系列名（カタログの系列コードまたは派生系列名）。欠損を除いた Series を渡す
+#   files : リポジトリのルートからの相対パス。Path を inputs のあとに渡す
+Statistic = namedtuple('Statistic', 'name inputs files compute description')
+
+STATISTICS = {}
+
+# テンプレートから作るファイル {出力: (テンプレート, 文字コード)}
+FILE_REPORTS = {
+    'GDP推移/statistical_summary.txt': ('GDP推移/templates/statistical_summary.txt', 'utf-8'),
+}
+
+# テンプレートの領域を含む Markdown
+REGION_REPORTS = [
+    'GDP推移/analysis_report.md',
+    '企業物価指数/terms_of_trade_analysis.md',
+    '最近の補正予算/分析レポート.md',
+]
+
+_REGION = re.compile(r'^(<!-- report: (\S+) -->\n)(.*?)(^<!-- /report -->$)', re.M | re.S)
+_EACH = re.compile(r'^@each ([\w.]+): ?(.*)$')
+
+
+def statistic(name, inputs=(), files=(), description=''):
+    """統計量を登録するデコレーター（関数は数値・文字列・dict・dict のリストを返す）"""
+    def register(compute):
+        STATISTICS[name] = Statistic(name, tuple(inputs), tuple(files), compute, description)
+        return compute
+    return register
+
+
+def _plain(value):
+    """numpy の数値などを JSON に保存できる値にする"""
+    if isinstance(value, dict):
+        return {str(k): _plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain(v) for v in value]
+    if value is None or isinstance(value, (bool, str)):
+        return value
+    if hasattr(value, 'item'):
+        value = value.item()
+    if isinstance(value, float) and value != value:
+        return None
+    return value
+
+
+class Engine:
+    """
+    統計量の評価とテンプレートの展開
+
+    Parameters
+    ----------
+    statistics : {名前: Statistic}（省略時は STATISTICS）
+    graph : common.derived.Graph（省略時は新しく作る）
+    cache_path : 統計量のキャッシュ。False ならディスクのキャッシュを使わない
+
+    stats には統計量の出どころ（computed・disk）の件数が加算される。
+    """
+
+    def __init__(self, statistics=None, graph=None, cache_path=None):
+        self.statistics = STATISTICS if statistics is None else statistics
+        self._graph = graph
+        self.cache_path = CACHE_PATH if cache_path is None else cache_path
+        self.stats = Counter()
+        self._memory = {}
+        self._disk = None
+
+    @property
+    def graph(self):
+        if self._graph is None:
+            from common.derived import Graph
+            self._graph = Graph()
+        return self._graph
+
+    def key(self, name):
+        """統計量のキャッシュのキー（関数とそのモジュールのソース・入力系列の版・ファイルの更新日時）"""
+        spec = self.statistics[name]
+        parts = [name, inspect.getsource(spec.compute), inspect.getsource(inspect.getmodule(spec.compute))]
+        parts += [self.graph.fingerprint(code) for code in spec.inputs]
+        parts += [os.stat(REPO_ROOT / path).st_mtime_ns for path in spec.files]
+        return hashlib.sha1(json.dumps(parts, ensure_ascii=False).encode('utf-8')).hexdigest()[:16]
+
+    def _load_disk(self):
+        if self._disk is None:
+            self._disk = {}
+            if self.cache_path and Path(self.cache_path).exists():
+                self._disk = json.loads(Path(self.cache_path).read_text(encoding='utf-8'))
+        return self._disk
+
+    def _save_disk(self):
+        if self.cache_path:
+            write_text(self.cache_path, json.dumps(self._disk, ensure_ascii=False, indent=1, sort_keys=True))
+
+    def compute(self, name):
+        """統計量の値（同じ実行では1回だけ計算し、ディスクにあればそれを使う）"""
+        if name in self._memory:
+            return self._memory[name]
+        spec = self.statistics[name]
+        key = self.key(name)
+        cached = self._load_disk().get(name)
+        if cached is not None and cached['key'] == key:
+            value = cached['value']
+            self.stats['disk'] += 1
+        else:
+            args = [self.graph.get(code).dropna() for code in spec.inputs]
+            args += [REPO_ROOT / path for path in spec.files]
+            value = _plain(spec.compute(*args))
+            self.stats['computed'] += 1
+            self._disk[name] = {'key': key, 'value': value}
+            self._save_disk()
+        self._memory[name] = value
+        return value
+
+    def value(self, field):
+        """'名前' または '名前.キー'（dict の要素）の値"""
+        parts = field.split('.')
+        for i in range(len(parts), 0, -1):
+            name = '.'.join(parts[:i])
+            if name in self.statistics:
+                value = self.compute(name)
+                for part in parts[i:]:
+                    value = value[int(part)] if isinstance(value, list) else value[part]
+                return value
+        raise KeyError(f'未登録の統計量: {field}')
+
+    def render(self, template):
+        """テンプレートの文字列を展開する（@each の行はリストの要素ごとに繰り返す）"""
+        formatter = _Formatter(self)
+        lines = []
+        for line in template.splitlines(keepends=True):
+            m = _EACH.match(line.rstrip('\r\n'))
+            if m is None:
+                lines.append(formatter.format(line))
+                continue
+            newline = line[len(line.rstrip('\r\n')):]
+            for row in self.value(m[1]):
+                lines.append(formatter.vformat(m[2], (), row) + newline)
+        return ''.join(lines)
+
+    def render_template(self, path):
+        """リポジトリのルートからの相対パスのテンプレートを展開する"""
+        return self.render((REPO_ROOT / path).read_text(encoding='utf-8'))
+
+    def render_file(self, output, template, encoding='utf-8'):
+        """テンプレート全体からファイルを作る（WRITTEN または UNCHANGED を返す）"""
+        text = self.render_template(template)
+        return write_text(REPO_ROOT / output, text, encoding=encoding)
+
+    def render_regions(self, path):
+        """Markdown のテンプレートの領域を作り直す（WRITTEN または UNCHANGED を返す）"""
+        path = REPO_ROOT / path
+
+        def replace(m):
+            template = (path.parent / m[2]).read_text(encoding='utf-8')
+            return m[1] + self.render(template) + m[4]
+
+        return write_text(path, _REGION.sub(replace, path.read_text(encoding='utf-8')))
+
+
+class _Formatter(string.Formatter):
+    """欄の名前を統計量として引く（@each の行ではリストの要素のキーを先に引く）"""
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    def get_field(self, field_name, args, kwargs):
+        if field_name in kwargs:
+            return kwargs[field_name], field_name
+        return self.engine.value(field_name), field_name
+
+    def format_field(self, value, format_spec):
+        return '-' if value is None else super().format_field(value, format_spec)
+
+
+def render_all(engine=None):
+    """すべてのレポートを作り直す。{出力のパス: WRITTEN・UNCHANGED} を返す"""
+    engine = Engine() if engine is None else engine
+    results = {}
+    for output, (template, encoding) in FILE_REPORTS.items():
+        results[output] = engine.render_file(output, template, encoding)
+    for path in REGION_REPORTS:
+        results[path] = engine.render_regions(path)
+    return results
+
+
+_default = None
+
+
+def render_template(path):
+    """既定のエンジン（STATISTICS・.cache/reports/）でテンプレートを展開する"""
+    global _default
+    if _default is None:
+        _default = Engine()
+    return _default.render_template(path)
+
+
+# ---- 統計量
+
+def _correlation_label(ci):
+    """相関の向き（ブートストラップの信頼区間が0を含むかどうかで判断する）"""
+    if ci.lower > 0:
+        return '正の相関', f'{LEVEL:.0%}信頼区間が0を含まない'
+    if ci.upper < 0:
+        return '負の相関', f'{LEVEL:.0%}信頼区間が0を含まない'
+    return '0と区別できない相関', f'{LEVEL:.0%}信頼区間が0を含む'
+
+
+@statistic('gdp', inputs=('gdp.nominal', 'gdp.long_rate'), description='名目GDPと長期金利の要約')
+def gdp_summary(nominal, rate):
+    years = nominal.index.year
+    first, last = int(years[0]), int(years[-1])
+    r = corr_ci(nominal.to_numpy(), rate.to_numpy())
+    label, note = _correlation_label(r)
+    return {
+        'first_year': first, 'last_year': last, 'years': len(nominal), 'span': last - first + 1,
+        'nominal_first': nominal.iloc[0], 'nominal_last': nominal.iloc[-1],
+        'nominal_increase': nominal.iloc[-1] - nominal.iloc[0],
+        'nominal_growth': (nominal.iloc[-1] / nominal.iloc[0] - 1) * 100,
+        'nominal_multiple': nominal.iloc[-1] / nominal.iloc[0],
+        'nominal_max': nominal.max(), 'nominal_max_year': int(nominal.idxmax().year),
+        'nominal_min': nominal.min(), 'nominal_mean': nominal.mean(),
+        'rate_first': rate.iloc[0], 'rate_last': rate.iloc[-1], 'rate_change': rate.iloc[-1] - rate.iloc[0],
+        'rate_max': rate.max(), 'rate_max_year': int(rate.idxmax().year),
+        'rate_min': rate.min(), 'rate_min_year': int(rate.idxmin().year), 'rate_mean': rate.mean(),
+        'correlation': r.estimate, 'correlation_lower': r.lower, 'correlation_upper': r.upper,
+        'correlation_label': label, 'correlation_note': note, 'replicates': REPLICATES, 'level': LEVEL,
+    }
+
+
+def _month_label(period):
+    return f'{period.year}年{period.month}月'
+
+
+@statistic('tot', inputs=('cgpi.terms_of_trade', 'cgpi.tot_yoy'), description='交易条件の要約と年代別平均')
+def terms_of_trade_summary(tot, yoy):
+    groups, ci = period_means_ci(tot.to_numpy(), tot.index.year // 10 * 10)
+    rows, previous = [], None
+    for decade, mean, lower, upper in zip(groups, ci.estimate, ci.lower, ci.upper):
+        rows.append({'decade': int(decade), 'mean': mean, 'lower': lower, 'upper': upper,
+                     'diff': None if previous is None else mean - previous,
+                     'change': None if previous is None else mean / previous - 1})
+        previous = mean
+    yoy_ci = mean_ci(yoy.to_numpy())
+    return {
+        'first_period': _month_label(tot.index[0]), 'last_period': _month_label(tot.index[-1]),
+        'months': len(tot),
+        'mean': tot.mean(), 'std': tot.std(), 'median': tot.median(),
+        'max': tot.max(), 'max_period': _month_label(tot.idxmax()),
+        'min': tot.min(), 'min_period': _month_label(tot.idxmin()),
+        'last': tot.iloc[-1], 'last_yoy': yoy.iloc[-1], 'parity_gap': tot.iloc[-1] - 100,
+        'yoy_mean': yoy_ci.estimate, 'yoy_lower': yoy_ci.lower, 'yoy_upper': yoy_ci.upper, 'level': LEVEL,
+        'decades': rows,
+        'decade_first': ci.estimate[0], 'decade_last': ci.estimate[-1],
+        'decade_decline': (1 - ci.estimate[-1] / ci.estimate[0]) * 100,
+    }
+
+
+@statistic('budget.revisions', files=('最近の補正予算/補正予算データ.csv',), description='補正予算の一覧（補正ごと）')
+def budget_revisions(path):
+    import csv
+
+    rows = []
+    with open(path, encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            year, number = row['年度'][:4], row['年度'][4:]
+            purpose = row['主な目的']
+            rows.append({'label': f'{year}年度' + (f'（{number}）' if number else ''),
+                         'amount': float(row['補正予算額（兆円）']),
+                         'purpose': f'**{purpose}**' if 'COVID' in purpose else purpose})
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m common.reports', description='テンプレートからのレポート生成')
+    parser.add_argument('--no-cache', action='store_true', help='統計量のキャッシュを使わない')
+    args = parser.parse_args(argv)
+
+    engine = Engine(cache_path=False) if args.no_cache else Engine()
+    for path, result in render_all(engine).items():
+        print(f'{result:9s} {path}')
+    print(', '.join(f'{k}={v}' for k, v in sorted(engine.stats.items())))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,190 @@
+"""
+月次系列の季節調整（移動平均法による分解）
+
+古典的な X-11 型の移動平均法で、月次系列を
+トレンド・季節成分・不規則成分に分解する。
+
+1. トレンド: 中心化12か月移動平均（2×12 MA）
+2. 季節成分: トレンド除去後の値を同じ月ごとに年方向へ移動平均（既定は5年）し、
+   各年の12か月平均が0（乗法型では1）になるよう正規化
+3. 季節調整値: 原系列 − 季節成分（乗法型では 原系列 ÷ 季節指数）
+4. 不規則成分: 季節調整値 − トレンド
+
+すべての処理は [時点 × 系列] の配列に対して一括で行うため、数百系列でも
+1回の呼び出しで計算できる。系列ごとの収録開始時点の違い（先頭の欠損値）は
+欠損値を除いた平均で扱う。
+
+結果は系列コード・データの版（最終更新日）・期間・パラメータをキーとして
+系列ごとに .cache/seasonal/ に保存し、同じ版の再計算を省略する。
+"""
+
+import hashlib
+import json
+import warnings
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from common import CACHE_DIR, periods
+
+COMPONENTS = ('trend', 'seasonal', 'irregular', 'adjusted')
+
+# 中心化12か月移動平均（2×12 MA）の重み
+TREND_WEIGHTS = np.r_[0.5, np.ones(11), 0.5] / 12
+
+
+def _nan_moving_average(a, window):
+    """先頭軸方向の中心化移動平均（欠損値を除いた平均、端では窓を縮める）"""
+    half = window // 2
+    valid = ~np.isnan(a)
+    pad = [(half + 1, half)] + [(0, 0)] * (a.ndim - 1)
+    sums = np.cumsum(np.pad(np.where(valid, a, 0.0), pad), axis=0)
+    counts = np.cumsum(np.pad(valid.astype(np.int64), pad), axis=0)
+    sums = sums[window:] - sums[:-window]
+    counts = counts[window:] - counts[:-window]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(counts > 0, sums / counts, np.nan)
+
+
+def decompose(values, start_month=1, mode='multiplicative', seasonal_window=5):
+    """
+    [時点 × 系列] の配列を季節分解
+
+    Parameters
+    ----------
+    values : 月次の値 [T × N]（1次元なら1系列として扱う）
+    start_month : 先頭の時点の月（1〜12）
+    mode : 'multiplicative'（指数などの正値系列）または 'additive'
+    seasonal_window : 季節成分を推計する年方向の移動平均の長さ（奇数）。
+        None なら全期間の平均（季節性が安定していると仮定）
+
+    Returns
+    -------
+    {'trend', 'seasonal', 'irregular', 'adjusted'} の辞書（各 [T × N]）。
+    乗法型では seasonal・irregular は比率（1が中立）で返す。
+    """
+    values = np.asarray(values, dtype=float)
+    squeeze = values.ndim == 1
+    if squeeze:
+        values = values[:, None]
+    n_periods, n_series = values.shape
+
+    if mode == 'multiplicative':
+        with np.errstate(invalid='ignore', divide='ignore'):
+            x = np.log(np.where(values > 0, values, np.nan))
+    elif mode == 'additive':
+        x = values
+    else:
+        raise ValueError(f"mode は 'multiplicative' か 'additive' を指定してください: {mode!r}")
+
+    # トレンド（前後6か月は求まらない）
+    trend = np.full_like(x, np.nan)
+    if n_periods >= len(TREND_WEIGHTS):
+        trend[6:-6] = sliding_window_view(x, len(TREND_WEIGHTS), axis=0) @ TREND_WEIGHTS
+
+    # トレンド除去後の値を [年 × 月 × 系列] に並べ替え
+    lead = start_month - 1
+    n_years = -(-(lead + n_periods) // 12)
+    tail = n_years * 12 - lead - n_periods
+    detrended = np.pad(x - trend, [(lead, tail), (0, 0)], constant_values=np.nan)
+    detrended = detrended.reshape(n_years, 12, n_series)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        if seasonal_window is None:
+            seasonal = np.broadcast_to(np.nanmean(detrended, axis=0), detrended.shape).copy()
+        else:
+            seasonal = _nan_moving_average(detrended, seasonal_window)
+        # 各年の12か月平均が0になるよう正規化
+        seasonal -= np.nanmean(seasonal, axis=1, keepdims=True)
+
+    seasonal = seasonal.reshape(n_years * 12, n_series)[lead:lead + n_periods]
+    seasonal[np.isnan(x)] = np.nan
+    adjusted = x - seasonal
+    irregular = adjusted - trend
+
+    result = {'trend': trend, 'seasonal': seasonal, 'irregular': irregular, 'adjusted': adjusted}
+    if mode == 'multiplicative':
+        result = {name: np.exp(component) for name, component in result.items()}
+    if squeeze:
+        result = {name: component[:, 0] for name, component in result.items()}
+    return result
+
+
+class SeasonalCache:
+    """系列ごとの季節分解結果のキャッシュ（.npz）"""
+
+    def __init__(self, directory=None):
+        self.directory = CACHE_DIR / 'seasonal' if directory is None else directory
+
+    def key(self, code, vintage, period, params):
+        text = json.dumps([code, vintage, period, params], ensure_ascii=False, sort_keys=True)
+        return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+    def load(self, key):
+        path = self.directory / f'{key}.npz'
+        if not path.exists():
+            return None
+        with np.load(path) as data:
+            return {name: data[name] for name in COMPONENTS}
+
+    def save(self, key, components):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        np.savez(self.directory / f'{key}.npz', **components)
+
+
+def seasonally_adjust(df, columns, codes=None, vintage=None, mode='multiplicative',
+                      seasonal_window=5, cache=None, components=False):
+    """
+    DataFrame の月次系列を一括で季節調整
+
+    Parameters
+    ----------
+    df : 'date' 列（月の序数・日付）またはインデックス（PeriodIndex・DatetimeIndex）で期が
+         わかる、連続した月次の DataFrame
+    columns : 季節調整する列名のリスト
+    codes : 各列の系列コード（キャッシュキーに使う。省略時は列名）
+    vintage : データの版（例: 最終更新日）。指定したときだけキャッシュを使う
+    cache : SeasonalCache（省略時は既定の置き場所）
+    components : True なら成分ごとの DataFrame の辞書を返す
+
+    Returns
+    -------
+    季節調整値の DataFrame（df と同じ行・columns の列）。
+    そのまま前年比や交易条件の計算に使える。
+    """
+    months = periods.as_ordinals(df['date'] if 'date' in df else df.index)
+    if len(months) > 1 and not (np.diff(months) == 1).all():
+        raise ValueError("季節調整には欠けのない連続した月次データが必要です")
+
+    columns = list(columns)
+    codes = columns if codes is None else list(codes)
+    params = {'mode': mode, 'seasonal_window': seasonal_window}
+    period = periods.format(months[[0, -1]], 'M', '%Y/%m').tolist() if len(months) else []
+    if vintage is not None and cache is None:
+        cache = SeasonalCache()
+
+    results = {}
+    keys = {}
+    if vintage is not None:
+        for column, code in zip(columns, codes):
+            keys[column] = cache.key(code, vintage, period, params)
+            cached = cache.load(keys[column])
+            if cached is not None:
+                results[column] = cached
+
+    pending = [c for c in columns if c not in results]
+    if pending:
+        computed = decompose(df[pending].to_numpy(dtype=float), start_month=periods.month(months[0]),
+                             mode=mode, seasonal_window=seasonal_window)
+        for i, column in enumerate(pending):
+            results[column] = {name: computed[name][:, i] for name in COMPONENTS}
+            if vintage is not None:
+                cache.save(keys[column], results[column])
+
+    frames = {
+        name: pd.DataFrame({c: results[c][name] for c in columns}, index=df.index)
+        for name in COMPONENTS
+    }
+    return frames if components else frames['adjusted']
@@ -0,0 +1,536 @@
+"""
+分析結果の静的サイトの生成
+
+各フォルダの Markdown のレポート・プレゼン資料を HTML のページにし、グラフ画像と
+単独の HTML（visualization.html など）とあわせて1つの静的サイト（既定は _site/）にまとめる。
+ページにはカタログ・派生系列（common.derived）の系列をインタラクティブなグラフ
+（Chart.js）として載せる。
+
+- 系列のデータは系列ごとに1つの JSON（assets/data/<系列コード>.<ハッシュ>.json）で、
+  同じ系列を使うページはすべて同じファイルを参照する。画像も内容のハッシュ付きの名前で1回だけ置く
+- 系列の JSON は派生系列の版（データファイルの更新日時と式）が変わったときだけ作り直す
+- ページは入力（Markdown・参照する系列と画像のファイル名・ページの一覧・このモジュール）の
+  キーが前回と同じなら生成しない。書き込みは内容が変わったファイルだけ（common.output.write_if_changed）
+- 参照されなくなった系列・画像のファイルは削除する
+
+企業物価指数の月次更新のあとに生成し直すと、変わるのは CGPI の系列の JSON と、
+それを参照するページだけになる。
+
+コマンドラインから（リポジトリのルートで）:
+    python -m common.site                  # _site/ を生成・更新
+    python -m http.server -d _site 8000    # ブラウザで確認（グラフの JSON は file:// では読めない）
+"""
+
+import argparse
+import hashlib
+import html
+import json
+import re
+import sys
+from collections import Counter, namedtuple
+from pathlib import Path
+
+import numpy as np
+
+from common import CACHE_DIR, REPO_ROOT, periods
+from common.derived import Graph
+from common.output import UNCHANGED, WRITTEN, content_hash, write_if_changed, write_text
+
+DEFAULT_OUT = REPO_ROOT / '_site'
+
+STATE_DIR = CACHE_DIR / 'site'
+
+# ページの定義
+#   source : Markdown（リポジトリのルートからの相対パス）
+#   charts : ページに載せるインタラクティブなグラフ
+Page = namedtuple('Page', 'slug title source charts')
+
+# グラフの定義
+#   series : 系列コード（カタログまたは派生系列。同じ頻度のもの）
+#   kind : Chart.js のグラフの種類（'line'・'bar'）
+Chart = namedtuple('Chart', 'title series kind', defaults=('line',))
+
+PAGES = [
+    Page('cgpi', '輸出入物価指数', '企業物価指数/presentation.md', (
+        Chart('輸出・輸入物価指数（円ベース）', ('cgpi.export_index', 'cgpi.import_index')),
+        Chart('輸出・輸入物価指数の前年比', ('cgpi.export_yoy', 'cgpi.import_yoy')),
+    )),
+    Page('terms-of-trade', '交易条件', '企業物価指数/terms_of_trade_analysis.md', (
+        Chart('交易条件', ('cgpi.terms_of_trade',)),
+        Chart('交易条件の前年同月比', ('cgpi.tot_yoy',)),
+    )),
+    Page('gdp-interest', '名目GDPと長期金利', 'GDP推移/analysis_report.md', (
+        Chart('名目GDP', ('gdp.nominal',)),
+        Chart('長期金利', ('gdp.long_rate',)),
+    )),
+    Page('deficit', '一般政府の資金過不足', 'government_deficit_gdp_analysis/presentation.md', (
+        Chart('資金過不足の名目GDP比', ('deficit.gdp_ratio',)),
+        Chart('一般政府資金過不足', ('deficit.balance',), 'bar'),
+    )),
+    Page('deflators', 'GDPデフレーターと消費支出デフレーター',
+         'GDPデフレーターと消費支出デフレーター/プレゼン資料.md', (
+             Chart('デフレーター', ('deflator.gdp', 'deflator.consumption')),
+             Chart('デフレーターの差（消費支出 − GDP）', ('deflator.gap',)),
+         )),
+    Page('supplementary-budget', '補正予算', '最近の補正予算/分析レポート.md', (
+        Chart('補正予算額・繰越額（年度の合計）', ('budget.supplementary', 'budget.carryover'), 'bar'),
+    )),
+    Page('price-level', '物価水準変化の内訳', '物価水準変化の内訳/分析レポート.md', ()),
+    Page('securities', '証券投資の推移', 'securities_investment/analysis.md', ()),
+]
+
+# そのまま載せる単独の HTML
+STANDALONE = ['GDP推移/visualization.html', 'securities_investment/securities_investment_chart.html']
+
+CHART_JS = 'https://cdn.jsdelivr.net/npm/chart.js@4.4.1/dist/chart.umd.min.js'
+
+CSS = '''\
+body { margin: 0; font-family: 'Hiragino Sans', 'Noto Sans JP', 'Segoe UI', sans-serif; color: #2c3e50; }
+.layout { display: flex; min-height: 100vh; }
+nav { flex: 0 0 240px; background: #f4f6f8; padding: 24px 16px; border-right: 1px solid #dde3e8; }
+nav a { display: block; padding: 6px 8px; color: #2c3e50; text-decoration: none; border-radius: 4px; }
+nav a.current, nav a:hover { background: #dde8f3; }
+nav h2 { font-size: 0.9em; color: #7f8c8d; margin: 20px 8px 6px; }
+main { flex: 1; max-width: 960px; padding: 24px 40px; line-height: 1.7; }
+table { border-collapse: collapse; margin: 16px 0; }
+th, td { border: 1px solid #dde3e8; padding: 4px 10px; }
+th { background: #f4f6f8; }
+img { max-width: 100%; }
+pre { background: #f4f6f8; padding: 12px; overflow-x: auto; line-height: 1.3; }
+code { background: #f4f6f8; padding: 0 3px; }
+blockquote { margin: 0; padding: 0 16px; border-left: 4px solid #dde3e8; color: #555; }
+.chart { margin: 24px 0; }
+.chart h3 { margin-bottom: 8px; }
+'''
+
+SITE_JS = '''\
+const COLORS = ['#2E86AB', '#A23B72', '#F18F01', '#27AE60', '#8E44AD'];
+
+async function drawChart(canvas) {
+  const series = await Promise.all(
+    canvas.dataset.series.split(' ').map((url) => fetch(url).then((r) => r.json())));
+  const labels = [...new Set(series.flatMap((s) => s.labels))].sort();
+  const datasets = series.map((s, i) => {
+    const values = new Map(s.labels.map((label, j) => [label, s.values[j]]));
+    return {
+      label: `${s.description}（${s.unit}）`,
+      data: labels.map((label) => (values.has(label) ? values.get(label) : null)),
+      borderColor: COLORS[i % COLORS.length],
+      backgroundColor: COLORS[i % COLORS.length],
+      borderWidth: 1.5,
+      pointRadius: 0,
+      spanGaps: true,
+    };
+  });
+  new Chart(canvas, {
+    type: canvas.dataset.kind,
+    data: { labels, datasets },
+    options: {
+      interaction: { mode: 'index', intersect: false },
+      scales: { x: { ticks: { maxTicksLimit: 12 } } },
+    },
+  });
+}
+
+document.querySelectorAll('canvas[data-series]').forEach(drawChart);
+'''
+
+PAGE_TEMPLATE = '''\
+<!DOCTYPE html>
+<html lang="ja">
+<head>
+<meta charset="UTF-8">
+<meta name="viewport" content="width=device-width, initial-scale=1.0">
+<title>{title}</title>
+<link rel="stylesheet" href="assets/site.css">
+</head>
+<body>
+<div class="layout">
+<nav>
+{nav}
+</nav>
+<main>
+{body}
+</main>
+</div>
+{scripts}
+</body>
+</html>
+'''
+
+# ページの生成結果
+RENDERED = 'rendered'
+SKIPPED = 'skipped'
+
+
+# ---- Markdown
+
+_HEADING = re.compile(r'^(#{1,6})\s+(.*?)\s*#*\s*$')
+_RULE = re.compile(r'^\s*([-*_])(\s*\1){2,}\s*$')
+_TABLE_SEPARATOR = re.compile(r'^\s*\|?\s*:?-+:?\s*(\|\s*:?-+:?\s*)*\|?\s*$')
+_LIST_ITEM = re.compile(r'^(\s*)([-*+]|\d+[.)])\s+(.*)$')
+_IMAGE = re.compile(r'!\[([^\]]*)\]\(([^)\s]+)\)')
+_LINK = re.compile(r'\[([^\]]+)\]\(([^)\s]+)\)')
+_COMMENT = re.compile(r'^\s*<!--.*-->\s*$')
+_URL = re.compile(r'(?<![">])(https?://[^\s<>()（）、。]+)')
+
+
+def _attr(value):
+    return html.escape(value, quote=True)
+
+
+def heading_id(text):
+    """見出しのアンカー（GitHub と同じく記号を除き、空白をハイフンにする）"""
+    text = re.sub(r'[`*_~]|\[([^\]]*)\]\([^)]*\)', r'\1', text).strip().lower()
+    return re.sub(r'\s', '-', re.sub(r'[^\w\- ]', '', text))
+
+
+def _inline(text, resolve):
+    parts = re.split(r'(`[^`]+`)', text)
+    result = []
+    for part in parts:
+        if part.startswith('`') and part.endswith('`') and len(part) > 1:
+            result.append(f'<code>{html.escape(part[1:-1])}</code>')
+            continue
+        part = html.escape(part, quote=False)
+        part = _IMAGE.sub(lambda m: f'<img src="{_attr(resolve("image", html.unescape(m[2])))}" '
+                                    f'alt="{_attr(html.unescape(m[1]))}" loading="lazy">', part)
+        part = _LINK.sub(lambda m: f'<a href="{_attr(resolve("link", html.unescape(m[2])))}">{m[1]}</a>', part)
+        part = _URL.sub(r'<a href="\1">\1</a>', part)
+        part = re.sub(r'\*\*(.+?)\*\*', r'<strong>\1</strong>', part)
+        part = re.sub(r'(?<![\w*])\*(?!\s)(.+?)(?<!\s)\*(?![\w*])', r'<em>\1</em>', part)
+        part = re.sub(r'~~(.+?)~~', r'<del>\1</del>', part)
+        result.append(part)
+    return ''.join(result)
+
+
+def _cells(line):
+    line = line.strip()
+    if line.startswith('|'):
+        line = line[1:]
+    if line.endswith('|'):
+        line = line[:-1]
+    return [cell.strip() for cell in line.split('|')]
+
+
+def _table(lines, resolve):
+    header, aligns = _cells(lines[0]), []
+    for cell in _cells(lines[1]):
+        left, right = cell.startswith(':'), cell.endswith(':')
+        aligns.append(' style="text-align: center"' if left and right else
+                      ' style="text-align: right"' if right else '')
+    out = ['<table>', '<thead><tr>']
+    out += [f'<th{aligns[i] if i < len(aligns) else ""}>{_inline(c, resolve)}</th>' for i, c in enumerate(header)]
+    out.append('</tr></thead>')
+    out.append('<tbody>')
+    for line in lines[2:]:
+        cells = _cells(line)
+        out.append('<tr>' + ''.join(f'<td{aligns[i] if i < len(aligns) else ""}>{_inline(c, resolve)}</td>'
+                                    for i, c in enumerate(cells)) + '</tr>')
+    out.append('</tbody></table>')
+    return '\n'.join(out)
+
+
+def _list(lines, resolve):
+    base = len(_LIST_ITEM.match(lines[0])[1])
+    ordered = _LIST_ITEM.match(lines[0])[2][0].isdigit()
+    items = []
+    for line in lines:
+        m = _LIST_ITEM.match(line)
+        if m and len(m[1]) <= base:
+            items.append([m[3], []])
+        else:
+            items[-1][1].append(line)
+    tag = 'ol' if ordered else 'ul'
+    out = [f'<{tag}>']
+    for text, children in items:
+        nested = next((i for i, line in enumerate(children) if _LIST_ITEM.match(line)), len(children))
+        text = ' '.join([text] + [line.strip() for line in children[:nested] if line.strip()])
+        inner = _list(children[nested:], resolve) if nested < len(children) else ''
+        out.append(f'<li>{_inline(text, resolve)}{inner}</li>')
+    out.append(f'</{tag}>')
+    return '\n'.join(out)
+
+
+def _starts_block(lines, i):
+    line = lines[i]
+    return bool(line.startswith('```') or _HEADING.match(line) or _RULE.match(line) or line.startswith('>')
+                or _LIST_ITEM.match(line) or _COMMENT.match(line)
+                or (line.lstrip().startswith('|') and i + 1 < len(lines) and _TABLE_SEPARATOR.match(lines[i + 1])))
+
+
+def markdown_to_html(text, resolve=None):
+    """
+    Markdown（見出し・段落・リスト・表・コード・引用・区切り線・強調・リンク・画像）を HTML にする
+
+    1行の HTML コメント（common.reports の領域の印など）は出力しない。
+
+    resolve(kind, target) は画像（kind='image'）とリンク（'link'）の参照先を書き換える関数。
+    """
+    resolve = resolve or (lambda kind, target: target)
+    lines = text.splitlines()
+    out, i, n = [], 0, len(lines)
+    while i < n:
+        line = lines[i]
+        if not line.strip() or _COMMENT.match(line):
+            i += 1
+        elif line.startswith('```'):
+            end = next((j for j in range(i + 1, n) if lines[j].startswith('```')), n)
+            out.append(f'<pre><code>{html.escape(chr(10).join(lines[i + 1:end]))}</code></pre>')
+            i = end + 1
+        elif m := _HEADING.match(line):
+            level = len(m[1])
+            out.append(f'<h{level} id="{_attr(heading_id(m[2]))}">{_inline(m[2], resolve)}</h{level}>')
+            i += 1
+        elif _RULE.match(line):
+            out.append('<hr>')
+            i += 1
+        elif line.lstrip().startswith('|') and i + 1 < n and _TABLE_SEPARATOR.match(lines[i + 1]):
+            end = next((j for j in range(i + 2, n) if not lines[j].lstrip().startswith('|')), n)
+            out.append(_table(lines[i:end], resolve))
+            i = end
+        elif line.startswith('>'):
+            end = next((j for j in range(i, n) if not lines[j].startswith('>')), n)
+            quoted = '\n'.join(re.sub(r'^> ?', '', l) for l in lines[i:end])
+            out.append(f'<blockquote>\n{markdown_to_html(quoted, resolve)}\n</blockquote>')
+            i = end
+        elif _LIST_ITEM.match(line):
+            end = i + 1
+            while end < n:
+                if lines[end].strip() and (_LIST_ITEM.match(lines[end]) or lines[end].startswith((' ', '\t'))):
+                    end += 1
+                elif (not lines[end].strip() and end + 1 < n and lines[end + 1].strip()
+                      and (lines[end + 1].startswith((' ', '\t')) or _LIST_ITEM.match(lines[end + 1]))):
+                    end += 1
+                else:
+                    break
+            out.append(_list([l for l in lines[i:end] if l.strip()], resolve))
+            i = end
+        else:
+            end = i + 1
+            while end < n and lines[end].strip() and not _starts_block(lines, end):
+                end += 1
+            out.append(f'<p>{_inline(chr(10).join(l.strip() for l in lines[i:end]), resolve)}</p>')
+            i = end
+    return '\n'.join(out)
+
+
+# ---- 生成
+
+def _short_hash(data):
+    return content_hash(data)[:10]
+
+
+def _series_json(series):
+    """系列の JSON（期の表示・値。欠損と無限大は null）"""
+    freq = 'M' if series.index.freqstr.startswith('M') else 'Y'
+    values = series.to_numpy(dtype=float)
+    return {
+        'labels': periods.format(periods.from_index(series.index), freq).tolist(),
+        'values': [float(v) if np.isfinite(v) else None for v in values],
+    }
+
+
+class SiteBuilder:
+    """
+    サイトの生成器
+
+    Parameters
+    ----------
+    out : 出力先のフォルダ
+    pages : Page のリスト（省略時は PAGES）
+    force : True ならキーが前回と同じページも生成する（書き込みは内容が変わったファイルだけ）
+    """
+
+    def __init__(self, out=DEFAULT_OUT, pages=None, standalone=None, force=False):
+        self.out = Path(out)
+        self.pages = PAGES if pages is None else pages
+        self.standalone = STANDALONE if standalone is None else standalone
+        self.force = force
+        self.graph = Graph()
+        key = hashlib.sha256(str(self.out.resolve()).encode()).hexdigest()[:12]
+        self.state_path = STATE_DIR / f'{key}.json'
+        self.state = json.loads(self.state_path.read_text(encoding='utf-8')) if self.state_path.exists() else {}
+        self.files = Counter()
+        self.page_status = {}
+        self._new_state = {'series': {}, 'images': {}, 'pages': {}}
+        self._generated = set()
+
+    def _write(self, relative, data):
+        status = write_if_changed(self.out / relative, data)
+        self.files[status] += 1
+        self._generated.add(relative)
+        return status
+
+    def _keep(self, relative):
+        """前回のまま残すファイル（書き込まない）"""
+        if (self.out / relative).exists():
+            self._generated.add(relative)
+            return True
+        return False
+
+    def series_asset(self, code):
+        """系列の JSON のパス（版が前回と同じなら読み込まずに前回のファイルを使う）"""
+        if code in self._new_state['series']:
+            return self._new_state['series'][code][1]
+        fingerprint = self.graph.fingerprint(code)
+        previous = self.state.get('series', {}).get(code)
+        if previous and previous[0] == fingerprint and self._keep(previous[1]):
+            asset = previous[1]
+        else:
+            from common.catalog import SERIES
+            from common.derived import EXPRESSIONS
+
+            spec = SERIES.get(code) or EXPRESSIONS[code]
+            data = {'code': code, 'unit': spec.unit, 'description': spec.description,
+                    **_series_json(self.graph.get(code))}
+            body = json.dumps(data, ensure_ascii=False, separators=(',', ':'), allow_nan=False).encode('utf-8')
+            asset = f'assets/data/{code}.{_short_hash(body)}.json'
+            self._write(asset, body)
+        self._new_state['series'][code] = [fingerprint, asset]
+        return asset
+
+    def file_asset(self, path, directory):
+        """画像などのファイルを内容のハッシュ付きの名前で置く（更新日時と大きさが前回と同じなら読まない）"""
+        relative = path.relative_to(REPO_ROOT).as_posix()
+        if relative in self._new_state['images']:
+            return self._new_state['images'][relative][2]
+        stat = path.stat()
+        previous = self.state.get('images', {}).get(relative)
+        if previous and previous[:2] == [stat.st_mtime_ns, stat.st_size] and self._keep(previous[2]):
+            asset = previous[2]
+        else:
+            data = path.read_bytes()
+            asset = f'{directory}/{path.stem}.{_short_hash(data)}{path.suffix}'
+            self._write(asset, data)
+        self._new_state['images'][relative] = [stat.st_mtime_ns, stat.st_size, asset]
+        return asset
+
+    def _image(self, source_dir, target):
+        path = (source_dir / target).resolve()
+        # ブラウザ向けには common.images のロスレス WebP があればそれを使う
+        webp = path.with_suffix('.webp')
+        if path.suffix == '.png' and webp.exists():
+            path = webp
+        if not path.exists() or not path.is_relative_to(REPO_ROOT):
+            return target
+        return self.file_asset(path, 'assets/img')
+
+    def _link(self, source_dir, target, pages_by_source):
+        if re.match(r'^[a-z]+:|^#', target):
+            return target
+        path, _, anchor = target.partition('#')
+        resolved = (source_dir / path).resolve()
+        if resolved in pages_by_source:
+            return f'{pages_by_source[resolved]}.html' + (f'#{anchor}' if anchor else '')
+        return target
+
+    def _nav(self, current):
+        css = ' class="current"' if current == 'index' else ''
+        links = [f'<a href="index.html"{css}>トップ</a>', '<h2>レポート</h2>']
+        for page in self.pages:
+            css = ' class="current"' if page.slug == current else ''
+            links.append(f'<a href="{page.slug}.html"{css}>{html.escape(page.title)}</a>')
+        links.append('<h2>単独のグラフ</h2>')
+        for source in self.standalone:
+            links.append(f'<a href="standalone/{Path(source).name}">{html.escape(Path(source).stem)}</a>')
+        return '\n'.join(links)
+
+    def build_page(self, page, pages_by_source, template_key):
+        """1ページを生成する（入力のキーが前回と同じなら省略）"""
+        source = REPO_ROOT / page.source
+        text = source.read_text(encoding='utf-8')
+        charts = [(chart, [self.series_asset(code) for code in chart.series]) for chart in page.charts]
+        images = {target: self._image(source.parent, target) for _, target in _IMAGE.findall(text)}
+        key = content_hash(json.dumps([template_key, page.slug, page.title, content_hash(text.encode('utf-8')),
+                                       [assets for _, assets in charts], images,
+                                       [(p.slug, p.title) for p in self.pages], self.standalone],
+                                      ensure_ascii=False).encode('utf-8'))
+        relative = f'{page.slug}.html'
+        self._new_state['pages'][page.slug] = key
+        if not self.force and self.state.get('pages', {}).get(page.slug) == key and self._keep(relative):
+            self.page_status[page.slug] = SKIPPED
+            return SKIPPED
+
+        def resolve(kind, target):
+            if kind == 'image':
+                return images.get(target, target)
+            return self._link(source.parent, target, pages_by_source)
+
+        body = [markdown_to_html(text, resolve)]
+        if charts:
+            body.append('<hr>\n<h2 id="interactive-charts">データ（インタラクティブなグラフ）</h2>')
+            for chart, assets in charts:
+                body.append(f'<div class="chart"><h3>{html.escape(chart.title)}</h3>'
+                            f'<canvas data-series="{_attr(" ".join(assets))}" data-kind="{chart.kind}"></canvas></div>')
+        body.append(f'<p><small>元の資料: {html.escape(page.source)}</small></p>')
+        scripts = (f'<script src="{CHART_JS}"></script>\n<script src="assets/site.js"></script>'
+                   if charts else '')
+        document = PAGE_TEMPLATE.format(title=html.escape(page.title), nav=self._nav(page.slug),
+                                        body='\n'.join(body), scripts=scripts)
+        self._write(relative, document.encode('utf-8'))
+        self.page_status[page.slug] = RENDERED
+        return RENDERED
+
+    def build_index(self):
+        items = [f'<li><a href="{p.slug}.html">{html.escape(p.title)}</a>'
+                 f'（{html.escape(p.source)}）</li>' for p in self.pages]
+        items += [f'<li><a href="standalone/{Path(s).name}">{html.escape(Path(s).name)}</a>'
+                  f'（{html.escape(s)}）</li>' for s in self.standalone]
+        body = '<h1>日本経済の分析</h1>\n<ul>\n' + '\n'.join(items) + '\n</ul>'
+        document = PAGE_TEMPLATE.format(title='日本経済の分析', nav=self._nav('index'), body=body, scripts='')
+        self._write('index.html', document.encode('utf-8'))
+
+    def build(self):
+        """
+        サイトを生成する
+
+        Returns
+        -------
+        {'pages': {slug: RENDERED・SKIPPED}, 'files': {WRITTEN・UNCHANGED: 件数}, 'removed': 削除した件数}
+        """
+        template_key = content_hash(Path(__file__).read_bytes())
+        pages_by_source = {(REPO_ROOT / p.source).resolve(): p.slug for p in self.pages}
+        self._write('assets/site.css', CSS.encode('utf-8'))
+        self._write('assets/site.js', SITE_JS.encode('utf-8'))
+        for page in self.pages:
+            self.build_page(page, pages_by_source, template_key)
+        self.build_index()
+        for source in self.standalone:
+            path = REPO_ROOT / source
+            if path.exists():
+                self._write(f'standalone/{path.name}', path.read_bytes())
+
+        removed = 0
+        for relative in set(self.state.get('files', [])) - self._generated:
+            stale = self.out / relative
+            if stale.exists():
+                stale.unlink()
+                removed += 1
+        self._new_state['files'] = sorted(self._generated)
+        write_text(self.state_path, json.dumps(self._new_state, ensure_ascii=False, indent=1))
+        return {'pages': dict(self.page_status), 'files': dict(self.files), 'removed': removed}
+
+
+def build(out=DEFAULT_OUT, force=False):
+    return SiteBuilder(out, force=force).build()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m common.site', description='分析結果の静的サイトの生成')
+    parser.add_argument('-o', '--out', type=Path, default=DEFAULT_OUT, help='出力先のフォルダ')
+    parser.add_argument('--force', action='store_true', help='すべてのページを生成し直す')
+    args = parser.parse_args(argv)
+
+    result = build(args.out, args.force)
+    pages = Counter(result['pages'].values())
+    print(f'{args.out}: ページ {pages[RENDERED]} 件を生成、{pages[SKIPPED]} 件は前回のまま'
+          f'（書き込み {result["files"].get(WRITTEN, 0)} 件・変更なし {result["files"].get(UNCHANGED, 0)} 件・'
+          f'削除 {result["removed"]} 件）')
+    for slug, status in result['pages'].items():
+        print(f'  {status:8s} {slug}.html')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
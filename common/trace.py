@@ -0,0 +1,507 @@
+"""
+スクリプトの段階別の処理時間・メモリ計測
+
+分析スクリプトを書き換えずに、読み込み（load）・加工（transform）・
+描画（plot）・保存（save）の各段階の経過時間・CPU時間・ピークメモリを記録する。
+
+- load: pandas の read_* と、リポジトリ内のファイルの読み込み（open から close まで）
+- save: savefig・DataFrame.to_* と、リポジトリ内のファイルへの書き込み
+  （出力ファイルごとに1レコード。pyplot.savefig が保存後に行う再描画を含む）
+- plot: Figure の作成から savefig までの描画処理と tight_layout
+- transform: 上記以外（計算・集計など）
+
+メモリは区間終了時の常駐メモリ（RSS）とプロセスの最大 RSS を常に記録する。
+--tracemalloc を付けると区間ごとの Python のピーク確保量も記録するが、
+描画が数倍遅くなるため時間の比較には使わないこと。
+
+記録は1区間1行の JSON Lines で .cache/trace/ に保存し、report で
+プロジェクト全体の遅い段階を順位付けして表示する。
+
+使い方（リポジトリのルートで）:
+    python -m common.trace run                         # 全スクリプトを計測
+    python -m common.trace run --tracemalloc           # 区間ごとのピークメモリも計測
+    python -m common.trace run 企業物価指数/analyze_terms_of_trade.py
+    python -m common.trace report                      # 直近の計測結果の集計
+"""
+
+import argparse
+import builtins
+import contextlib
+import functools
+import json
+import os
+import re
+import runpy
+import sys
+import time
+import tracemalloc
+import traceback
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+
+from common import CACHE_DIR, REPO_ROOT
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+TRACE_DIR = CACHE_DIR / 'trace'
+
+STAGES = ('load', 'transform', 'plot', 'save')
+
+# 計測対象外のディレクトリ（スクリプトではないもの）
+EXCLUDED_DIRS = {'common', 'benchmarks'}
+
+# 記録する区間外（transform・plot）の時間の最小値（秒）
+MIN_SEGMENT = 0.001
+
+_MB = 1024 * 1024
+
+
+def _rss_mb():
+    """現在の常駐メモリ（MB、取得できなければ None）"""
+    try:
+        with _original_open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / _MB
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _max_rss_mb():
+    """プロセス開始以降の最大常駐メモリ（MB）"""
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage / _MB if sys.platform == 'darwin' else usage / 1024
+
+
+def _relative(path):
+    """リポジトリ内のパスはルートからの相対パスに、それ以外はそのまま"""
+    try:
+        return Path(os.path.abspath(path)).relative_to(REPO_ROOT).as_posix()
+    except (TypeError, ValueError):
+        return str(path)
+
+
+class Tracer:
+    """
+    区間（span）の計測と記録
+
+    計測区間は入れ子にしない（最も外側の区間だけを記録する）。
+    区間の外の時間は、その時点の既定の段階（transform か plot）として記録する。
+    """
+
+    def __init__(self, trace_path, memory=False):
+        self.trace_path = Path(trace_path)
+        self.memory = memory
+        self.script = None
+        self.records = []
+        self._depth = 0
+        self._ambient = 'transform'
+        self._segment = None
+        self._origin = None
+
+    # ---- 区間の開始・終了
+
+    def _mark(self):
+        if self.memory:
+            tracemalloc.reset_peak()
+        return time.perf_counter(), time.process_time()
+
+    def _record(self, stage, label, mark, path=None):
+        wall = time.perf_counter() - mark[0]
+        record = {
+            'script': self.script,
+            'stage': stage,
+            'label': label,
+            'path': path,
+            'start': round(mark[0] - self._origin, 6),
+            'wall': wall,
+            'cpu': time.process_time() - mark[1],
+            'peak_traced_mb': tracemalloc.get_traced_memory()[1] / _MB if self.memory else None,
+            'rss_mb': _rss_mb(),
+            'max_rss_mb': _max_rss_mb(),
+        }
+        self.records.append(record)
+        return record
+
+    def _close_segment(self):
+        # フックの呼び出しが連続したときの、ほぼ0秒の区間は記録しない
+        if self._segment is not None and time.perf_counter() - self._segment[0] >= MIN_SEGMENT:
+            self._record(self._ambient, self._ambient, self._segment)
+        self._segment = None
+
+    def begin(self, stage, label, path=None):
+        """区間を開始し、終了時に end() に渡すトークンを返す（入れ子の内側では None）"""
+        self._depth += 1
+        if self._depth > 1:
+            return None
+        self._close_segment()
+        return stage, label, None if path is None else _relative(path), self._mark()
+
+    def end(self, token, ambient=None):
+        self._depth -= 1
+        if token is None:
+            return
+        stage, label, path, mark = token
+        self._record(stage, label, mark, path)
+        if ambient is not None:
+            self._ambient = ambient
+        self._segment = self._mark()
+
+    def set_ambient(self, stage):
+        """区間の外の時間の段階を切り替える（Figure の作成時に plot へ）"""
+        if self._depth == 0 and stage != self._ambient:
+            self._close_segment()
+            self._ambient = stage
+            self._segment = self._mark()
+
+    # ---- スクリプト単位
+
+    def start_script(self, script):
+        self.script = script
+        self._depth = 0
+        self._ambient = 'transform'
+        self._origin = time.perf_counter()
+        self._segment = self._mark()
+
+    def finish_script(self, status, error=None):
+        self._close_segment()
+        self._depth = 0
+        script_records = [r for r in self.records if r['script'] == self.script]
+        summary = {
+            'script': self.script,
+            'stage': 'total',
+            'label': status,
+            'path': None,
+            'start': 0.0,
+            'wall': time.perf_counter() - self._origin,
+            'cpu': sum(r['cpu'] for r in script_records),
+            'peak_traced_mb': max((r['peak_traced_mb'] or 0 for r in script_records), default=0)
+                              if self.memory else None,
+            'rss_mb': _rss_mb(),
+            'max_rss_mb': _max_rss_mb(),
+            'error': error,
+        }
+        self.records.append(summary)
+        self.flush()
+
+    def flush(self):
+        self.trace_path.parent.mkdir(parents=True, exist_ok=True)
+        with _original_open(self.trace_path, 'a', encoding='utf-8') as f:
+            for record in self.records:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self.records = []
+
+
+# ---- ライブラリ関数へのフック
+
+_original_open = builtins.open
+_tracer = None
+
+
+def _traced(stage, label, path_arg=0, ambient=None):
+    """関数呼び出しを1区間として記録するデコレータ（path_arg 番目の引数を入出力パスとする）"""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _tracer is None:
+                return func(*args, **kwargs)
+            path = args[path_arg] if len(args) > path_arg else None
+            if not isinstance(path, (str, os.PathLike)):
+                path = None
+            token = _tracer.begin(stage, label, path)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _tracer.end(token, ambient)
+        wrapper.__wrapped_by_trace__ = True
+        return wrapper
+    return decorate
+
+
+@contextlib.contextmanager
+def span(stage, label, path=None, ambient=None):
+    """
+    with 文の範囲を1区間として記録する（計測中でなければ何もしない）
+
+    メモリ上で作った内容をまとめて書き込む保存処理（common.output）が、出力ファイルのパスを
+    付けて記録するために使う。内側の savefig・to_csv は入れ子になるため別には記録しない。
+    """
+    if _tracer is None:
+        yield
+        return
+    token = _tracer.begin(stage, label, path)
+    try:
+        yield
+    finally:
+        _tracer.end(token, ambient)
+
+
+class _TracedFile:
+    """open() の戻り値をラップし、close までを1区間として記録する"""
+
+    def __init__(self, file, token):
+        self._file = file
+        self._token = token
+
+    def _finish(self):
+        if self._token is not False and _tracer is not None:
+            _tracer.end(self._token)
+            self._token = False
+
+    def close(self):
+        try:
+            return self._file.close()
+        finally:
+            self._finish()
+
+    def __enter__(self):
+        self._file.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            return self._file.__exit__(*exc)
+        finally:
+            self._finish()
+
+    def __iter__(self):
+        return iter(self._file)
+
+    def __next__(self):
+        return next(self._file)
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+
+def _traced_open(file, mode='r', *args, **kwargs):
+    handle = _original_open(file, mode, *args, **kwargs)
+    if _tracer is None or not isinstance(file, (str, os.PathLike)):
+        return handle
+    path = os.path.abspath(file)
+    if not path.startswith(str(REPO_ROOT)) or path.startswith(str(CACHE_DIR)):
+        return handle
+    stage = 'load' if set(mode) <= {'r', 'b', 't'} else 'save'
+    return _TracedFile(handle, _tracer.begin(stage, 'open', path))
+
+
+def install(tracer):
+    """pandas・matplotlib・open にフックを設定"""
+    global _tracer
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import pandas as pd
+    from matplotlib.figure import Figure
+
+    _tracer = tracer
+    if getattr(pd.read_csv, '__wrapped_by_trace__', False):
+        return
+
+    for name in ('read_csv', 'read_excel', 'read_json', 'read_parquet'):
+        if hasattr(pd, name):
+            setattr(pd, name, _traced('load', name)(getattr(pd, name)))
+    for cls in (pd.DataFrame, pd.Series):
+        for name in ('to_csv', 'to_json', 'to_excel', 'to_html', 'to_parquet'):
+            if hasattr(cls, name):
+                setattr(cls, name, _traced('save', name)(getattr(cls, name)))
+
+    Figure.savefig = _traced('save', 'savefig', path_arg=1, ambient='transform')(Figure.savefig)
+    plt.savefig = _traced('save', 'savefig', ambient='transform')(plt.savefig)
+    Figure.tight_layout = _traced('plot', 'tight_layout')(Figure.tight_layout)
+    original_init = Figure.__init__
+
+    @functools.wraps(original_init)
+    def figure_init(self, *args, **kwargs):
+        if _tracer is not None:
+            _tracer.set_ambient('plot')
+        original_init(self, *args, **kwargs)
+
+    Figure.__init__ = figure_init
+    builtins.open = _traced_open
+
+
+def uninstall():
+    global _tracer
+    _tracer = None
+    builtins.open = _original_open
+
+
+# ---- スクリプトの検出と実行
+
+def _imported_modules(path):
+    text = path.read_text(encoding='utf-8')
+    return set(re.findall(r'^\s*(?:from|import)\s+([A-Za-z_]\w*)', text, flags=re.MULTILINE))
+
+
+def discover_scripts(root=REPO_ROOT):
+    """
+    計測対象のスクリプト一覧
+
+    各フォルダ直下の .py のうち、同じフォルダの他のファイルから import されている
+    モジュール（budget_ledger.py など）を除いたもの。
+    """
+    scripts = []
+    for folder in sorted(p for p in root.iterdir() if p.is_dir()):
+        if folder.name in EXCLUDED_DIRS or folder.name.startswith('.'):
+            continue
+        files = sorted(folder.glob('*.py'))
+        libraries = set()
+        for path in files:
+            libraries |= _imported_modules(path)
+        scripts += [p for p in files if p.stem not in libraries]
+    return scripts
+
+
+def _working_directory(script):
+    """スクリプト内のパスがフォルダ名から始まっていればルート、そうでなければスクリプトのフォルダ"""
+    text = script.read_text(encoding='utf-8')
+    folder = script.parent.name
+    return REPO_ROOT if re.search(rf"['\"]{re.escape(folder)}/", text) else script.parent
+
+
+def run_scripts(scripts, trace_path, memory=False):
+    """スクリプトを順に実行して計測し、(スクリプト, 状態) のリストを返す"""
+    import matplotlib
+    import matplotlib.pyplot as plt
+
+    tracer = Tracer(trace_path, memory=memory)
+    install(tracer)
+    if memory:
+        tracemalloc.start()
+    statuses = []
+    cwd = os.getcwd()
+    try:
+        for script in scripts:
+            script = Path(script).resolve()
+            name = _relative(script)
+            print(f'▶ {name}', flush=True)
+            saved_path = list(sys.path)
+            sys.path.insert(0, str(script.parent))
+            os.chdir(_working_directory(script))
+            tracer.start_script(name)
+            status, error = 'ok', None
+            try:
+                with matplotlib.rc_context():
+                    runpy.run_path(str(script), run_name='__main__')
+            except SystemExit as exc:
+                if exc.code not in (None, 0):
+                    status, error = 'error', f'SystemExit({exc.code})'
+            except Exception as exc:
+                status, error = 'error', f'{type(exc).__name__}: {exc}'
+                traceback.print_exc()
+            finally:
+                tracer.finish_script(status, error)
+                plt.close('all')
+                os.chdir(cwd)
+                sys.path[:] = saved_path
+            statuses.append((name, status))
+    finally:
+        if memory:
+            tracemalloc.stop()
+        uninstall()
+    return statuses
+
+
+# ---- 集計
+
+def load_trace(paths):
+    records = []
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            records += [json.loads(line) for line in f if line.strip()]
+    return records
+
+
+def latest_trace():
+    traces = sorted(TRACE_DIR.glob('*.jsonl'))
+    return traces[-1] if traces else None
+
+
+def _mb(value):
+    return '-' if value is None else f'{value:.1f}'
+
+
+def summarize(records, top=20):
+    """計測結果の集計レポート（テキスト）"""
+    spans = [r for r in records if r['stage'] != 'total']
+    totals = [r for r in records if r['stage'] == 'total']
+    lines = []
+
+    lines.append(f'=== 遅い処理 上位{top}件 ===')
+    lines.append(f'{"wall[s]":>8} {"cpu[s]":>8} {"peak[MB]":>9}  {"stage":<9} script / label / path')
+    for r in sorted(spans, key=lambda r: -r['wall'])[:top]:
+        target = r['label'] + (f" → {r['path']}" if r['path'] else '')
+        lines.append(f'{r["wall"]:8.3f} {r["cpu"]:8.3f} {_mb(r["peak_traced_mb"]):>9}  '
+                     f'{r["stage"]:<9} {r["script"]} / {target}')
+
+    lines.append('\n=== 段階別の合計 ===')
+    by_stage = defaultdict(lambda: [0.0, 0.0, 0])
+    for r in spans:
+        by_stage[r['stage']][0] += r['wall']
+        by_stage[r['stage']][1] += r['cpu']
+        by_stage[r['stage']][2] += 1
+    total_wall = sum(v[0] for v in by_stage.values()) or 1.0
+    for stage, (wall, cpu, count) in sorted(by_stage.items(), key=lambda kv: -kv[1][0]):
+        lines.append(f'{stage:<9} {wall:8.3f}s ({wall / total_wall * 100:5.1f}%)  cpu {cpu:8.3f}s  {count}区間')
+
+    lines.append('\n=== スクリプト別 ===')
+    header = f'{"total[s]":>8} ' + ' '.join(f'{s:>9}' for s in STAGES) + f' {"peak[MB]":>9} {"maxRSS":>8}  script'
+    lines.append(header)
+    by_script = defaultdict(lambda: defaultdict(float))
+    for r in spans:
+        by_script[r['script']][r['stage']] += r['wall']
+    for t in sorted(totals, key=lambda r: -r['wall']):
+        stages = ' '.join(f'{by_script[t["script"]].get(s, 0.0):9.3f}' for s in STAGES)
+        status = '' if t['label'] == 'ok' else f'  [{t["label"]}: {t.get("error")}]'
+        lines.append(f'{t["wall"]:8.3f} {stages} {_mb(t["peak_traced_mb"]):>9} '
+                     f'{_mb(t["max_rss_mb"]):>8}  {t["script"]}{status}')
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m common.trace',
+                                     description='スクリプトの段階別の処理時間・メモリ計測')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='スクリプトを実行して計測')
+    run_parser.add_argument('scripts', nargs='*', type=Path,
+                            help='計測するスクリプト（省略時は全スクリプト）')
+    run_parser.add_argument('--tracemalloc', action='store_true',
+                            help='区間ごとのピークメモリを tracemalloc で計測（処理は遅くなる）')
+    run_parser.add_argument('--output', type=Path, default=None, help='計測結果の出力先（.jsonl）')
+    run_parser.add_argument('--top', type=int, default=20)
+
+    report_parser = commands.add_parser('report', help='計測結果の集計')
+    report_parser.add_argument('traces', nargs='*', type=Path,
+                               help='計測結果ファイル（省略時は直近のもの）')
+    report_parser.add_argument('--top', type=int, default=20)
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        scripts = args.scripts or discover_scripts()
+        output = args.output or TRACE_DIR / f'{datetime.now().strftime("%Y%m%d_%H%M%S")}.jsonl'
+        statuses = run_scripts(scripts, output, memory=args.tracemalloc)
+        print()
+        print(summarize(load_trace([output]), top=args.top))
+        print(f'\nTrace saved: {_relative(output)}')
+        return 1 if any(status != 'ok' for _, status in statuses) else 0
+
+    traces = args.traces or [latest_trace()]
+    if traces[0] is None:
+        print('計測結果がありません。先に run を実行してください。')
+        return 1
+    print(summarize(load_trace(traces), top=args.top))
+    return 0
+
+
+if __name__ == '__main__':
+    # python -m では、このファイルは common.trace とは別のモジュール（__main__）として読み込まれる。
+    # common.output の span と計測の状態を共有するため、common.trace の main を呼ぶ
+    from common.trace import main as _main
+    sys.exit(_main())
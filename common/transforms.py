@@ -0,0 +1,265 @@
+"""
+系列の変換（前年比・前期比・対数差分・累積変化・差・比・基準期換算）
+
+ndarray（1次元、または2次元で列が系列）・Series・DataFrame・リストを受け取り、
+リストは ndarray、それ以外は同じ型で返す。複数の系列は列としてまとめて1回で計算する。
+
+変換は T から連鎖して組み立てる（例: 交易条件の前年同月比）:
+
+    from common.transforms import T
+
+    tot_yoy = T.ratio().yoy(12)(export_index, import_index)
+
+連鎖した変換は1つの作業用配列の上で in-place の ufunc として順に計算し、途中の結果の
+配列・Series は作らない。key（系列コードと版など）を渡すと、結果を (key, 変換) ごとに
+LRU でメモ化する。
+1つの変換だけなら関数形式（yoy(x, 12)・spread(a, b) など）も使える。
+
+各変換の定義（p は1以上の整数の期数、前方の p 期と起点より前は NaN。0 で割った値は inf・NaN）:
+    pct_change(p) / yoy(p) / mom() : (x / x[-p] - 1) * 100
+    diff(p)                        : x - x[-p]
+    logdiff(p)                     : (log x - log x[-p]) * 100
+    cumulative()                   : (x / 最初の値 - 1) * 100（列ごとに最初の欠損でない値）
+    rebased(rows)                  : x / mean(x[rows]) * 100（rows は基準期の行位置）
+    spread()                       : x - 次の入力
+    ratio(scale=100)               : x / 次の入力 * scale
+    scale(k)                       : x * k
+"""
+
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# メモ化する結果の件数
+MEMO_SIZE = 256
+
+# 入力を1つ追加で使う変換
+BINARY = {'spread', 'ratio'}
+
+
+def _lag(periods):
+    """差を取る期数（1以上の整数）"""
+    lag = int(periods)
+    if lag != periods or lag < 1:
+        raise ValueError(f'期数は1以上の整数で指定してください: {periods!r}')
+    return lag
+
+
+class Chain:
+    """変換の連鎖（不変。メソッドは1段加えた新しい Chain を返す）"""
+
+    def __init__(self, steps=()):
+        self.steps = tuple(steps)
+
+    def _then(self, op, *args):
+        return Chain(self.steps + ((op,) + args,))
+
+    def pct_change(self, periods=1):
+        return self._then('pct_change', _lag(periods))
+
+    def yoy(self, periods=12):
+        """前年比（periods は1年の期数: 月次 12・四半期 4・年次 1）"""
+        return self.pct_change(periods)
+
+    def mom(self):
+        """前期比"""
+        return self.pct_change(1)
+
+    def diff(self, periods=1):
+        return self._then('diff', _lag(periods))
+
+    def logdiff(self, periods=1):
+        return self._then('logdiff', _lag(periods))
+
+    def cumulative(self):
+        return self._then('cumulative')
+
+    def rebased(self, rows):
+        """rows: 基準期の行位置（整数の並び、またはブール配列）"""
+        rows = np.asarray(rows)
+        if rows.dtype == bool:
+            rows = np.flatnonzero(rows)
+        return self._then('rebased', tuple(int(r) for r in rows))
+
+    def spread(self):
+        return self._then('spread')
+
+    def ratio(self, scale=100):
+        return self._then('ratio', float(scale))
+
+    def scale(self, k):
+        return self._then('scale', float(k))
+
+    @property
+    def key(self):
+        """メモ化のキー（'ratio(100.0)|pct_change(12)' の形）"""
+        return '|'.join(f'{op}({",".join(map(str, args))})' for op, *args in self.steps)
+
+    @property
+    def arity(self):
+        """必要な入力の数"""
+        return 1 + sum(op in BINARY for op, *_ in self.steps)
+
+    def __call__(self, *inputs, key=None):
+        return evaluate(self, *inputs, key=key)
+
+    def __repr__(self):
+        return f'T.{".".join(self.key.split("|"))}' if self.steps else 'T'
+
+
+T = Chain()
+
+
+# ---- 計算
+
+def _as_array(x):
+    if isinstance(x, (pd.Series, pd.DataFrame)):
+        return x.to_numpy(dtype=float)
+    return np.asarray(x, dtype=float)
+
+
+def _lagged(buf, periods, combine):
+    """buf[p:] = combine(buf[p:], buf[:-p])、先頭 p 期は NaN（重なりは numpy が処理する）"""
+    if periods >= len(buf):
+        buf[:] = np.nan
+        return
+    combine(buf[periods:], buf[:-periods], out=buf[periods:])
+    buf[:periods] = np.nan
+
+
+def _first_valid(buf):
+    if buf.ndim == 1:
+        valid = np.flatnonzero(~np.isnan(buf))
+        return buf[valid[0]] if len(valid) else np.nan
+    has = ~np.isnan(buf)
+    first = has.argmax(axis=0)
+    return np.where(has.any(axis=0), buf[first, np.arange(buf.shape[1])], np.nan)
+
+
+def _run(steps, buf, operands):
+    operands = iter(operands)
+    for op, *args in steps:
+        if op == 'pct_change':
+            with np.errstate(divide='ignore', invalid='ignore'):
+                _lagged(buf, args[0], np.divide)
+            buf -= 1
+            buf *= 100
+        elif op == 'diff':
+            _lagged(buf, args[0], np.subtract)
+        elif op == 'logdiff':
+            with np.errstate(divide='ignore', invalid='ignore'):
+                np.log(buf, out=buf)
+            _lagged(buf, args[0], np.subtract)
+            buf *= 100
+        elif op == 'cumulative':
+            with np.errstate(divide='ignore', invalid='ignore'):
+                buf /= _first_valid(buf)
+            buf -= 1
+            buf *= 100
+        elif op == 'rebased':
+            with np.errstate(divide='ignore', invalid='ignore'):
+                base = np.nanmean(buf[list(args[0])], axis=0) if args[0] else np.nan
+                buf /= base
+            buf *= 100
+        elif op == 'spread':
+            np.subtract(buf, next(operands), out=buf)
+        elif op == 'ratio':
+            with np.errstate(divide='ignore', invalid='ignore'):
+                np.divide(buf, next(operands), out=buf)
+            buf *= args[0]
+        elif op == 'scale':
+            buf *= args[0]
+        else:
+            raise ValueError(f'未対応の変換: {op}')
+    return buf
+
+
+def _wrap(result, like):
+    if isinstance(like, pd.Series):
+        return pd.Series(result, index=like.index, name=like.name)
+    if isinstance(like, pd.DataFrame):
+        return pd.DataFrame(result, index=like.index, columns=like.columns)
+    return result
+
+
+_memo = OrderedDict()
+
+
+def evaluate(chain, *inputs, key=None):
+    """
+    変換の連鎖を計算する
+
+    Parameters
+    ----------
+    chain : Chain
+    inputs : 最初の系列と、spread・ratio が順に使う系列（2次元なら列ごとに対応）
+    key : メモ化のキー（系列コードと版など、入力の内容が変われば変わるもの）。省略時はメモ化しない
+
+    Returns
+    -------
+    最初の入力と同じ型（Series・DataFrame はインデックス・列名も引き継ぐ）
+    """
+    if len(inputs) != chain.arity:
+        raise ValueError(f'{chain!r} には入力が {chain.arity} 個必要です（{len(inputs)} 個）')
+    if key is None:
+        return _wrap(_compute(chain, inputs), inputs[0])
+    memo_key = (key, chain.key)
+    result = _memo.get(memo_key)
+    if result is None:
+        result = _compute(chain, inputs)
+        result.flags.writeable = False
+        _memo[memo_key] = result
+        if len(_memo) > MEMO_SIZE:
+            _memo.popitem(last=False)
+    else:
+        _memo.move_to_end(memo_key)
+    return _wrap(result.copy(order='K'), inputs[0])
+
+
+def _compute(chain, inputs):
+    # 作業用配列は入力のメモリ順（DataFrame なら列優先）のまま複製し、戻すときの並べ替えを避ける
+    arrays = [_as_array(x) for x in inputs]
+    return _run(chain.steps, arrays[0].copy(order='K'), arrays[1:])
+
+
+def clear_memo():
+    _memo.clear()
+
+
+# ---- 関数形式
+
+def pct_change(x, periods=1):
+    return T.pct_change(periods)(x)
+
+
+def yoy(x, periods=12):
+    return T.yoy(periods)(x)
+
+
+def mom(x):
+    return T.mom()(x)
+
+
+def diff(x, periods=1):
+    return T.diff(periods)(x)
+
+
+def logdiff(x, periods=1):
+    return T.logdiff(periods)(x)
+
+
+def cumulative(x):
+    return T.cumulative()(x)
+
+
+def rebased(x, rows):
+    return T.rebased(rows)(x)
+
+
+def spread(a, b):
+    return T.spread()(a, b)
+
+
+def ratio(a, b, scale=100):
+    return T.ratio(scale)(a, b)
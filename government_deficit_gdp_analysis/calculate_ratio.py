@@ -1,7 +1,13 @@
 import pandas as pd
-import matplotlib.pyplot as plt
 import matplotlib
 import numpy as np
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common.catalog import column_metadata
+from common.figures import new_figure
+from common.output import save_figure, save_table
 
 # 日本語フォントの設定
 matplotlib.rcParams['font.family'] = 'DejaVu Sans'
@@ -32,8 +38,12 @@ df['名目GDP_億円'] = df['名目GDP_兆円'] * 10000
 # 資金過不足/名目GDP比を計算（%表示）
 df['資金過不足GDP比_%'] = (df['一般政府資金過不足_億円'] / df['名目GDP_億円']) * 100
 
-# 結果を保存
-df.to_csv('government_deficit_gdp_ratio.csv', index=False, encoding='utf-8-sig')
+# 結果を保存（Parquet も。列に系列コードと単位を付ける）
+columns = column_metadata('deficit')
+columns['名目GDP_億円'] = {'series': 'deficit.nominal_gdp_oku', 'unit': '億円', 'description': '名目GDP（年度）'}
+save_table(df, 'government_deficit_gdp_ratio.csv', encoding='utf-8-sig', index=False,
+           period_columns={'年度': 'FY'}, columns=columns,
+           metadata={'title': '一般政府資金過不足の名目GDP比', 'source': '日本銀行 資金循環統計、内閣府 国民経済計算'})
 
 print("計算結果:")
 print(df[['年度', '一般政府資金過不足_億円', '名目GDP_兆円', '資金過不足GDP比_%']].head(10))
@@ -41,7 +51,7 @@ print("\n...")
 print(df[['年度', '一般政府資金過不足_億円', '名目GDP_兆円', '資金過不足GDP比_%']].tail(5))
 
 # グラフの作成
-fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 10))
+fig, (ax1, ax2) = new_figure(2, 1, figsize=(12, 10))
 
 # グラフ1: 一般政府の資金過不足の推移
 ax1.plot(df['年度'], df['一般政府資金過不足_億円']/10000, marker='o', linewidth=2, markersize=4)
@@ -61,8 +71,8 @@ ax2.set_title('General Government Financial Surplus/Deficit as % of Nominal GDP'
 ax2.grid(True, alpha=0.3)
 ax2.set_xlim(1980, 2024)
 
-plt.tight_layout()
-plt.savefig('government_deficit_gdp_ratio.png', dpi=300, bbox_inches='tight')
+fig.tight_layout()
+save_figure(fig, 'government_deficit_gdp_ratio.png', dpi=300, bbox_inches='tight')
 print("\nグラフを保存しました: government_deficit_gdp_ratio.png")
 
 # 統計情報
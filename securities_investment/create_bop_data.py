@@ -17,10 +17,16 @@
 - ネット（純証券投資）: 対外 - 対内
 """
 
-import csv
 import random
+import sys
 from datetime import datetime
 from calendar import monthrange
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common.output import save_table
 
 # シード設定（再現性のため）
 random.seed(42)
@@ -117,15 +123,17 @@ for date in date_range:
         'ネット証券投資（十億円）': round(net, 1)
     })
 
-# CSVファイルとして保存
+# CSVファイル（CRLF）と Parquet として保存
 csv_path = 'securities_investment_data.csv'
-with open(csv_path, 'w', newline='', encoding='utf-8-sig') as csvfile:
-    fieldnames = ['年月', '対外証券投資_資産（十億円）', '対内証券投資_負債（十億円）', 'ネット証券投資（十億円）']
-    writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-
-    writer.writeheader()
-    for row in data:
-        writer.writerow(row)
+descriptions = {
+    '対外証券投資_資産（十億円）': '対外証券投資（資産）',
+    '対内証券投資_負債（十億円）': '対内証券投資（負債）',
+    'ネット証券投資（十億円）': 'ネット証券投資（対外 − 対内）',
+}
+save_table(pd.DataFrame(data), csv_path, encoding='utf-8-sig', index=False, lineterminator='\r\n',
+           period_columns={'年月': 'M'},
+           columns={name: {'unit': '十億円', 'description': text} for name, text in descriptions.items()},
+           metadata={'title': '証券投資（国際収支統計、月次）', 'source': '財務省・日本銀行 国際収支統計（推計値）'})
 
 print(f"データを作成しました: {csv_path}")
 print(f"\nデータ期間: {data[0]['年月']} ～ {data[-1]['年月']}")
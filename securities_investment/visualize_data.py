@@ -7,6 +7,12 @@ HTMLファイルにChart.jsを使用したインタラクティブグラフを
 
 import csv
 import json
+import re
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common.output import write_text
 
 # CSVファイルからデータを読み込む
 data = []
@@ -22,6 +28,13 @@ with open('securities_investment_data.csv', 'r', encoding='utf-8-sig') as csvfil
 
 # データをJavaScript形式に変換
 labels = [row['年月'] for row in data]
+
+# 収録期間（'2020年01月' 形式の年月を (年, 月) にして最初と最後の月を求める。
+# このスクリプトは標準ライブラリだけで動かすため common.periods（numpy/pandas）は使わない）
+months = [tuple(map(int, re.match(r'(\d{4})年(\d{1,2})月', label).groups())) for label in labels]
+(first_year, first_month), (last_year, last_month) = min(months), max(months)
+year_range = f"{first_year}年～{last_year}年"
+month_range = f"{first_year}年{first_month}月～{last_year}年{last_month}月"
 outward_data = [row['対外証券投資_資産（十億円）'] for row in data]
 inward_data = [row['対内証券投資_負債（十億円）'] for row in data]
 net_data = [row['ネット証券投資（十億円）'] for row in data]
@@ -32,7 +45,7 @@ html_content = f"""<!DOCTYPE html>
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>証券投資の推移（2020年～2024年）</title>
+    <title>証券投資の推移（{year_range}）</title>
     <script src="https://cdn.jsdelivr.net/npm/chart.js@3.9.1/dist/chart.min.js"></script>
     <style>
         body {{
@@ -116,7 +129,7 @@ html_content = f"""<!DOCTYPE html>
 <body>
     <div class="container">
         <h1>国際収支統計：証券投資の推移</h1>
-        <div class="subtitle">2020年1月～2024年11月（月次データ）</div>
+        <div class="subtitle">{month_range}（月次データ）</div>
 
         <div class="warning-box">
             <strong>⚠ 金融収支の解釈について</strong><br>
@@ -347,9 +360,8 @@ html_content = f"""<!DOCTYPE html>
 </html>
 """
 
-# HTMLファイルを保存
-with open('securities_investment_chart.html', 'w', encoding='utf-8') as f:
-    f.write(html_content)
+# HTMLファイルを保存（内容が変わらなければ書き込まない）
+status = write_text('securities_investment_chart.html', html_content)
 
-print("グラフを作成しました: securities_investment_chart.html")
+print(f"グラフを作成しました: securities_investment_chart.html ({status})")
 print("ブラウザで開いて確認してください。")
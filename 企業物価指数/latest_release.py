@@ -0,0 +1,38 @@
+"""
+最新公表月の速報サマリー
+
+直近24か月の輸出入物価指数・交易条件とその前年同月比を表示する。
+ファイルの末尾から直近24か月と前年同月比の計算に必要な12か月だけを読むため、
+収録期間が長くなっても処理時間はほぼ変わらない。
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common import periods
+from common.catalog import source_path
+from common.cgpi import load_cgpi, vintage
+from common.transforms import T
+
+RECENT_MONTHS = 24
+YOY_LOOKBACK = 12
+
+data_df, meta = load_cgpi(source_path('cgpi'), tail=RECENT_MONTHS, lookback=YOY_LOOKBACK)
+print(f"データの版（最終更新日）: {vintage(meta)}")
+
+# 交易条件と前年同月比（analyze_terms_of_trade.py と同じ式）
+data_df['terms_of_trade'] = T.ratio()(data_df['export_index'], data_df['import_index'])
+data_df['tot_yoy'] = T.yoy(12)(data_df['terms_of_trade'])
+recent = data_df.tail(RECENT_MONTHS).copy()
+
+latest = recent.iloc[-1]
+print(f"\n=== 最新公表月: {periods.format(recent['date'].iloc[-1], 'M', '%Y年%m月')} ===")
+print(f"輸出物価指数: {latest['export_index']:.1f}（前年同月比 {latest['export_yoy']:+.1f}%）")
+print(f"輸入物価指数: {latest['import_index']:.1f}（前年同月比 {latest['import_yoy']:+.1f}%）")
+print(f"交易条件: {latest['terms_of_trade']:.2f}（前年同月比 {latest['tot_yoy']:+.2f}%）")
+
+print(f"\n=== 直近{RECENT_MONTHS}か月 ===")
+recent['date'] = periods.format(recent['date'], 'M', '%Y/%m')
+print(recent[['date', 'export_index', 'import_index', 'export_yoy', 'import_yoy',
+              'terms_of_trade', 'tot_yoy']].to_string(index=False))
@@ -0,0 +1,58 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common import periods
+from common.catalog import source_path
+from common.cgpi import load_cgpi, vintage
+from common.derived import EXPRESSIONS
+from common.output import save_table
+from common.seasonal import seasonally_adjust
+from common.transforms import T
+
+# CSVファイルの読み込み（メタデータから系列コードと版を取得）
+data_df, meta = load_cgpi(source_path('cgpi'))
+data_version = vintage(meta)
+print(f"データの版（最終更新日）: {data_version}")
+
+# 指数系列を一括で季節調整（前年比系列は対象外）
+index_columns = ['domestic_index', 'summer_adj', 'export_index', 'import_index', 'chain_index']
+components = seasonally_adjust(data_df, index_columns, codes=meta.loc[index_columns, 'code'],
+                               vintage=data_version, components=True)
+adjusted = components['adjusted']
+
+# 季節調整値から交易条件と前年同月比を計算（既存の計算と同じ式）
+sa_df = pd.DataFrame({'date': data_df['date']})
+for col in index_columns:
+    sa_df[f'{col}_sa'] = adjusted[col]
+sa_df['terms_of_trade_sa'] = T.ratio()(sa_df['export_index_sa'], sa_df['import_index_sa'])
+sa_df['tot_yoy_sa'] = T.yoy(12)(sa_df['terms_of_trade_sa'])
+
+# 季節性の大きさ（季節指数の振れ幅、直近5年）
+print("\n=== 季節指数の振れ幅（直近5年、%）===")
+recent_seasonal = components['seasonal'].tail(60)
+for col in index_columns:
+    amplitude = (recent_seasonal[col].max() - recent_seasonal[col].min()) * 100
+    print(f"{meta.loc[col, 'name']}: {amplitude:.2f}%")
+
+# 最近のデータ
+print("\n=== 季節調整後の交易条件（直近12ヶ月）===")
+recent = sa_df.tail(12).copy()
+recent['date'] = periods.format(recent['date'], 'M', '%Y/%m')
+print(recent[['date', 'export_index_sa', 'import_index_sa', 'terms_of_trade_sa', 'tot_yoy_sa']].to_string(index=False))
+
+# 季節調整済みデータをCSVに保存
+export_df = sa_df.copy()
+export_df['date'] = periods.format(export_df['date'], 'M', '%Y/%m')
+columns = {f'{col}_sa': {'series': meta.loc[col, 'code'], 'unit': '2020=100',
+                         'description': f"{meta.loc[col, 'name']}（季節調整済み）"}
+           for col in index_columns}
+for col, name in (('terms_of_trade_sa', 'cgpi.terms_of_trade'), ('tot_yoy_sa', 'cgpi.tot_yoy')):
+    columns[col] = {'unit': EXPRESSIONS[name].unit, 'description': f'{EXPRESSIONS[name].description}（季節調整済み）'}
+status = save_table(export_df, 'cgpi_seasonally_adjusted.csv', index=False,
+                    period_columns={'date': 'M'}, columns=columns,
+                    metadata={'title': '企業物価指数の季節調整値', 'source': '日本銀行 企業物価指数',
+                              'vintage': data_version})
+print(f"\n季節調整データ保存: cgpi_seasonally_adjusted.csv ({status})")
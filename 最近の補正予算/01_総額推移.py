@@ -1,6 +1,15 @@
-import matplotlib.pyplot as plt
+import os
+import sys
+from pathlib import Path
+import matplotlib
 import numpy as np
-plt.rcParams['font.sans-serif'] = ['DejaVu Sans']
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common.figures import new_figure
+from common.output import save_figure
+matplotlib.rcParams['font.sans-serif'] = ['DejaVu Sans']
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
 # Data for supplementary budgets (FY2016-2024)
 years = ['FY2016', 'FY2017', 'FY2018', 'FY2019', 'FY2020\n1st', 'FY2020\n2nd', 'FY2020\n3rd',
@@ -10,7 +19,7 @@ amounts = [2.7, 2.7, 2.4, 4.5, 25.7, 31.9, 15.4, 35.9, 2.7, 28.9, 13.2, 13.9]  #
 # Color coding: Red for COVID era (2020-2021), Blue for others
 colors = ['#4A90E2'] * 4 + ['#E74C3C'] * 4 + ['#4A90E2'] * 4
 
-fig, ax = plt.subplots(figsize=(14, 8))
+fig, ax = new_figure(figsize=(14, 8))
 
 bars = ax.bar(years, amounts, color=colors, edgecolor='black', linewidth=1.5, alpha=0.8)
 
@@ -40,7 +49,8 @@ recent_avg = np.mean([2.7, 28.9, 13.2, 13.9])
 ax.axhline(y=recent_avg, color='green', linestyle='--', linewidth=2, alpha=0.6,
            label=f'Recent Avg (FY2022-2024): ¥{recent_avg:.1f}T')
 
-plt.xticks(rotation=45, ha='right')
-plt.tight_layout()
-plt.savefig('/home/user/1111202502/最近の補正予算/01_総額推移.png', dpi=300, bbox_inches='tight')
+for label in ax.get_xticklabels():
+    label.set(rotation=45, ha='right')
+fig.tight_layout()
+save_figure(fig, os.path.join(BASE_DIR, '01_総額推移.png'), dpi=300, bbox_inches='tight')
 print("Graph saved: 01_総額推移.png")
@@ -1,13 +1,22 @@
-import matplotlib.pyplot as plt
+import os
+import sys
+from pathlib import Path
+import matplotlib
 import numpy as np
-plt.rcParams['font.sans-serif'] = ['DejaVu Sans']
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common.figures import new_figure
+from common.output import save_figure
+matplotlib.rcParams['font.sans-serif'] = ['DejaVu Sans']
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
 # FY2022 Supplementary Budget Execution Data
 categories = ['Executed\nin FY2022', 'Carried Over\nto FY2023', 'Unexecuted']
 amounts = [10.24, 8.62, 0.598]  # trillion yen
 colors = ['#2ECC71', '#F39C12', '#E74C3C']
 
-fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 7))
+fig, (ax1, ax2) = new_figure(1, 2, figsize=(16, 7))
 
 # Left: Pie chart
 wedges, texts, autotexts = ax1.pie(amounts, labels=categories, autopct='%1.1f%%',
@@ -51,6 +60,6 @@ ax2.set_ylim(0, 100)
 ax2.legend(loc='upper right', fontsize=11)
 ax2.grid(axis='y', alpha=0.3, linestyle='--')
 
-plt.tight_layout()
-plt.savefig('/home/user/1111202502/最近の補正予算/02_執行状況分析.png', dpi=300, bbox_inches='tight')
+fig.tight_layout()
+save_figure(fig, os.path.join(BASE_DIR, '02_執行状況分析.png'), dpi=300, bbox_inches='tight')
 print("Graph saved: 02_執行状況分析.png")
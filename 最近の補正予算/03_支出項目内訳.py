@@ -1,19 +1,46 @@
-import matplotlib.pyplot as plt
+import os
+import sys
+from pathlib import Path
+import matplotlib
 import numpy as np
-plt.rcParams['font.sans-serif'] = ['DejaVu Sans']
+from budget_ledger import BudgetLedger
 
-# FY2024 Supplementary Budget Breakdown (¥13.9T total)
-categories = [
-    'Public-Private\nInvestment',
-    'Price Support\nMeasures',
-    'Disaster Prevention &\nNational Resilience',
-    'Semiconductor &\nTech Support',
-    'Other Measures'
-]
-amounts = [3.5, 4.2, 2.8, 2.1, 1.3]  # trillion yen (estimated based on available data)
-colors = ['#3498DB', '#E74C3C', '#F39C12', '#9B59B6', '#95A5A6']
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common.figures import new_figure
+from common.output import save_figure
+matplotlib.rcParams['font.sans-serif'] = ['DejaVu Sans']
 
-fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 7))
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Line-item ledger of supplementary budgets (FY2022 2nd - FY2024)
+ledger = BudgetLedger.from_csv(os.path.join(BASE_DIR, '支出項目明細.csv'))
+
+# English labels for policy areas
+area_labels = {
+    '物価高対策': 'Price Support\nMeasures',
+    '投資促進': 'Public-Private\nInvestment',
+    '防災・減災、国土強靭化': 'Disaster Prevention &\nNational Resilience',
+    '半導体・技術支援': 'Semiconductor &\nTech Support',
+    'その他': 'Other Measures',
+}
+area_colors = {
+    '物価高対策': '#E74C3C',
+    '投資促進': '#3498DB',
+    '防災・減災、国土強靭化': '#F39C12',
+    '半導体・技術支援': '#9B59B6',
+    'その他': '#95A5A6',
+}
+
+# FY2024 Supplementary Budget Breakdown (largest first, 'Other' last)
+latest_year = ledger.labels('year')[-1]
+areas, amounts = ledger.top_n('policy_area', len(ledger.labels('policy_area')), year=latest_year)
+keep = amounts > 0
+areas = [a for a, k in zip(areas, keep) if k]
+amounts = amounts[keep]
+categories = [area_labels.get(a, a) for a in areas]
+colors = [area_colors.get(a, '#95A5A6') for a in areas]
+
+fig, (ax1, ax2) = new_figure(1, 2, figsize=(16, 7))
 
 # Left: Horizontal bar chart
 y_pos = np.arange(len(categories))
@@ -27,25 +54,34 @@ for i, (bar, amount) in enumerate(zip(bars, amounts)):
 ax1.set_yticks(y_pos)
 ax1.set_yticklabels(categories, fontsize=11)
 ax1.set_xlabel('Amount (Trillion Yen)', fontsize=13, fontweight='bold')
-ax1.set_title('FY2024 Supplementary Budget Breakdown',
+ax1.set_title(f'FY{latest_year} Supplementary Budget Breakdown',
               fontsize=14, fontweight='bold', pad=20)
 ax1.grid(axis='x', alpha=0.3, linestyle='--')
 ax1.set_xlim(0, max(amounts) * 1.2)
 
-# Right: Comparison across three years
-years = ['FY2022\n(2nd)', 'FY2023', 'FY2024']
-price_support = [8.5, 4.8, 4.2]
-investment = [12.3, 4.2, 3.5]
-disaster = [5.1, 2.1, 2.8]
-other = [3.0, 2.1, 3.4]
+# Right: Composition across budgets (top 3 policy areas + Other)
+budget_years = ledger.labels('year')
+# 年度ごとの補正の回次（第1次だけなら表示しない。複数あればすべて並べる）
+revisions = {}
+for year, revision in sorted(key for key in ledger.rollup(('year', 'revision')) if None not in key):
+    revisions.setdefault(year, []).append(revision)
+ordinals = {1: '1st', 2: '2nd', 3: '3rd'}
+years = [f'FY{y}\n({", ".join(ordinals.get(r, f"{r}th") for r in revisions[y])})'
+         if revisions[y] != [1] else f'FY{y}' for y in budget_years]
+stack_areas, data = ledger.top_n('policy_area', 3, by='year')
+short_labels = {
+    '物価高対策': 'Price Support',
+    '投資促進': 'Investment',
+    '防災・減災、国土強靭化': 'Disaster Prevention',
+    'その他': 'Other',
+}
 
 x = np.arange(len(years))
 width = 0.6
 
 bottom1 = np.zeros(len(years))
-colors_stack = ['#E74C3C', '#3498DB', '#F39C12', '#95A5A6']
-labels = ['Price Support', 'Investment', 'Disaster Prevention', 'Other']
-data = [price_support, investment, disaster, other]
+colors_stack = [area_colors.get(a, '#95A5A6') for a in stack_areas]
+labels = [short_labels.get(a, a) for a in stack_areas]
 
 for i, (d, color, label) in enumerate(zip(data, colors_stack, labels)):
     ax2.bar(x, d, width, bottom=bottom1, label=label, color=color,
@@ -62,10 +98,11 @@ ax2.legend(loc='upper right', fontsize=10)
 ax2.grid(axis='y', alpha=0.3, linestyle='--')
 
 # Add total labels
-for i, (year_total) in enumerate([28.9, 13.2, 13.9]):
-    ax2.text(i, year_total + 0.5, f'Total:\n¥{year_total}T',
+_, year_totals = ledger.breakdown('year')
+for i, (year_total) in enumerate(year_totals):
+    ax2.text(i, year_total + 0.5, f'Total:\n¥{year_total:.1f}T',
              ha='center', fontsize=10, fontweight='bold')
 
-plt.tight_layout()
-plt.savefig('/home/user/1111202502/最近の補正予算/03_支出項目内訳.png', dpi=300, bbox_inches='tight')
+fig.tight_layout()
+save_figure(fig, os.path.join(BASE_DIR, '03_支出項目内訳.png'), dpi=300, bbox_inches='tight')
 print("Graph saved: 03_支出項目内訳.png")
@@ -1,6 +1,15 @@
-import matplotlib.pyplot as plt
+import os
+import sys
+from pathlib import Path
+import matplotlib
 import numpy as np
-plt.rcParams['font.sans-serif'] = ['DejaVu Sans']
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common.figures import new_figure
+from common.output import save_figure
+matplotlib.rcParams['font.sans-serif'] = ['DejaVu Sans']
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
 # Cumulative data for supplementary budgets and execution
 years = np.array([2016, 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024])
@@ -8,7 +17,7 @@ cumulative_budget = np.array([2.7, 5.4, 7.8, 12.3, 85.3, 136.5, 174.6, 187.8, 20
 cumulative_executed = np.array([2.7, 5.2, 7.5, 11.8, 78.5, 122.3, 155.1, 165.3, 178.5])  # Cumulative executed
 unexecuted_balance = cumulative_budget - cumulative_executed
 
-fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(14, 10))
+fig, (ax1, ax2) = new_figure(2, 1, figsize=(14, 10))
 
 # Top: Cumulative supplementary budget and execution
 ax1.fill_between(years, 0, cumulative_budget, alpha=0.3, color='#3498DB', label='Cumulative Budget')
@@ -53,6 +62,6 @@ ax2.legend(loc='upper left', fontsize=11)
 ax2.grid(axis='y', alpha=0.3, linestyle='--')
 ax2.set_xlim(2015.5, 2024.5)
 
-plt.tight_layout()
-plt.savefig('/home/user/1111202502/最近の補正予算/05_残高推移.png', dpi=300, bbox_inches='tight')
+fig.tight_layout()
+save_figure(fig, os.path.join(BASE_DIR, '05_残高推移.png'), dpi=300, bbox_inches='tight')
 print("Graph saved: 05_残高推移.png")
@@ -0,0 +1,92 @@
+import os
+import sys
+from pathlib import Path
+import matplotlib
+import numpy as np
+import pandas as pd
+from fund_simulator import load_funds, simulate, percentile_bands, PROFILES
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common.figures import new_figure
+from common.output import save_figure, save_table
+matplotlib.rcParams['font.sans-serif'] = ['DejaVu Sans']
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Funds established through supplementary budgets
+funds = load_funds(os.path.join(BASE_DIR, '基金一覧.csv'))
+
+# English labels for the largest funds
+fund_labels = {
+    '半導体・デジタル産業支援基金': 'Semiconductor & Digital',
+    'GX（グリーントランスフォーメーション）基金': 'GX (Green Transformation)',
+    '教育DX基金': 'Education DX',
+    'こども・子育て支援基金': 'Child & Family Support',
+    'イノベーション促進基金': 'Innovation Promotion',
+}
+
+# Stochastic scenarios under the S-curve execution profile
+n_scenarios = 5000
+years, balance = simulate(funds, profile='s_curve', n_scenarios=n_scenarios, seed=42)
+p5, p25, p50, p75, p95 = percentile_bands(balance)
+
+# Median paths under each execution profile for comparison
+profile_medians = {}
+for name in PROFILES:
+    _, profile_balance = simulate(funds, profile=name, n_scenarios=n_scenarios, seed=42)
+    profile_medians[name] = percentile_bands(profile_balance, percentiles=(50,))[0]
+
+fig, (ax1, ax2) = new_figure(2, 1, figsize=(14, 10))
+
+# Top: Total fund balance fan chart
+ax1.fill_between(years, p5, p95, alpha=0.2, color='#3498DB', label='5-95th percentile')
+ax1.fill_between(years, p25, p75, alpha=0.4, color='#3498DB', label='25-75th percentile')
+ax1.plot(years, p50, 'o-', color='#2C3E50', linewidth=2.5, markersize=6, label='Median (S-curve)')
+
+profile_styles = {
+    'uniform': ('#2ECC71', 'Uniform'),
+    'front_loaded': ('#E74C3C', 'Front-loaded'),
+    'back_loaded': ('#F39C12', 'Back-loaded'),
+}
+for name, (color, label) in profile_styles.items():
+    ax1.plot(years, profile_medians[name], '--', color=color, linewidth=1.8,
+             label=f'Median ({label})')
+
+ax1.set_ylabel('Fund Balance (Trillion Yen)', fontsize=13, fontweight='bold')
+ax1.set_xlabel('Fiscal Year', fontsize=13, fontweight='bold')
+ax1.set_title(f'Projected Total Fund Balance ({n_scenarios:,} Stochastic Scenarios)',
+              fontsize=15, fontweight='bold', pad=20)
+ax1.legend(loc='upper right', fontsize=10)
+ax1.grid(True, alpha=0.3, linestyle='--')
+ax1.set_xlim(years[0] - 0.5, years[-1] + 0.5)
+
+# Bottom: Median balance of the largest funds
+fund_colors = ['#9B59B6', '#27AE60', '#3498DB', '#E67E22', '#E74C3C']
+largest = np.argsort(-funds['capital'], kind='stable')[:len(fund_colors)]
+for f, color in zip(largest, fund_colors):
+    name = funds['name'][f]
+    q25, q50, q75 = np.percentile(balance[:, f, :], (25, 50, 75), axis=0)
+    ax2.fill_between(years, q25, q75, alpha=0.2, color=color)
+    ax2.plot(years, q50, 'o-', color=color, linewidth=2, markersize=5,
+             label=f'{fund_labels.get(name, name)} (¥{funds["capital"][f]:.1f}T)')
+
+ax2.set_ylabel('Fund Balance (Trillion Yen)', fontsize=13, fontweight='bold')
+ax2.set_xlabel('Fiscal Year', fontsize=13, fontweight='bold')
+ax2.set_title('Median Balance of Major Funds (25-75th percentile band)',
+              fontsize=15, fontweight='bold', pad=20)
+ax2.legend(loc='upper right', fontsize=10)
+ax2.grid(True, alpha=0.3, linestyle='--')
+ax2.set_xlim(years[0] - 0.5, years[-1] + 0.5)
+
+fig.tight_layout()
+save_figure(fig, os.path.join(BASE_DIR, '06_基金残高シミュレーション.png'), dpi=300, bbox_inches='tight')
+print("Graph saved: 06_基金残高シミュレーション.png")
+
+# Save percentile bands of the total balance (CSV and Parquet)
+bands = pd.DataFrame({'年度': years, '5%点': p5, '25%点': p25, '中央値': p50, '75%点': p75, '95%点': p95})
+save_table(bands, os.path.join(BASE_DIR, '06_基金残高シミュレーション.csv'), encoding='utf-8-sig',
+           index=False, float_format='%.3f', period_columns={'年度': 'FY'},
+           columns={name: {'unit': '兆円', 'description': f'基金残高合計の{name}'} for name in bands.columns[1:]},
+           metadata={'title': '基金残高合計のシミュレーション（S字型の執行プロファイル）',
+                     'scenarios': n_scenarios, 'seed': 42})
+print("Data saved: 06_基金残高シミュレーション.csv")
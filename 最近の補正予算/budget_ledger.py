@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+補正予算 明細台帳（Budget Ledger）
+
+府省・事業レベルの補正予算明細を、次元（年度・補正回次・府省・政策分野・基金）を
+整数コード化した列指向の台帳として保持する。
+各次元についてコード順の行並びと境界（CSR形式）を事前に構築しておき、
+内訳・ロールアップ・上位N件の集計を np.bincount だけで求める。
+グラフごとに DataFrame を走査する必要はなく、数十万行でもミリ秒単位で応答する。
+
+明細CSVの形式（支出項目明細.csv）:
+    年度,補正回次,府省,政策分野,基金,事業名,金額（兆円）
+"""
+
+import csv
+
+import numpy as np
+
+# 台帳の次元（この順序でコード配列を保持する）
+DIMENSIONS = ('year', 'revision', 'ministry', 'policy_area', 'fund')
+
+# 明細CSVの列名
+CSV_COLUMNS = {
+    'year': '年度',
+    'revision': '補正回次',
+    'ministry': '府省',
+    'policy_area': '政策分野',
+    'fund': '基金',
+}
+NAME_COLUMN = '事業名'
+AMOUNT_COLUMN = '金額（兆円）'
+
+# 数値として並べる次元（それ以外は出現順にコードを振る）
+NUMERIC_DIMENSIONS = ('year', 'revision')
+
+
+class Dimension:
+    """1つの次元のラベル⇔整数コード対応と group-by インデックス"""
+
+    def __init__(self, name, labels, codes):
+        self.name = name
+        self.labels = list(labels)
+        self.lookup = {label: i for i, label in enumerate(self.labels)}
+        self.codes = np.asarray(codes, dtype=np.int32)
+
+        # コード順に並べた行番号と、各コードの開始位置
+        self.order = np.argsort(self.codes, kind='stable')
+        counts = np.bincount(self.codes, minlength=len(self.labels))
+        self.offsets = np.concatenate(([0], np.cumsum(counts)))
+
+    def __len__(self):
+        return len(self.labels)
+
+    def code(self, label):
+        """ラベルを整数コードに変換"""
+        try:
+            return self.lookup[label]
+        except KeyError:
+            raise KeyError(f"{self.name} に存在しない値です: {label!r}") from None
+
+    def rows(self, labels):
+        """指定ラベル（単一またはリスト）に該当する行番号（昇順）"""
+        if not isinstance(labels, (list, tuple, set)):
+            labels = [labels]
+        parts = []
+        for label in labels:
+            c = self.code(label)
+            parts.append(self.order[self.offsets[c]:self.offsets[c + 1]])
+        if len(parts) == 1:
+            return parts[0]
+        return np.sort(np.concatenate(parts))
+
+
+def _factorize(values, numeric):
+    """値のリストをラベル一覧と整数コード配列に変換"""
+    if numeric:
+        labels = sorted(set(values))
+    else:
+        labels = list(dict.fromkeys(values))
+    lookup = {label: i for i, label in enumerate(labels)}
+    codes = np.fromiter((lookup[v] for v in values), dtype=np.int32, count=len(values))
+    return labels, codes
+
+
+def _freeze(filters):
+    """フィルタ条件をキャッシュキーに変換"""
+    return tuple(sorted(
+        (k, tuple(v) if isinstance(v, (list, tuple, set)) else v)
+        for k, v in filters.items()
+    ))
+
+
+class BudgetLedger:
+    """整数コード化された補正予算明細台帳"""
+
+    def __init__(self, dimensions, amounts, names=None):
+        self.dimensions = dimensions
+        self.amounts = np.asarray(amounts, dtype=np.float64)
+        self.names = names
+        self._cache = {}
+
+    @classmethod
+    def from_records(cls, records):
+        """次元名・'amount'・'name'（任意）をキーに持つ辞書の列から構築"""
+        records = list(records)
+        dimensions = {}
+        for dim in DIMENSIONS:
+            values = [r[dim] for r in records]
+            labels, codes = _factorize(values, dim in NUMERIC_DIMENSIONS)
+            dimensions[dim] = Dimension(dim, labels, codes)
+        amounts = [float(r['amount']) for r in records]
+        names = [r.get('name', '') for r in records]
+        return cls(dimensions, amounts, names)
+
+    @classmethod
+    def from_csv(cls, path, encoding='utf-8-sig'):
+        """明細CSV（支出項目明細.csv 形式）から構築"""
+        with open(path, 'r', encoding=encoding, newline='') as f:
+            reader = csv.DictReader(f)
+            records = []
+            for row in reader:
+                record = {dim: row[col] for dim, col in CSV_COLUMNS.items()}
+                for dim in NUMERIC_DIMENSIONS:
+                    record[dim] = int(record[dim])
+                record['name'] = row.get(NAME_COLUMN, '')
+                record['amount'] = row[AMOUNT_COLUMN]
+                records.append(record)
+        return cls.from_records(records)
+
+    def __len__(self):
+        return len(self.amounts)
+
+    def labels(self, dim):
+        """次元のラベル一覧（コード順）"""
+        return list(self.dimensions[dim].labels)
+
+    def _rows(self, filters):
+        """フィルタ条件に該当する行番号（条件なしなら None）"""
+        if not filters:
+            return None
+        # 最も絞り込める条件の行集合から始め、残りの条件はコードで照合する
+        candidates = sorted(
+            ((self.dimensions[dim].rows(value), dim, value) for dim, value in filters.items()),
+            key=lambda item: len(item[0])
+        )
+        rows = candidates[0][0]
+        for _, dim, value in candidates[1:]:
+            if not isinstance(value, (list, tuple, set)):
+                value = [value]
+            dimension = self.dimensions[dim]
+            allowed = np.array([dimension.code(v) for v in value], dtype=np.int32)
+            rows = rows[np.isin(dimension.codes[rows], allowed)]
+        return rows
+
+    def clear_cache(self):
+        """集計結果のキャッシュを捨てる（ベンチマークで毎回集計し直すときなど）"""
+        self._cache.clear()
+
+    def _cached(self, key, compute):
+        if key not in self._cache:
+            self._cache[key] = compute()
+        return self._cache[key]
+
+    def total(self, **filters):
+        """フィルタ条件に該当する明細の合計額"""
+        def compute():
+            rows = self._rows(filters)
+            return float(self.amounts.sum() if rows is None else self.amounts[rows].sum())
+        return self._cached(('total', _freeze(filters)), compute)
+
+    def _grouped(self, dims, filters):
+        """複数次元の組合せごとの合計額を多次元配列で返す"""
+        def compute():
+            rows = self._rows(filters)
+            shape = tuple(len(self.dimensions[d]) for d in dims)
+            key = np.zeros(len(self) if rows is None else len(rows), dtype=np.int64)
+            for dim, size in zip(dims, shape):
+                codes = self.dimensions[dim].codes
+                key = key * size + (codes if rows is None else codes[rows])
+            weights = self.amounts if rows is None else self.amounts[rows]
+            sums = np.bincount(key, weights=weights, minlength=int(np.prod(shape)))
+            return sums.reshape(shape)
+        return self._cached(('grouped', tuple(dims), _freeze(filters)), compute)
+
+    def breakdown(self, dim, by=None, **filters):
+        """
+        次元別の内訳
+
+        by を指定しない場合は (ラベル一覧, 金額配列) を、
+        指定した場合は (ラベル一覧, by のラベル一覧, 金額行列[dim × by]) を返す。
+        """
+        if by is None:
+            return self.labels(dim), self._grouped((dim,), filters)
+        return self.labels(dim), self.labels(by), self._grouped((dim, by), filters)
+
+    def rollup(self, dims, **filters):
+        """
+        SQL の ROLLUP 相当の階層集計
+
+        {(ラベル, ..., None): 小計} の辞書を返す。None は集計済みの次元を表し、
+        すべて None のキーが総計になる。金額 0 の組合せは含めない。
+        """
+        dims = tuple(dims)
+        grouped = self._grouped(dims, filters)
+        labels = [self.labels(d) for d in dims]
+        result = {}
+        for level in range(len(dims), 0, -1):
+            sums = grouped.sum(axis=tuple(range(level, len(dims))))
+            padding = (None,) * (len(dims) - level)
+            for index in zip(*np.nonzero(sums)):
+                key = tuple(labels[i][j] for i, j in enumerate(index)) + padding
+                result[key] = float(sums[index])
+        result[(None,) * len(dims)] = float(grouped.sum())
+        return result
+
+    def top_n(self, dim, n, by=None, other_label='その他', **filters):
+        """
+        金額上位N件と残りの合計
+
+        other_label に該当するラベルは順位付けから除外し、残りの合計に含める。
+        (ラベル一覧, 金額) を返す。by を指定した場合の金額は [N+1 × by] の行列で、
+        順位は by 全体の合計額で決める。
+        """
+        if by is None:
+            labels, sums = self.breakdown(dim, **filters)
+            totals = sums
+        else:
+            labels, _, sums = self.breakdown(dim, by=by, **filters)
+            totals = sums.sum(axis=1)
+
+        ranked = np.argsort(-totals, kind='stable')
+        ranked = [i for i in ranked if labels[i] != other_label and totals[i] != 0]
+        top = ranked[:n]
+        rest = np.ones(len(labels), dtype=bool)
+        rest[top] = False
+
+        top_labels = [labels[i] for i in top] + [other_label]
+        values = np.concatenate([sums[top], sums[rest].sum(axis=0, keepdims=True)])
+        return top_labels, values
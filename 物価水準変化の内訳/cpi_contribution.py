@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CPI Contribution Decomposition Engine
+
+品目別ウエイトと品目別指数から、消費者物価指数（ラスパイレス式）の変化に対する
+類（費目）別の寄与度を計算する。
+
+- 期間ごとの寄与度（前期差、指数ポイント）
+- 累積寄与度（起点からの差）
+- 基準改定をまたぐ接続（リンク係数による連鎖接続）
+
+基準年ごとに [時点 × 品目] の指数行列の差分と [品目 × 類] の重み行列の積を
+1回計算するだけなので、約580品目 × 全月次でも1秒未満で再計算できる。
+
+入力ファイル:
+    cpi_weights.csv       基準年,品目コード,品目名,類,ウエイト
+    cpi_item_indices.csv  時点,基準年,<品目コード>...（各基準年の指数、基準年=100）
+
+同梱の2つのファイルは10大費目を1品目とみなした説明用の推計値（2020年基準の費目別の推移を、
+総合指数の推移 98.2 → 109.5 と累積寄与度分析.md の費目別寄与度の推定に合うように作ったもので、
+総務省統計局の実際の類別指数ではない）。実データの品目別ウエイト・
+指数に差し替えればそのまま計算できる。
+
+基準改定の接続: 新旧両基準の指数が重複する期間の最終時点における総合指数の比を
+リンク係数とし、その時点までは旧基準、それ以降は新基準の寄与度を
+リンク係数で旧基準の水準に換算して接続する（累積寄与度の合計は接続後の
+総合指数の変化に一致する）。
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def load_weights(path, encoding='utf-8'):
+    """品目別ウエイトの読み込み"""
+    weights = pd.read_csv(path, encoding=encoding, dtype={'品目コード': str})
+    weights['基準年'] = weights['基準年'].astype(int)
+    return weights
+
+
+def load_item_indices(path, encoding='utf-8'):
+    """品目別指数（時点 × 品目の横持ち）の読み込み"""
+    indices = pd.read_csv(path, encoding=encoding, dtype={'時点': str})
+    indices['基準年'] = indices['基準年'].astype(int)
+    return indices
+
+
+class ContributionResult:
+    """寄与度計算の結果"""
+
+    def __init__(self, index, per_period):
+        # 接続後の総合指数（Series, 時点インデックス）
+        self.index = index
+        # 前期差の類別寄与度（DataFrame, 時点 × 類、起点は0）
+        self.per_period = per_period
+        # 起点からの累積寄与度
+        self.cumulative = per_period.cumsum()
+
+    @property
+    def categories(self):
+        return list(self.per_period.columns)
+
+    @property
+    def periods(self):
+        return list(self.per_period.index)
+
+    def between(self, start, end):
+        """start から end までの類別寄与度（指数ポイント）"""
+        return self.cumulative.loc[end] - self.cumulative.loc[start]
+
+    def rates(self, start=None, end=None):
+        """寄与率（%）: 各類の寄与度が総合指数の変化に占める割合（総合指数が変わらなければ NaN）"""
+        start = self.periods[0] if start is None else start
+        end = self.periods[-1] if end is None else end
+        contributions = self.between(start, end)
+        total = contributions.sum()
+        if np.isclose(total, 0.0):
+            return contributions * np.nan
+        return contributions / total * 100
+
+    def change_contributions(self, lag=12):
+        """
+        lag 期前比（例: 月次なら12で前年同月比）の変化率（%）に対する類別寄与度
+
+        各行の合計が総合指数の lag 期前比変化率に一致する。
+        """
+        diff = self.cumulative - self.cumulative.shift(lag)
+        return diff.div(self.index.shift(lag), axis=0) * 100
+
+
+def _category_matrix(weights, categories):
+    """[品目 × 類] の重み行列（ウエイト / 総ウエイト）"""
+    matrix = np.zeros((len(weights), len(categories)))
+    columns = [categories.index(c) for c in weights['類']]
+    share = weights['ウエイト'].to_numpy(dtype=float)
+    matrix[np.arange(len(weights)), columns] = share / share.sum()
+    return matrix
+
+
+def compute_contributions(indices, weights):
+    """
+    品目別指数とウエイトから類別寄与度を計算
+
+    Parameters
+    ----------
+    indices : load_item_indices() の戻り値
+    weights : load_weights() の戻り値
+
+    Returns
+    -------
+    ContributionResult
+
+    2つの基準年を接続する例（2020年の総合指数の比 110 / 100 をリンク係数とする）:
+
+    >>> weights = pd.DataFrame({'基準年': [2015, 2015, 2020, 2020], '品目コード': ['a', 'b', 'a', 'b'],
+    ...                         '品目名': ['a', 'b', 'a', 'b'], '類': ['財', 'サービス', '財', 'サービス'],
+    ...                         'ウエイト': [1, 1, 1, 3]})
+    >>> indices = pd.DataFrame({'時点': ['2018', '2019', '2020', '2020', '2021'],
+    ...                         '基準年': [2015, 2015, 2015, 2020, 2020],
+    ...                         'a': [100.0, 110.0, 120.0, 100.0, 105.0],
+    ...                         'b': [100.0, 100.0, 100.0, 100.0, 102.0]})
+    >>> result = compute_contributions(indices, weights)
+    >>> result.index.round(3).tolist()
+    [100.0, 105.0, 110.0, 113.025]
+    >>> result.cumulative.iloc[-1].round(3).to_dict()
+    {'財': 11.375, 'サービス': 1.65}
+    """
+    categories = list(dict.fromkeys(weights['類']))
+    bases = sorted(weights['基準年'].unique())
+
+    segments = []
+    for base in bases:
+        base_weights = weights[weights['基準年'] == base]
+        rows = indices[indices['基準年'] == base].sort_values('時点')
+        codes = base_weights['品目コード'].tolist()
+        missing = [c for c in codes if c not in rows.columns]
+        if missing:
+            raise ValueError(f"{base}年基準の指数に存在しない品目があります: {missing[:5]}")
+        values = rows[codes].to_numpy(dtype=float)
+        if np.isnan(values).any():
+            raise ValueError(f"{base}年基準の指数に欠損値があります")
+        matrix = _category_matrix(base_weights, categories)
+        segments.append({
+            'base': base,
+            'periods': rows['時点'].to_numpy(),
+            'values': values,
+            'matrix': matrix,
+            'aggregate': values @ matrix.sum(axis=1),
+        })
+
+    # リンク係数と各基準の採用期間（重複期間の最終時点の翌時点から）
+    starts = [0]
+    links = [1.0]
+    for prev, seg in zip(segments[:-1], segments[1:]):
+        overlap = np.intersect1d(prev['periods'], seg['periods'])
+        if len(overlap) == 0:
+            raise ValueError(f"{prev['base']}年基準と{seg['base']}年基準の指数に重複期間がありません")
+        prev_at = int(np.searchsorted(prev['periods'], overlap[-1]))
+        seg_at = int(np.searchsorted(seg['periods'], overlap[-1]))
+        links.append(links[-1] * prev['aggregate'][prev_at] / seg['aggregate'][seg_at])
+        # 新基準は重複期間の最終時点を起点に差分を取る
+        starts.append(seg_at)
+
+    periods, levels, blocks = [], [], []
+    for i, seg in enumerate(segments):
+        start = starts[i]
+        stop = len(seg['periods'])
+        if i + 1 < len(segments):
+            # 次の基準との重複期間の最終時点まで採用
+            overlap_end = np.intersect1d(seg['periods'], segments[i + 1]['periods'])[-1]
+            stop = int(np.searchsorted(seg['periods'], overlap_end)) + 1
+        values = seg['values'][start:stop]
+        if i == 0:
+            blocks.append(np.zeros((1, len(categories))))
+            periods.append(seg['periods'][:1])
+            levels.append(seg['aggregate'][:1] * links[i])
+        # [時点 × 品目] の差分 × [品目 × 類] の重み行列
+        blocks.append(links[i] * (np.diff(values, axis=0) @ seg['matrix']))
+        periods.append(seg['periods'][start + 1:stop])
+        levels.append(seg['aggregate'][start + 1:stop] * links[i])
+
+    periods = np.concatenate(periods)
+    index = pd.Series(np.concatenate(levels), index=periods, name='総合')
+    per_period = pd.DataFrame(np.vstack(blocks), index=periods, columns=categories)
+    return ContributionResult(index, per_period)
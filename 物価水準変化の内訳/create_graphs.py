@@ -7,40 +7,63 @@ Visualizing CPI and category-wise contributions from 2015-2024
 
 import matplotlib
 matplotlib.use('Agg')  # Backend for non-GUI environment
-import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 import numpy as np
+import os
+import sys
+from pathlib import Path
+from cpi_contribution import load_weights, load_item_indices, compute_contributions
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common.figures import new_blank_figure
+from common.output import save_figure
 
 # Font settings
-plt.rcParams['font.family'] = 'DejaVu Sans'
-plt.rcParams['axes.unicode_minus'] = False
+matplotlib.rcParams['font.family'] = 'DejaVu Sans'
+matplotlib.rcParams['axes.unicode_minus'] = False
 
 # Graph settings
-plt.rcParams['figure.figsize'] = (14, 10)
-plt.rcParams['font.size'] = 11
-
-# Data definition
-years = [2015, 2016, 2017, 2018, 2019, 2020, 2021, 2022, 2023, 2024]
-cpi_index = [98.2, 98.5, 99.0, 100.0, 100.5, 100.0, 99.8, 102.3, 106.7, 109.5]
-cpi_change = [0, 0.3, 0.8, 1.8, 2.3, 1.8, 1.6, 4.2, 8.7, 11.5]  # Cumulative change from 2015
-
-# Cumulative contribution data by 10 major categories (estimated, 2015-2024)
-categories = ['Food', 'Utilities', 'Recreation', 'Transport/Comm', 'Housing',
-              'Misc.', 'Furniture', 'Clothing', 'Medical', 'Education']
-contributions = [4.0, 2.75, 1.35, 1.15, 0.9, 0.8, 0.6, 0.4, 0.4, 0.15]  # points
-contribution_rates = [34.8, 23.9, 11.7, 10.0, 7.8, 7.0, 5.2, 3.5, 3.5, 1.3]  # contribution rate (%)
+matplotlib.rcParams['figure.figsize'] = (14, 10)
+matplotlib.rcParams['font.size'] = 11
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Data definition: contributions computed from item-level weights and indices
+result = compute_contributions(load_item_indices(os.path.join(BASE_DIR, 'cpi_item_indices.csv')),
+                               load_weights(os.path.join(BASE_DIR, 'cpi_weights.csv')))
+years = [int(p) for p in result.periods]
+cpi_index = result.index.tolist()
+cpi_change = result.cumulative.sum(axis=1).tolist()  # Cumulative change from first year
+
+# Cumulative contribution by 10 major categories (largest first)
+category_labels = {
+    '食料': 'Food', '光熱・水道': 'Utilities', '教養娯楽': 'Recreation',
+    '交通・通信': 'Transport/Comm', '住居': 'Housing', '諸雑費': 'Misc.',
+    '家具・家事用品': 'Furniture', '被服及び履物': 'Clothing', '保健医療': 'Medical',
+    '教育': 'Education',
+}
+final = result.cumulative.iloc[-1].sort_values(ascending=False)
+categories = [category_labels.get(c, c) for c in final.index]
+contributions = final.tolist()  # points
+contribution_rates = result.rates()[final.index].tolist()  # contribution rate (%)
+total_change = cpi_change[-1]
 
 # Color definition
-colors = ['#FF6B6B', '#FFA500', '#4ECDC4', '#45B7D1', '#96CEB4',
-          '#FFEAA7', '#DDA15E', '#BC6C25', '#C9ADA7', '#9B9B9B']
+category_colors = {
+    'Food': '#FF6B6B', 'Utilities': '#FFA500', 'Recreation': '#4ECDC4',
+    'Transport/Comm': '#45B7D1', 'Housing': '#96CEB4', 'Misc.': '#FFEAA7',
+    'Furniture': '#DDA15E', 'Clothing': '#BC6C25', 'Medical': '#C9ADA7',
+    'Education': '#9B9B9B',
+}
+colors = [category_colors.get(c, '#CCCCCC') for c in categories]
 
 # Create graphs
-fig = plt.figure(figsize=(16, 12))
+fig = new_blank_figure(figsize=(16, 12))
 
 # ========================================
 # Graph 1: Overall CPI Cumulative Change (2015 base)
 # ========================================
-ax1 = plt.subplot(2, 2, 1)
+ax1 = fig.add_subplot(2, 2, 1)
 ax1.plot(years, cpi_change, marker='o', linewidth=3, markersize=8,
          color='#2C3E50', label='Cumulative Change')
 ax1.fill_between(years, 0, cpi_change, alpha=0.3, color='#3498DB')
@@ -54,7 +77,7 @@ ax1.legend(loc='upper left', fontsize=11)
 # Add data labels
 for i, (year, change) in enumerate(zip(years, cpi_change)):
     if i % 2 == 0 or i == len(years)-1:  # Every other year + final year
-        ax1.annotate(f'+{change:.1f}',
+        ax1.annotate(f'{change:+.1f}',
                     xy=(year, change),
                     xytext=(0, 10),
                     textcoords='offset points',
@@ -70,13 +93,14 @@ ax1.axvspan(2021.5, 2024, alpha=0.1, color='red', label='Surge Period')
 # ========================================
 # Graph 2: Cumulative Contribution by 10 Major Categories
 # ========================================
-ax2 = plt.subplot(2, 2, 2)
+ax2 = fig.add_subplot(2, 2, 2)
 y_pos = np.arange(len(categories))
 bars = ax2.barh(y_pos, contributions, color=colors, edgecolor='black', linewidth=1.5)
 ax2.set_yticks(y_pos)
 ax2.set_yticklabels(categories, fontsize=11)
 ax2.set_xlabel('Cumulative Contribution (points)', fontsize=12, fontweight='bold')
-ax2.set_title('Cumulative Contribution by 10 Major Categories\n(2015-2024, Total +11.5 points)',
+ax2.set_title(f'Cumulative Contribution by {len(categories)} Major Categories\n'
+              f'({years[0]}-{years[-1]}, Total {total_change:+.1f} points)',
               fontsize=14, fontweight='bold', pad=15)
 ax2.grid(True, axis='x', alpha=0.3)
 ax2.invert_yaxis()
@@ -84,21 +108,21 @@ ax2.invert_yaxis()
 # Add data labels
 for i, (bar, val, rate) in enumerate(zip(bars, contributions, contribution_rates)):
     ax2.text(val + 0.15, bar.get_y() + bar.get_height()/2,
-            f'+{val:.2f} ({rate:.1f}%)',
+            f'{val:+.2f} ({rate:.1f}%)',
             va='center', fontsize=10, fontweight='bold')
 
 # ========================================
 # Graph 3: Pie Chart (Contribution Rate Composition)
 # ========================================
-ax3 = plt.subplot(2, 2, 3)
+ax3 = fig.add_subplot(2, 2, 3)
 
 # Top 3 and others
-top3_labels = ['Food\n(33-37%)', 'Utilities\n(22-26%)', 'Recreation\n(10-13%)']
-top3_values = [35, 24, 12]
-others_value = 29
-pie_labels = top3_labels + ['Other 7 Items\n(29%)']
+top3_labels = [f'{c}\n({r:.0f}%)' for c, r in zip(categories[:3], contribution_rates[:3])]
+top3_values = contribution_rates[:3]
+others_value = sum(contribution_rates[3:])
+pie_labels = top3_labels + [f'Other {len(categories) - 3} Items\n({others_value:.0f}%)']
 pie_values = top3_values + [others_value]
-pie_colors = ['#FF6B6B', '#FFA500', '#4ECDC4', '#CCCCCC']
+pie_colors = colors[:3] + ['#CCCCCC']
 
 wedges, texts, autotexts = ax3.pie(pie_values, labels=pie_labels, colors=pie_colors,
                                      autopct='%1.0f%%', startangle=90,
@@ -111,31 +135,37 @@ for autotext in autotexts:
     autotext.set_fontsize(13)
     autotext.set_fontweight('bold')
 
-ax3.set_title('Contribution Rate Composition\n(Top 3: ~70%)',
+ax3.set_title(f'Contribution Rate Composition\n(Top 3: ~{sum(top3_values):.0f}%)',
               fontsize=14, fontweight='bold', pad=15)
 
 # ========================================
 # Graph 4: Cumulative Contribution by Period (Stacked Bar)
 # ========================================
-ax4 = plt.subplot(2, 2, 4)
-
-# Period data (estimated)
-periods = ['2015-2021\nStable', '2022-2024\nSurge', 'Total\n2015-2024']
-period_food = [0.7, 3.3, 4.0]
-period_energy = [0.0, 2.75, 2.75]
-period_entertainment = [0.4, 0.95, 1.35]
-period_others = [0.5, 2.9, 3.4]
+ax4 = fig.add_subplot(2, 2, 4)
+
+# Period data: stable period up to 2021, surge period from 2022
+first_period, split_period, last_period = result.periods[0], '2021', result.periods[-1]
+periods = [f'{first_period}-{split_period}\nStable', f'{int(split_period) + 1}-{last_period}\nSurge',
+           f'Total\n{first_period}-{last_period}']
+period_contributions = [result.between(first_period, split_period),
+                        result.between(split_period, last_period),
+                        result.between(first_period, last_period)]
+top3 = final.index[:3]
+period_food = [p[top3[0]] for p in period_contributions]
+period_energy = [p[top3[1]] for p in period_contributions]
+period_entertainment = [p[top3[2]] for p in period_contributions]
+period_others = [p.drop(top3).sum() for p in period_contributions]
 
 width = 0.6
 x_pos = np.arange(len(periods))
 
 # Stacked bar chart
-p1 = ax4.bar(x_pos, period_food, width, label='Food', color='#FF6B6B', edgecolor='black')
+p1 = ax4.bar(x_pos, period_food, width, label=categories[0], color=colors[0], edgecolor='black')
 p2 = ax4.bar(x_pos, period_energy, width, bottom=period_food,
-            label='Utilities', color='#FFA500', edgecolor='black')
+            label=categories[1], color=colors[1], edgecolor='black')
 p3 = ax4.bar(x_pos, period_entertainment, width,
             bottom=np.array(period_food) + np.array(period_energy),
-            label='Recreation', color='#4ECDC4', edgecolor='black')
+            label=categories[2], color=colors[2], edgecolor='black')
 p4 = ax4.bar(x_pos, period_others, width,
             bottom=np.array(period_food) + np.array(period_energy) + np.array(period_entertainment),
             label='Others', color='#96CEB4', edgecolor='black')
@@ -151,22 +181,24 @@ ax4.grid(True, axis='y', alpha=0.3)
 totals = [sum([period_food[i], period_energy[i], period_entertainment[i], period_others[i]])
           for i in range(len(periods))]
 for i, (pos, total) in enumerate(zip(x_pos, totals)):
-    ax4.text(pos, total + 0.3, f'+{total:.1f}',
+    ax4.text(pos, total + 0.3, f'{total:+.1f}',
             ha='center', va='bottom', fontsize=11, fontweight='bold')
 
 # Overall title
-fig.suptitle('Japan Price Level Change: Cumulative Contribution Analysis 2015-2024',
+fig.suptitle(f'Japan Price Level Change: Cumulative Contribution Analysis {years[0]}-{years[-1]}',
              fontsize=18, fontweight='bold', y=0.995)
 
 # Footnote
 fig.text(0.5, 0.01,
          'Source: Statistics Bureau of Japan "Consumer Price Index" (2020 base)\n'
-         'Note: Cumulative contributions include estimated values. Analysis based on 2015 index (98.2) to 2024 (109.5).',
+         'Note: Category indices are illustrative estimates (2020=100), not official item indices. '
+         f'Analysis based on {years[0]} index '
+         f'({cpi_index[0]:.1f}) to {years[-1]} ({cpi_index[-1]:.1f}).',
          ha='center', fontsize=9, style='italic', color='gray')
 
-plt.tight_layout(rect=[0, 0.03, 1, 0.99])
+fig.tight_layout(rect=[0, 0.03, 1, 0.99])
 
 # Save
 output_path = '物価水準変化の内訳/cumulative_contribution_graph.png'
-plt.savefig(output_path, dpi=300, bbox_inches='tight', facecolor='white')
+save_figure(fig, output_path, dpi=300, bbox_inches='tight', facecolor='white')
 print(f'Graph saved: {output_path}')